@@ -0,0 +1,158 @@
+# benchmark.py
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from indicators import MovingAverageEngine
+from stock import add_moving_averages, load_many, project_trends
+import plotly.io as pio
+import plotly.tools
+from plotting import candlestick_figure, figure_cache, plot_candlestick_with_moving_averages
+
+N_TICKERS = 500
+N_BARS = 252 * 10
+
+
+# Random-walk closing prices, one row per ticker
+def make_prices(n_tickers=N_TICKERS, n_bars=N_BARS, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(size=(n_tickers, n_bars)), axis=1)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+# Baseline: three rolling().mean() passes over a DataFrame per ticker; also the reference values
+def pandas_moving_averages(prices):
+    frames = []
+    for row in prices:
+        data = pd.DataFrame({'Close': row})
+        data['30D MA'] = data['Close'].rolling(window=30).mean()
+        data['60D MA'] = data['Close'].rolling(window=60).mean()
+        data['90D MA'] = data['Close'].rolling(window=90).mean()
+        frames.append(data)
+    return frames
+
+
+def engine_per_ticker(prices):
+    return [MovingAverageEngine().fit(row) for row in prices]
+
+
+def engine_batched(prices):
+    return MovingAverageEngine().fit(prices)
+
+
+def engine_append_one_bar(engine, new_bar):
+    return engine.update(new_bar)
+
+
+def bench_moving_averages():
+    prices = make_prices()
+    print(f"Moving averages (30/60/90D SMA), {N_TICKERS} tickers x {N_BARS} bars")
+
+    _, t_pandas = timed(pandas_moving_averages, prices)
+    _, t_per_ticker = timed(engine_per_ticker, prices)
+    batched, t_batched = timed(engine_batched, prices)
+    print(f"  pandas rolling per ticker : {t_pandas * 1000:8.1f} ms")
+    print(f"  engine per ticker         : {t_per_ticker * 1000:8.1f} ms  ({t_pandas / t_per_ticker:.1f}x)")
+    print(f"  engine batched matrix     : {t_batched * 1000:8.1f} ms  ({t_pandas / t_batched:.1f}x)")
+
+    engine = MovingAverageEngine()
+    engine.fit(prices)
+    _, t_append = timed(engine_append_one_bar, engine, prices[:, -1:])
+    print(f"  engine append one bar     : {t_append * 1000:8.3f} ms")
+
+    reference = pandas_moving_averages(prices[:1])[0]
+    assert np.allclose(batched['90D MA'][0], reference['90D MA'], equal_nan=True)
+
+
+# Baseline: one LinearRegression fit per ticker; also the reference projections
+def sklearn_trends(prices, num_days=30):
+    projections = []
+    for row in prices:
+        X = np.arange(len(row)).reshape(-1, 1)
+        model = LinearRegression().fit(X, row)
+        projections.append(model.predict(np.arange(len(row), len(row) + num_days).reshape(-1, 1)))
+    return np.array(projections)
+
+
+def bench_trend_forecast():
+    prices = make_prices()
+    print(f"30-day trend projections, {N_TICKERS} tickers x {N_BARS} bars")
+
+    reference, t_sklearn = timed(sklearn_trends, prices)
+    batched, t_batched = timed(project_trends, prices)
+    print(f"  sklearn per ticker        : {t_sklearn * 1000:8.1f} ms")
+    print(f"  closed-form batched       : {t_batched * 1000:8.1f} ms  ({t_sklearn / t_batched:.1f}x)")
+
+    assert np.allclose(batched, reference)
+
+
+# Local stand-in for Yahoo Finance: ten years of bars after a fixed network latency
+def make_fake_fetcher(latency=0.02):
+    dates = pd.bdate_range("2015-01-01", periods=N_BARS, name='Date')
+    bars = pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0, 'Volume': 1}, index=dates)
+
+    def fetcher(ticker, start):
+        time.sleep(latency)
+        return bars[bars.index >= start]
+    return fetcher
+
+
+def bench_bulk_loader(n_tickers=N_TICKERS):
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+    fetcher = make_fake_fetcher()
+    print(f"Bulk loading {n_tickers} tickers from a fake source with 20 ms latency")
+
+    for max_workers in (1, 8, 32):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            (loaded, failures), t_cold = timed(load_many, tickers, fetcher, cache_dir, 50, max_workers)
+            (loaded, failures), t_warm = timed(load_many, tickers, fetcher, cache_dir, 50, max_workers)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        assert len(loaded) == n_tickers and not failures
+        print(f"  {max_workers:2d} workers  cold: {n_tickers / t_cold:7.1f} tickers/s   warm: {n_tickers / t_warm:7.1f} tickers/s")
+
+
+# What st.plotly_chart does with its argument before sending it to the browser
+def plotly_chart_spec(figure_or_data):
+    figure = plotly.tools.return_figure_from_figure_or_data(figure_or_data, validate_figure=True)
+    return pio.to_json(figure, validate=False)
+
+
+def bench_plot_payloads():
+    dates = pd.bdate_range("2015-01-01", periods=N_BARS, name='Date')
+    close = make_prices(1)[0]
+    data = add_moving_averages(pd.DataFrame({'Date': dates, 'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000}))
+    # Payload size and time to chart every daily bar, then per LOD range: the first render, a
+    # render from the cached Figure, and a render from that Figure parsed back from JSON
+    print(f"Candlestick charts as rendered by st.plotly_chart, {N_BARS} daily bars + 30/60/90D MA")
+
+    def full_figure():
+        return plotly_chart_spec(plot_candlestick_with_moving_averages(data, "Full", ma_30=data['30D MA'], ma_60=data['60D MA'], ma_90=data['90D MA']))
+
+    payload, t_full = timed(full_figure)
+    print(f"  daily, all bars         : {len(payload) / 1024:8.1f} KiB  {t_full * 1000:7.1f} ms")
+    for label, offset in (("6 months", pd.DateOffset(months=6)), ("5 years", pd.DateOffset(years=5)), ("max", None)):
+        start = dates[0] if offset is None else dates[-1] - offset
+        figure_cache.clear()
+        payload, t_cold = timed(lambda: plotly_chart_spec(candlestick_figure(data, "LOD", "BENCH", start)))
+        _, t_warm = timed(lambda: plotly_chart_spec(candlestick_figure(data, "LOD", "BENCH", start)))
+        # Parsing the figure from JSON on every rerun, to compare with passing the cached Figure
+        cached_json = candlestick_figure(data, "LOD", "BENCH", start).to_json()
+        _, t_json = timed(lambda: plotly_chart_spec(pio.from_json(cached_json)))
+        print(f"  LOD {label:<8} cold       : {len(payload) / 1024:8.1f} KiB  {t_cold * 1000:7.1f} ms   "
+              f"cached figure: {t_warm * 1000:5.1f} ms   from JSON: {t_json * 1000:5.1f} ms")
+
+
+if __name__ == "__main__":
+    bench_moving_averages()
+    bench_trend_forecast()
+    bench_bulk_loader()
+    bench_plot_payloads()
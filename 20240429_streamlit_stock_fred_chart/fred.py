@@ -1,16 +1,97 @@
 # fred.py
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from fredapi import Fred
+import pandas as pd
 import streamlit as st
 
 # Initialize FRED API
 fred = Fred(api_key='x')
 
-@st.cache_data
+FRED_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "fred")
+# Recent observations are requested again on refresh because FRED revises them in later vintages
+REVISION_LOOKBACK = 12
+# Seconds before a stored series is checked against FRED again
+MAX_AGE = 3600
+
+# Parquet values and JSON metadata of one stored series
+def series_paths(series_id, store_dir=FRED_CACHE_DIR):
+    base = os.path.join(store_dir, series_id)
+    return base + ".parquet", base + ".json"
+
+def read_stored_series(series_id, store_dir=FRED_CACHE_DIR):
+    values_path, meta_path = series_paths(series_id, store_dir)
+    if not (os.path.exists(values_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    return pd.read_parquet(values_path)['value'].rename(series_id), meta
+
+def write_stored_series(series_id, series, meta, store_dir=FRED_CACHE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+    values_path, meta_path = series_paths(series_id, store_dir)
+    # Per-process temp names, so two Streamlit processes refreshing a series don't clobber each other
+    values_tmp = f"{values_path}.{os.getpid()}.tmp"
+    series.rename('value').to_frame().to_parquet(values_tmp)
+    os.replace(values_tmp, values_path)
+    meta_tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(meta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(meta_tmp, meta_path)
+
+# Get one series from the local store, refreshing it from FRED when it is stale.
+# A refresh first compares FRED's last_updated stamp with the stored one, and only when a new
+# vintage was published requests the observations from the last REVISION_LOOKBACK onwards.
+# When FRED is unreachable the stored observations are returned as they are; only a series
+# that was never stored lets the error through.
+def get_series(series_id, client=None, store_dir=FRED_CACHE_DIR, max_age=MAX_AGE):
+    client = client or fred
+    stored, meta = read_stored_series(series_id, store_dir)
+    now = time.time()
+    if stored is not None and now - meta['refreshed_at'] < max_age:
+        return stored
+    try:
+        return refresh_series(series_id, client, stored, meta, now, store_dir)
+    except Exception:
+        if stored is None:
+            raise
+        return stored
+
+def refresh_series(series_id, client, stored, meta, now, store_dir=FRED_CACHE_DIR):
+    last_updated = str(client.get_series_info(series_id)['last_updated'])
+    if stored is not None and meta['last_updated'] == last_updated:
+        meta['refreshed_at'] = now
+        write_stored_series(series_id, stored, meta, store_dir)
+        return stored
+
+    if stored is None or stored.empty:
+        series = client.get_series(series_id)
+    else:
+        start = stored.index[max(0, len(stored) - REVISION_LOOKBACK)]
+        new_obs = client.get_series(series_id, observation_start=start.strftime("%Y-%m-%d"))
+        series = pd.concat([stored[stored.index < start], new_obs])
+    series = series[~series.index.duplicated(keep='last')].sort_index().rename(series_id)
+    series.index.name = 'date'
+    meta = {'last_updated': last_updated, 'refreshed_at': now}
+    write_stored_series(series_id, series, meta, store_dir)
+    return series
+
+# Get several series at once, refreshing them concurrently. Returns {series_id: series}.
+def get_series_many(series_ids, client=None, store_dir=FRED_CACHE_DIR, max_age=MAX_AGE, max_workers=4):
+    series_ids = list(dict.fromkeys(series_ids))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(lambda series_id: get_series(series_id, client, store_dir, max_age), series_ids)
+        return dict(zip(series_ids, results))
+
+@st.cache_data(ttl=MAX_AGE)
 def get_economic_data():
-    gdp = fred.get_series('GDP')
-    interest_rate = fred.get_series('FEDFUNDS')
-    inflation = fred.get_series('T5YIFR')
-    unemployment = fred.get_series('UNRATE')
+    series = get_series_many(['GDP', 'FEDFUNDS', 'T5YIFR', 'UNRATE'])
+    gdp = series['GDP']
+    interest_rate = series['FEDFUNDS']
+    inflation = series['T5YIFR']
+    unemployment = series['UNRATE']
     return gdp, interest_rate, inflation, unemployment
 
 
@@ -21,10 +102,9 @@ def get_economic_data():
 3. Initialize the FRED API with an API key
 4. Define a function named `get_economic_data` decorated with `@st.cache_data` to cache its output
 5. Inside the function:
-    6. Retrieve GDP data using the `get_series` method of the FRED API
-    7. Retrieve interest rate data using the `get_series` method of the FRED API
-    8. Retrieve inflation rate data using the `get_series` method of the FRED API
-    9. Retrieve unemployment rate data using the `get_series` method of the FRED API
-10. Return GDP, interest rate, inflation rate, and unemployment rate data
+    6. Fetch GDP, interest rate, inflation rate and unemployment rate concurrently with `get_series_many`
+    7. Each series is served from the local store under `cache/fred` and only refreshed when FRED
+       publishes a new vintage, requesting the most recent observations again to pick up revisions
+8. Return GDP, interest rate, inflation rate, and unemployment rate data
 
 """
\ No newline at end of file
@@ -0,0 +1,112 @@
+# indicators.py
+import numpy as np
+from scipy.signal import lfilter
+
+
+# Compute any set of simple and exponential moving averages over one or many price series.
+# SMAs come from a single cumulative-sum pass, EMAs from a first-order IIR filter. Only the
+# last max(window) cumulative sums and the last EMA values are kept, so new bars can be
+# appended with update() without recomputing the history.
+class MovingAverageEngine:
+    def __init__(self, sma_windows=(30, 60, 90), ema_windows=()):
+        self.sma_windows = tuple(sma_windows)
+        self.ema_windows = tuple(ema_windows)
+        self.reset()
+
+    def reset(self):
+        self.n_bars = 0
+        self._csum = None
+        self._nan_csum = None
+        self._ema_last = {}
+
+    # Column names of the computed averages, in output order
+    def names(self):
+        return [f'{w}D MA' for w in self.sma_windows] + [f'{w}D EMA' for w in self.ema_windows]
+
+    # Compute all averages for a full history, discarding any previous state
+    def fit(self, prices):
+        self.reset()
+        return self.update(prices)
+
+    # Append new bars and return the averages for those bars only.
+    # `prices` is a 1-D array of bars or a 2-D (series x bars) array.
+    def update(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        squeeze = prices.ndim == 1
+        prices = np.ascontiguousarray(np.atleast_2d(prices))
+        n_series, m = prices.shape
+        if m == 0:
+            empty = np.empty(0) if squeeze else np.empty((n_series, 0))
+            return {name: empty for name in self.names()}
+
+        if self._csum is None:
+            self._csum = np.zeros((n_series, 1))
+            self._nan_csum = np.zeros((n_series, 1))
+        elif self._csum.shape[0] != n_series:
+            raise ValueError(f"Expected {self._csum.shape[0]} series, got {n_series}")
+
+        # Running sums of the prices and of the NaN count, prefixed with the kept tail
+        is_nan = np.isnan(prices)
+        csum = np.concatenate([self._csum, self._csum[:, -1:] + np.cumsum(np.where(is_nan, 0.0, prices), axis=1)], axis=1)
+        nan_csum = np.concatenate([self._nan_csum, self._nan_csum[:, -1:] + np.cumsum(is_nan, axis=1)], axis=1)
+        tail = self._csum.shape[1]
+
+        results = {}
+        for w in self.sma_windows:
+            out = np.full((n_series, m), np.nan)
+            # Bars before the w-th bar of the whole series have no full window yet
+            first = max(0, w - self.n_bars - 1)
+            if first < m:
+                hi = slice(tail + first, tail + m)
+                lo = slice(tail + first - w, tail + m - w)
+                means = (csum[:, hi] - csum[:, lo]) / w
+                means[(nan_csum[:, hi] - nan_csum[:, lo]) > 0] = np.nan
+                out[:, first:] = means
+            results[f'{w}D MA'] = out
+
+        for w in self.ema_windows:
+            results[f'{w}D EMA'] = self._update_ema(prices, is_nan, w)
+
+        keep = max(self.sma_windows, default=0) + 1
+        self._csum = csum[:, -keep:]
+        self._nan_csum = nan_csum[:, -keep:]
+        self.n_bars += m
+
+        if squeeze:
+            results = {name: values[0] for name, values in results.items()}
+        return results
+
+    # EMA of every row that skips NaN bars: a NaN bar repeats the previous EMA and the next price
+    # continues from it, which matches pandas' ewm(span=w, adjust=False, ignore_na=True).
+    # The last valid EMA per row is kept so update() carries it across chunks.
+    def _update_ema(self, prices, is_nan, w):
+        alpha = 2.0 / (w + 1)
+        b, a = [alpha], [1.0, alpha - 1.0]
+        last = self._ema_last.get(w)
+        if last is None:
+            last = np.full((prices.shape[0], 1), np.nan)
+        out = np.full(prices.shape, np.nan)
+
+        # Rows without gaps are filtered together. Seeding the filter state with the first price
+        # makes the first EMA equal to it.
+        dense = ~is_nan.any(axis=1)
+        if dense.any():
+            seed = np.where(np.isnan(last[dense]), prices[dense, :1], last[dense])
+            out[dense], _ = lfilter(b, a, prices[dense], axis=1, zi=(1.0 - alpha) * seed)
+
+        # Rows with gaps are filtered over their valid prices, then forward-filled over the gaps
+        for row in np.flatnonzero(~dense):
+            valid = ~is_nan[row]
+            if not valid.any():
+                out[row] = last[row, 0]
+                continue
+            values = prices[row, valid]
+            seed = values[0] if np.isnan(last[row, 0]) else last[row, 0]
+            filtered, _ = lfilter(b, a, values, zi=[(1.0 - alpha) * seed])
+            # Index into `filtered` of the latest valid price at or before each bar
+            latest = np.cumsum(valid) - 1
+            out[row] = np.where(latest >= 0, filtered[np.maximum(latest, 0)], last[row, 0])
+
+        # Gaps are forward-filled, so the last column holds the last valid EMA of every row
+        self._ema_last[w] = out[:, -1:]
+        return out
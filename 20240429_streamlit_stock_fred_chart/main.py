@@ -1,14 +1,14 @@
 # main.py
 import streamlit as st
-from stock import load_data, add_moving_averages, predict_future_prices
-from plotting import plot_economic_data, plot_candlestick_with_moving_averages
+from stock import load_data, load_many, close_matrix, add_moving_averages, predict_future_prices, predict_future_prices_batch
+from plotting import plot_economic_data, candlestick_figure
 from fred import get_economic_data  
+from sp500 import load_symbols
 import pandas as pd
 
-@st.cache_data
+@st.cache_data(ttl=3600)
 def load_sp500_symbols():
-    table = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
-    return table[0]['Symbol'].tolist()
+    return load_symbols()
 
 # Load S&P 500 symbols
 symbols = load_sp500_symbols()
@@ -16,6 +16,10 @@ symbols = load_sp500_symbols()
 # Sidebar for stock selection
 selected_symbol = st.sidebar.selectbox("Select a stock symbol", symbols, key="stock_selectbox")
 
+# Sidebar for the visible chart range; the candle resolution follows from it
+chart_ranges = {"6 Months": pd.DateOffset(months=6), "1 Year": pd.DateOffset(years=1), "5 Years": pd.DateOffset(years=5), "Max": None}
+selected_range = st.sidebar.selectbox("Chart range", list(chart_ranges), index=1, key="range_selectbox")
+
 # Load stock data
 stock_data = load_data(selected_symbol)
 
@@ -30,15 +34,46 @@ sp500_data = load_data("^GSPC")
 sp500_data = add_moving_averages(sp500_data)
 
 
+# Visible date range of the candlestick charts
+def visible_range(data):
+    end = data['Date'].iloc[-1]
+    offset = chart_ranges[selected_range]
+    return (data['Date'].iloc[0] if offset is None else end - offset), end
+
 # Display candlestick chart with moving averages for selected stock
 # Display the first graph in the first column
 col1, col2 = st.columns(2)
 with col1:
-    st.plotly_chart(plot_candlestick_with_moving_averages(stock_data, f"{selected_symbol} Stock Chart", ma_30=stock_data['30D MA'], ma_60=stock_data['60D MA'], ma_90=stock_data['90D MA'], selected_symbol=selected_symbol))
+    start, end = visible_range(stock_data)
+    st.plotly_chart(candlestick_figure(stock_data, f"{selected_symbol} Stock Chart", selected_symbol, start, end))
 
 # Display S&P 500 candlestick chart with moving averages in the second column
 with col2:
-    st.plotly_chart(plot_candlestick_with_moving_averages(sp500_data, "S&P 500 Index Candlestick Chart", ma_30=sp500_data['30D MA'], ma_60=sp500_data['60D MA'], ma_90=sp500_data['90D MA']))
+    start, end = visible_range(sp500_data)
+    st.plotly_chart(candlestick_figure(sp500_data, "S&P 500 Index Candlestick Chart", "^GSPC", start, end))
+
+# Load the whole S&P 500 universe through the shared cache and rank symbols by projected 30-day change
+@st.cache_data(ttl=3600)
+def load_trend_screen(symbols):
+    progress = st.progress(0.0, text="Loading S&P 500 prices")
+    loaded, failures = load_many(symbols, progress=lambda done, total: progress.progress(done / total, text=f"Loaded {done}/{total} symbols"))
+    progress.empty()
+    closes = close_matrix(loaded)
+    projections = predict_future_prices_batch(closes)
+    last_close = closes.ffill().iloc[-1]
+    screen = pd.DataFrame({
+        'Last Close': last_close,
+        'Projected Close (30D)': projections.iloc[-1],
+        'Projected Change %': (projections.iloc[-1] / last_close - 1) * 100,
+    }).sort_values('Projected Change %', ascending=False)
+    return screen, failures
+
+if st.sidebar.checkbox("Show S&P 500 trend screen", key="trend_screen_checkbox"):
+    screen, failures = load_trend_screen(symbols)
+    st.subheader("S&P 500 Linear Trend Screen")
+    st.dataframe(screen)
+    if failures:
+        st.caption(f"Skipped {len(failures)} symbols that failed to load: {', '.join(sorted(failures))}")
 
 # Display economic data
 gdp, interest_rate, inflation, unemployment = get_economic_data()
@@ -1,4 +1,6 @@
 # plotting.py
+import threading
+import pandas as pd
 import plotly.graph_objs as go
 
 # Plot economic data
@@ -26,6 +28,58 @@ def plot_candlestick_with_moving_averages(data, title, ma_30=None, ma_60=None, m
     fig.update_layout(title=title, xaxis_title='Date', yaxis_title='Price', xaxis_rangeslider_visible=False)
     return fig
 
+# Bar resolution used for each level of detail, as a pandas resample rule
+RESOLUTIONS = {'daily': None, 'weekly': 'W-FRI', 'monthly': 'ME'}
+
+# Built figures, one per (symbol, resolution), shared by every Streamlit session thread
+figure_cache = {}
+figure_cache_lock = threading.Lock()
+
+# Pick the coarsest resolution that still shows a few hundred candles for the visible range
+def choose_resolution(start, end):
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    if days <= 400:
+        return 'daily'
+    if days <= 2200:
+        return 'weekly'
+    return 'monthly'
+
+# Aggregate daily bars into weekly or monthly OHLC; moving averages keep their last daily value
+def resample_ohlc(data, resolution):
+    rule = RESOLUTIONS[resolution]
+    if rule is None:
+        return data
+    agg = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last'}
+    if 'Volume' in data.columns:
+        agg['Volume'] = 'sum'
+    for column in data.columns:
+        if column.endswith('MA'):
+            agg[column] = 'last'
+    bars = data.set_index('Date').resample(rule).agg(agg).dropna(subset=['Close'])
+    return bars.reset_index()
+
+# Plot the visible date range at a level of detail picked from its length.
+# The Figure is cached per (symbol, resolution) until the inputs change; st.plotly_chart only
+# reads it, and a Figure is the one input it serializes without validating it again.
+def candlestick_figure(data, title, symbol, start=None, end=None, resolution=None):
+    start = pd.Timestamp(start) if start is not None else data['Date'].iloc[0]
+    end = pd.Timestamp(end) if end is not None else data['Date'].iloc[-1]
+    resolution = resolution or choose_resolution(start, end)
+    key = (symbol, resolution)
+    fingerprint = (title, start, end, data['Date'].iloc[-1], data['Close'].iloc[-1])
+    with figure_cache_lock:
+        cached = figure_cache.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    visible = data[(data['Date'] >= start) & (data['Date'] <= end)]
+    bars = resample_ohlc(visible, resolution)
+    ma = {f'ma_{w}': bars.get(f'{w}D MA') for w in (30, 60, 90)}
+    fig = plot_candlestick_with_moving_averages(bars, f"{title} ({resolution})", **ma)
+    with figure_cache_lock:
+        figure_cache[key] = (fingerprint, fig)
+    return fig
+
 """
 
 
@@ -0,0 +1,68 @@
+# sp500.py
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+
+WIKI_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "sp500_constituents.json")
+# Seconds before the constituent list is scraped again
+TTL = 24 * 3600
+SCHEMA_VERSION = 1
+COLUMNS = {'Symbol': 'symbol', 'Security': 'name', 'GICS Sector': 'sector', 'GICS Sub-Industry': 'sub_industry', 'CIK': 'cik'}
+
+# Constituents already loaded by this process, keyed by index path
+loaded_indexes = {}
+
+# Parse the constituent table from the Wikipedia page (a URL or a saved HTML file)
+def parse_constituents(source=WIKI_URL):
+    table = pd.read_html(source)[0]
+    constituents = table[list(COLUMNS)].rename(columns=COLUMNS)
+    constituents['cik'] = constituents['cik'].astype(int).map('{:010d}'.format)
+    return constituents.astype(str).reset_index(drop=True)
+
+# Persist the constituents with a content hash, so a changed membership shows up as a new version
+def write_index(constituents, path=INDEX_PATH):
+    records = constituents.to_dict(orient='list')
+    payload = json.dumps(records, sort_keys=True)
+    index = {
+        'schema': SCHEMA_VERSION,
+        'version': hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16],
+        'fetched_at': time.time(),
+        'constituents': records,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+    return index
+
+def read_index(path=INDEX_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    return index if index.get('schema') == SCHEMA_VERSION else None
+
+# Load the constituent index, scraping the source again only once the stored copy is older than
+# the TTL. An outdated constituent list beats an empty symbol picker, so a failed scrape keeps the
+# old index; without one, the error is raised.
+def load_index(path=INDEX_PATH, ttl=TTL, source=WIKI_URL):
+    index = loaded_indexes.get(path) or read_index(path)
+    if index is None or time.time() - index['fetched_at'] >= ttl:
+        try:
+            index = write_index(parse_constituents(source), path)
+        except Exception:
+            if index is None:
+                raise
+    loaded_indexes[path] = index
+    return index
+
+# Constituents as a DataFrame with symbol, name, sector, sub_industry and cik columns
+def load_constituents(path=INDEX_PATH, ttl=TTL, source=WIKI_URL):
+    return pd.DataFrame(load_index(path, ttl, source)['constituents'])
+
+def load_symbols(path=INDEX_PATH, ttl=TTL, source=WIKI_URL):
+    return list(load_index(path, ttl, source)['constituents']['symbol'])
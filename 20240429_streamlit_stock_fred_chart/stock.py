@@ -1,32 +1,161 @@
 #stock.py
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yfinance as yf
 import numpy as np
-from sklearn.linear_model import LinearRegression
+import pandas as pd
+from indicators import MovingAverageEngine
 
-# Load stock data
-def load_data(ticker):
-    data = yf.download(ticker, start="2015-01-01")
-    data.reset_index(inplace=True)
-    return data
+START_DATE = "2015-01-01"
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+# Relative change in a cached bar's adjusted open that counts as a re-adjusted history
+READJUST_RTOL = 1e-6
+
+# Download daily bars from Yahoo Finance starting at `start`.
+# A Ticker object per call keeps concurrent downloads from sharing yf.download's global state.
+def yf_fetcher(ticker, start):
+    return yf.Ticker(ticker).history(start=start, auto_adjust=True, actions=False)
+
+# Parquet file holding the cached bars of one ticker
+def cache_path(ticker, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9.-]', '_', ticker) + ".parquet")
+
+# Flatten yfinance's (Price, Ticker) columns and index the bars by a sorted, unique date
+def normalize_bars(data):
+    data = data.copy()
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    data.index = pd.to_datetime(data.index)
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    data.index.name = 'Date'
+    data = data[~data.index.duplicated(keep='last')]
+    return data.sort_index()
 
-# Add moving averages to data
-def add_moving_averages(data):
-    data['30D MA'] = data['Close'].rolling(window=30).mean()
-    data['60D MA'] = data['Close'].rolling(window=60).mean()
-    data['90D MA'] = data['Close'].rolling(window=90).mean()
+# Read the cached bars of a ticker, or None when nothing is cached yet
+def read_cache(ticker, cache_dir=CACHE_DIR):
+    path = cache_path(ticker, cache_dir)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+# Atomically replace the cached bars of a ticker
+def write_cache(ticker, data, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(ticker, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    data.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+# A split or dividend re-scales every adjusted bar before it, so the refetched copy of the last
+# cached bar no longer matches. Only Open is compared: High, Low and Close of that bar still
+# move while it is a partial intraday bar.
+def history_readjusted(cached, new_bars):
+    last_date = cached.index.max()
+    if last_date not in new_bars.index:
+        return False
+    return not np.isclose(new_bars.at[last_date, 'Open'], cached.at[last_date, 'Open'], rtol=READJUST_RTOL)
+
+# Load stock data from the local cache, downloading only the bars after the last cached date
+def load_data(ticker, fetcher=None, cache_dir=CACHE_DIR):
+    fetcher = fetcher or yf_fetcher
+    cached = read_cache(ticker, cache_dir)
+    if cached is None or cached.empty:
+        data = normalize_bars(fetcher(ticker, START_DATE))
+    else:
+        # The last cached bar is fetched again since it may have been a partial intraday bar
+        last_date = cached.index.max()
+        new_bars = fetcher(ticker, last_date.strftime("%Y-%m-%d"))
+        data = cached
+        if new_bars is not None and not new_bars.empty:
+            new_bars = normalize_bars(new_bars)
+            if history_readjusted(cached, new_bars):
+                # The cached history is on the old adjustment basis, so download it all again
+                data = normalize_bars(fetcher(ticker, START_DATE))
+            else:
+                merged = normalize_bars(pd.concat([cached, new_bars]))
+                # Skip rewriting the file when the top-up only repeated bars we already had
+                if not merged.equals(cached):
+                    data = merged
+    if not data.empty and data is not cached:
+        write_cache(ticker, data, cache_dir)
+    data = data.reset_index()
     return data
 
+# Load many tickers through the shared cache with a bounded thread pool.
+# Tickers are submitted in batches; a failing ticker is recorded and the batch carries on.
+# Returns ({ticker: data}, {ticker: error message}).
+def load_many(tickers, fetcher=None, cache_dir=CACHE_DIR, batch_size=50, max_workers=8, progress=None):
+    tickers = list(dict.fromkeys(tickers))
+    loaded = {}
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for start in range(0, len(tickers), batch_size):
+            batch = tickers[start:start + batch_size]
+            futures = {pool.submit(load_data, ticker, fetcher, cache_dir): ticker for ticker in batch}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    failures[ticker] = f"{type(e).__name__}: {e}"
+                    continue
+                if data.empty:
+                    failures[ticker] = "No data returned"
+                else:
+                    loaded[ticker] = data
+            if progress is not None:
+                progress(len(loaded) + len(failures), len(tickers))
+    return loaded, failures
+
+# Add moving averages to data in a single pass over the closing prices
+def add_moving_averages(data, sma_windows=(30, 60, 90), ema_windows=()):
+    engine = MovingAverageEngine(sma_windows, ema_windows)
+    averages = engine.fit(data['Close'].to_numpy(dtype=np.float64))
+    return data.assign(**averages)
+
+# Fit a least-squares line against the bar index for every row of a (series x bars) matrix.
+# NaNs (e.g. bars before a listing date) are left out of each row's fit.
+def fit_trends(prices):
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    mask = ~np.isnan(prices)
+    # Centering the bar index keeps the sums small and the normal equations well conditioned
+    x = np.arange(prices.shape[1], dtype=np.float64) - (prices.shape[1] - 1) / 2
+    xm = np.where(mask, x, 0.0)
+    y = np.where(mask, prices, 0.0)
+    n = mask.sum(axis=1)
+    sx = xm.sum(axis=1)
+    sy = y.sum(axis=1)
+    sxx = (xm * xm).sum(axis=1)
+    sxy = (xm * y).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        intercept = (sy - slope * sx) / n
+    # Shift the intercept back so it refers to bar 0
+    return slope, intercept - slope * (prices.shape[1] - 1) / 2
+
+# Project the fitted trend of every row num_days bars past the end of the matrix
+def project_trends(prices, num_days=30):
+    prices = np.atleast_2d(np.asarray(prices, dtype=np.float64))
+    slope, intercept = fit_trends(prices)
+    future_x = np.arange(prices.shape[1], prices.shape[1] + num_days, dtype=np.float64)
+    return intercept[:, None] + slope[:, None] * future_x
+
+# Stack the closing prices of many tickers into one (dates x symbols) frame
+def close_matrix(data_by_symbol):
+    closes = {symbol: data.set_index('Date')['Close'] for symbol, data in data_by_symbol.items()}
+    return pd.concat(closes, axis=1).sort_index()
+
+# Predict future prices for every symbol at once from a (dates x symbols) frame of closes
+def predict_future_prices_batch(closes, num_days=30):
+    projections = project_trends(closes.to_numpy(dtype=np.float64).T, num_days)
+    return pd.DataFrame(projections.T, index=pd.RangeIndex(1, num_days + 1, name='Day'), columns=closes.columns)
+
 # Predict future stock prices
 def predict_future_prices(data, num_days=30):
-    X = np.array(range(len(data))).reshape(-1, 1)
-    y = data['Close']
-    model = LinearRegression()
-    model.fit(X, y)
-    future_X = np.array(range(len(data), len(data) + num_days)).reshape(-1, 1)
-    future_y = model.predict(future_X)
-    return future_y
-
+    return project_trends(data['Close'].to_numpy(dtype=np.float64), num_days)[0]
 
 """
 
-"""
\ No newline at end of file
+"""
@@ -0,0 +1,399 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import stock
+import fred
+import sp500
+import plotting
+from indicators import MovingAverageEngine
+
+
+def make_bars(start, end, scale=1.0):
+    dates = pd.bdate_range(start, end)
+    # Prices depend only on the date, so refetched bars match the cached ones
+    close = (100 + 0.05 * (dates - pd.Timestamp("2015-01-01")).days.to_numpy()) / scale
+    return pd.DataFrame({
+        'Open': close - 1,
+        'High': close + 1,
+        'Low': close - 2,
+        'Close': close,
+        'Volume': np.full(len(dates), 1000),
+    }, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+class FakeFetcher:
+    """Offline stand-in for yf.download serving bars up to `today`."""
+
+    def __init__(self, today="2024-04-26", scale=1.0):
+        self.today = today
+        self.scale = scale
+        self.calls = []
+
+    def __call__(self, ticker, start):
+        self.calls.append((ticker, start))
+        return make_bars(start, self.today, self.scale)
+
+
+class TestStockCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def test_cold_start_downloads_full_history(self):
+        """Test an empty cache downloads everything since START_DATE"""
+        fetcher = FakeFetcher()
+        data = stock.load_data("AAPL", fetcher=fetcher, cache_dir=self.cache_dir)
+
+        self.assertEqual(fetcher.calls, [("AAPL", stock.START_DATE)])
+        self.assertIn('Date', data.columns)
+        self.assertEqual(len(data), len(make_bars(stock.START_DATE, fetcher.today)))
+
+    def test_warm_start_only_fetches_new_bars(self):
+        """Test a warm cache requests bars from the last cached date and merges them"""
+        stock.load_data("^GSPC", fetcher=FakeFetcher("2024-04-19"), cache_dir=self.cache_dir)
+
+        fetcher = FakeFetcher("2024-04-26")
+        data = stock.load_data("^GSPC", fetcher=fetcher, cache_dir=self.cache_dir)
+
+        self.assertEqual(fetcher.calls, [("^GSPC", "2024-04-19")])
+        expected = make_bars(stock.START_DATE, "2024-04-26")
+        self.assertEqual(len(data), len(expected))
+        self.assertTrue(data['Date'].is_unique)
+        self.assertEqual(data['Date'].iloc[-1], pd.Timestamp("2024-04-26"))
+
+    def test_readjusted_history_is_downloaded_again(self):
+        """Test a split that re-scales the refetched last bar replaces the whole cached history"""
+        stock.load_data("NVDA", fetcher=FakeFetcher("2024-04-19"), cache_dir=self.cache_dir)
+
+        # A 4:1 split on 2024-04-22 divides every adjusted price before it by four
+        fetcher = FakeFetcher("2024-04-26", scale=4.0)
+        data = stock.load_data("NVDA", fetcher=fetcher, cache_dir=self.cache_dir)
+
+        self.assertEqual(fetcher.calls, [("NVDA", "2024-04-19"), ("NVDA", stock.START_DATE)])
+        expected = make_bars(stock.START_DATE, "2024-04-26", scale=4.0)
+        self.assertTrue(np.allclose(data['Close'], expected['Close']))
+        self.assertTrue(np.allclose(stock.read_cache("NVDA", self.cache_dir)['Open'], expected['Open']))
+
+    def test_partial_last_bar_is_not_a_readjustment(self):
+        """Test a refetched last bar with a new close but the same open is merged, not re-downloaded"""
+        stock.load_data("AMD", fetcher=FakeFetcher("2024-04-19"), cache_dir=self.cache_dir)
+        fake = FakeFetcher("2024-04-26")
+
+        def fetcher(ticker, start):
+            bars = fake(ticker, start)
+            bars.loc[pd.Timestamp("2024-04-19"), 'Close'] += 3.0
+            return bars
+        data = stock.load_data("AMD", fetcher=fetcher, cache_dir=self.cache_dir)
+
+        self.assertEqual(fake.calls, [("AMD", "2024-04-19")])
+        self.assertEqual(data.set_index('Date').at[pd.Timestamp("2024-04-19"), 'Close'],
+                         make_bars("2024-04-19", "2024-04-19")['Close'].iloc[0] + 3.0)
+
+    def test_empty_top_up_keeps_cache(self):
+        """Test an empty download leaves the cached bars untouched"""
+        stock.load_data("MSFT", fetcher=FakeFetcher(), cache_dir=self.cache_dir)
+        data = stock.load_data("MSFT", fetcher=lambda ticker, start: pd.DataFrame(), cache_dir=self.cache_dir)
+
+        self.assertEqual(len(data), len(make_bars(stock.START_DATE, "2024-04-26")))
+
+    def test_load_many_reports_failures(self):
+        """Test the bulk loader keeps going past failing tickers and fills the cache"""
+        fake = FakeFetcher()
+
+        def fetcher(ticker, start):
+            if ticker == "BAD":
+                raise ConnectionError("timed out")
+            if ticker == "EMPTY":
+                return pd.DataFrame()
+            return fake(ticker, start)
+
+        progress = []
+        tickers = ["AAPL", "BAD", "MSFT", "EMPTY", "AAPL", "^GSPC"]
+        loaded, failures = stock.load_many(tickers, fetcher=fetcher, cache_dir=self.cache_dir, batch_size=2, max_workers=3, progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(sorted(loaded), ["AAPL", "MSFT", "^GSPC"])
+        self.assertEqual(sorted(failures), ["BAD", "EMPTY"])
+        self.assertIn("timed out", failures["BAD"])
+        self.assertEqual(progress[-1], (5, 5))
+        for ticker in loaded:
+            self.assertTrue(os.path.exists(stock.cache_path(ticker, self.cache_dir)))
+
+    def tearDown(self):
+        """Clean up any test artifacts"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+class StubFred:
+    """Offline stand-in for fredapi.Fred with a publishable vintage."""
+
+    def __init__(self):
+        self.series = {
+            'GDP': pd.Series(np.arange(40.0), index=pd.date_range("2014-01-01", periods=40, freq='QS')),
+            'UNRATE': pd.Series(np.full(120, 4.0), index=pd.date_range("2014-01-01", periods=120, freq='MS')),
+        }
+        self.last_updated = "2024-04-25 07:51:02-05"
+        self.calls = []
+
+    def get_series_info(self, series_id):
+        self.calls.append(('info', series_id))
+        return pd.Series({'id': series_id, 'last_updated': self.last_updated})
+
+    def get_series(self, series_id, observation_start=None):
+        self.calls.append(('series', series_id, observation_start))
+        series = self.series[series_id]
+        if observation_start is not None:
+            series = series[series.index >= observation_start]
+        return series.copy()
+
+
+class TestFredSeriesStore(unittest.TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.client = StubFred()
+
+    def test_cold_fetch_then_fresh_store(self):
+        """Test a stored series is served without calling FRED while it is fresh"""
+        first = fred.get_series('GDP', self.client, self.store_dir)
+        self.client.calls.clear()
+        again = fred.get_series('GDP', self.client, self.store_dir)
+
+        self.assertEqual(self.client.calls, [])
+        pd.testing.assert_series_equal(first, again, check_freq=False)
+
+    def test_unchanged_vintage_skips_observations(self):
+        """Test a stale store only checks last_updated when FRED published nothing new"""
+        fred.get_series('GDP', self.client, self.store_dir)
+        self.client.calls.clear()
+        fred.get_series('GDP', self.client, self.store_dir, max_age=0)
+
+        self.assertEqual(self.client.calls, [('info', 'GDP')])
+
+    def test_new_vintage_fetches_recent_observations_only(self):
+        """Test a new vintage requests only the lookback window and applies revisions"""
+        fred.get_series('GDP', self.client, self.store_dir)
+        gdp = self.client.series['GDP']
+        self.client.series['GDP'] = pd.concat([gdp.where(gdp.index < gdp.index[-1], 100.0), pd.Series([101.0], index=[pd.Timestamp("2024-01-01")])])
+        self.client.last_updated = "2024-05-30 07:51:02-05"
+        self.client.calls.clear()
+
+        series = fred.get_series('GDP', self.client, self.store_dir, max_age=0)
+
+        start = gdp.index[-fred.REVISION_LOOKBACK].strftime("%Y-%m-%d")
+        self.assertEqual(self.client.calls, [('info', 'GDP'), ('series', 'GDP', start)])
+        self.assertEqual(len(series), 41)
+        self.assertEqual(series.iloc[-2], 100.0)
+        self.assertEqual(series.iloc[-1], 101.0)
+        self.assertEqual(series.iloc[0], 0.0)
+
+    def test_failed_refresh_serves_stored_series(self):
+        """Test a stale stored series is served when FRED can't be reached, and retried next time"""
+        stored = fred.get_series('GDP', self.client, self.store_dir)
+        _, meta = fred.read_stored_series('GDP', self.store_dir)
+
+        def offline(series_id):
+            raise ConnectionError("rate limited")
+        self.client.get_series_info = offline
+        series = fred.get_series('GDP', self.client, self.store_dir, max_age=0)
+        pd.testing.assert_series_equal(series, stored, check_freq=False)
+
+        # The failed refresh isn't recorded, so the series stays due for a refresh
+        self.assertEqual(fred.read_stored_series('GDP', self.store_dir)[1], meta)
+        with self.assertRaises(ConnectionError):
+            fred.get_series('UNRATE', self.client, self.store_dir)
+
+    def test_get_series_many(self):
+        """Test the batch API returns every requested series by id"""
+        series = fred.get_series_many(['GDP', 'UNRATE', 'GDP'], self.client, self.store_dir)
+
+        self.assertEqual(list(series), ['GDP', 'UNRATE'])
+        self.assertEqual(len(series['UNRATE']), 120)
+
+    def tearDown(self):
+        """Clean up any test artifacts"""
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+
+class TestConstituentIndex(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.cache_dir, "sp500_constituents.json")
+        self.fixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test", "sp500_wikipedia.html")
+        self.missing = os.path.join(self.cache_dir, "missing.html")
+        sp500.loaded_indexes.clear()
+
+    def test_parse_fixture(self):
+        """Test the constituent table is parsed with sector, sub-industry and CIK"""
+        constituents = sp500.parse_constituents(self.fixture)
+
+        self.assertEqual(list(constituents.columns), ['symbol', 'name', 'sector', 'sub_industry', 'cik'])
+        apple = constituents.set_index('symbol').loc['AAPL']
+        self.assertEqual(apple['sub_industry'], "Technology Hardware, Storage & Peripherals")
+        self.assertEqual(apple['cik'], "0000320193")
+
+    def test_index_persisted_and_reused(self):
+        """Test a fresh index on disk is loaded without scraping the source again"""
+        symbols = sp500.load_symbols(self.path, source=self.fixture)
+        sp500.loaded_indexes.clear()
+
+        self.assertEqual(sp500.load_symbols(self.path, source=self.missing), symbols)
+        self.assertEqual(symbols, ['MMM', 'AOS', 'AAPL', 'BRK.B', 'MSFT'])
+
+    def test_expired_index_is_refreshed(self):
+        """Test an index older than the TTL is scraped again, keeping a stale copy if that fails"""
+        version = sp500.load_index(self.path, source=self.fixture)['version']
+
+        stale = sp500.load_index(self.path, ttl=0, source=self.missing)
+        self.assertEqual(stale['version'], version)
+        refreshed = sp500.load_index(self.path, ttl=0, source=self.fixture)
+        self.assertEqual(refreshed['version'], version)
+        self.assertGreaterEqual(refreshed['fetched_at'], stale['fetched_at'])
+
+    def tearDown(self):
+        """Clean up any test artifacts"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+class TestMovingAverageEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.prices = 100 + np.cumsum(rng.normal(size=500))
+        self.prices[200] = np.nan
+
+    def test_matches_pandas_rolling_and_ewm(self):
+        """Test SMAs and EMAs agree with the pandas reference path"""
+        engine = MovingAverageEngine(sma_windows=(5, 30, 90), ema_windows=(12, 26))
+        results = engine.fit(self.prices)
+        close = pd.Series(self.prices)
+
+        for w in (5, 30, 90):
+            np.testing.assert_allclose(results[f'{w}D MA'], close.rolling(window=w).mean(), rtol=1e-10)
+        for w in (12, 26):
+            np.testing.assert_allclose(results[f'{w}D EMA'], close.ewm(span=w, adjust=False, ignore_na=True).mean(), rtol=1e-10)
+
+    def test_ema_recovers_after_gaps(self):
+        """Test EMAs skip leading, inner and trailing NaN bars, also when the gap falls between update() calls"""
+        prices = self.prices.copy()
+        prices[:3] = np.nan
+        prices[250:260] = np.nan
+        prices[-1] = np.nan
+        reference = pd.Series(prices).ewm(span=10, adjust=False, ignore_na=True).mean()
+
+        full = MovingAverageEngine(sma_windows=(), ema_windows=(10,)).fit(np.vstack([prices, self.prices]))
+        np.testing.assert_allclose(full['10D EMA'][0], reference, rtol=1e-10)
+        np.testing.assert_allclose(full['10D EMA'][1], pd.Series(self.prices).ewm(span=10, adjust=False, ignore_na=True).mean(), rtol=1e-10)
+
+        engine = MovingAverageEngine(sma_windows=(), ema_windows=(10,))
+        chunks = [engine.update(chunk)['10D EMA'] for chunk in np.split(prices, [2, 255, 260, 400])]
+        np.testing.assert_allclose(np.concatenate(chunks), reference, rtol=1e-10)
+        self.assertFalse(np.isnan(engine.update([101.0])['10D EMA']).any())
+
+    def test_update_matches_full_recompute(self):
+        """Test appending bars in chunks gives the same averages as one pass"""
+        full = MovingAverageEngine(sma_windows=(3, 60), ema_windows=(10,)).fit(self.prices)
+
+        engine = MovingAverageEngine(sma_windows=(3, 60), ema_windows=(10,))
+        chunks = [engine.update(chunk) for chunk in np.split(self.prices, [1, 40, 41, 300])]
+        for name, values in full.items():
+            np.testing.assert_allclose(np.concatenate([c[name] for c in chunks]), values, rtol=1e-10)
+
+    def test_many_series_at_once(self):
+        """Test a 2-D price matrix is averaged row by row"""
+        matrix = np.vstack([self.prices, self.prices * 2])
+        results = MovingAverageEngine(sma_windows=(30,)).fit(matrix)
+        np.testing.assert_allclose(results['30D MA'][1], 2 * results['30D MA'][0], rtol=1e-10)
+
+    def test_add_moving_averages_columns(self):
+        """Test add_moving_averages keeps the columns used by the dashboard"""
+        data = make_bars("2024-01-01", "2024-06-28").reset_index()
+        data = stock.add_moving_averages(data)
+        for name in ('30D MA', '60D MA', '90D MA'):
+            np.testing.assert_allclose(data[name], data['Close'].rolling(window=int(name[:2])).mean(), rtol=1e-10)
+
+
+class TestTrendForecaster(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        dates = pd.bdate_range("2020-01-01", periods=300)
+        self.closes = pd.DataFrame(100 + np.cumsum(rng.normal(size=(300, 3)), axis=0), index=dates, columns=['AAA', 'BBB', 'CCC'])
+        # CCC only lists a third of the way through the period
+        self.closes.iloc[:100, 2] = np.nan
+
+    def reference(self, close, num_days=30):
+        close = close.dropna().to_numpy()
+        slope, intercept = np.polyfit(np.arange(len(close)), close, 1)
+        return intercept + slope * np.arange(len(close), len(close) + num_days)
+
+    def test_batch_matches_per_ticker_fit(self):
+        """Test the batched solver gives the same projections as one fit per ticker"""
+        projections = stock.predict_future_prices_batch(self.closes)
+
+        self.assertEqual(projections.shape, (30, 3))
+        for symbol in self.closes.columns:
+            np.testing.assert_allclose(projections[symbol], self.reference(self.closes[symbol]), rtol=1e-9)
+
+    def test_single_ticker_prediction(self):
+        """Test predict_future_prices keeps returning a plain array of projections"""
+        data = self.closes[['AAA']].rename(columns={'AAA': 'Close'}).reset_index()
+        future = stock.predict_future_prices(data, num_days=10)
+
+        self.assertEqual(future.shape, (10,))
+        np.testing.assert_allclose(future, self.reference(self.closes['AAA'], 10), rtol=1e-9)
+
+    def test_close_matrix_aligns_dates(self):
+        """Test per-ticker frames are stacked on a shared date index"""
+        frames = {
+            'AAA': make_bars("2024-01-01", "2024-03-29").reset_index(),
+            'BBB': make_bars("2024-02-01", "2024-03-29").reset_index(),
+        }
+        closes = stock.close_matrix(frames)
+
+        self.assertEqual(list(closes.columns), ['AAA', 'BBB'])
+        self.assertEqual(len(closes), len(frames['AAA']))
+        self.assertTrue(closes['BBB'].isna().any())
+
+
+class TestPlotLevelOfDetail(unittest.TestCase):
+    def setUp(self):
+        plotting.figure_cache.clear()
+        self.data = stock.add_moving_averages(make_bars("2015-01-01", "2024-04-26").reset_index())
+
+    def test_choose_resolution(self):
+        """Test longer visible ranges get coarser candles"""
+        self.assertEqual(plotting.choose_resolution("2024-01-01", "2024-04-26"), 'daily')
+        self.assertEqual(plotting.choose_resolution("2020-01-01", "2024-04-26"), 'weekly')
+        self.assertEqual(plotting.choose_resolution("2015-01-01", "2024-04-26"), 'monthly')
+
+    def test_resample_ohlc(self):
+        """Test weekly bars take the first open, extreme high/low and last close"""
+        weekly = plotting.resample_ohlc(self.data, 'weekly')
+        week = self.data[(self.data['Date'] >= "2024-04-22") & (self.data['Date'] <= "2024-04-26")]
+        last = weekly.iloc[-1]
+
+        self.assertEqual(last['Date'], pd.Timestamp("2024-04-26"))
+        self.assertEqual(last['Open'], week['Open'].iloc[0])
+        self.assertEqual(last['High'], week['High'].max())
+        self.assertEqual(last['Low'], week['Low'].min())
+        self.assertEqual(last['Close'], week['Close'].iloc[-1])
+        self.assertEqual(last['Volume'], week['Volume'].sum())
+        self.assertEqual(last['90D MA'], week['90D MA'].iloc[-1])
+
+    def test_payload_cached_per_symbol_and_resolution(self):
+        """Test the built figure is reused until a new bar arrives"""
+        first = plotting.candlestick_figure(self.data, "AAPL", "AAPL")
+        again = plotting.candlestick_figure(self.data, "AAPL", "AAPL")
+        daily = plotting.candlestick_figure(self.data, "AAPL", "AAPL", start="2024-01-01")
+
+        self.assertIs(first, again)
+        self.assertEqual(set(plotting.figure_cache), {("AAPL", 'monthly'), ("AAPL", 'daily')})
+        all_daily = plotting.candlestick_figure(self.data, "AAPL", "AAPL", resolution='daily')
+        self.assertLess(len(first.data[0].x) * 5, len(all_daily.data[0].x))
+        self.assertIsNot(all_daily, daily)
+
+        updated = stock.add_moving_averages(make_bars("2015-01-01", "2024-04-29").reset_index())
+        self.assertIsNot(plotting.candlestick_figure(updated, "AAPL", "AAPL"), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
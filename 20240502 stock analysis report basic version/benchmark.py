@@ -0,0 +1,118 @@
+# benchmark.py
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+import main
+import news_summary
+from news_packer import estimate_tokens
+
+N_USERS = 50
+REQUESTS_PER_USER = 40
+N_TICKERS = 50
+BUILD_SECONDS = 0.2
+
+
+# Stand-in for the full analysis: a fixed delay and a small page
+def fake_build(ticker_symbol):
+    time.sleep(BUILD_SECONDS)
+    return f"<html><body>Report for {ticker_symbol}</body></html>", True
+
+
+# One simulated browser: picks popular tickers more often (Zipf) and revalidates with its ETags
+def user_session(seed):
+    rng = np.random.default_rng(seed)
+    client = main.app.test_client()
+    etags = {}
+    latencies = []
+    statuses = []
+    for _ in range(REQUESTS_PER_USER):
+        ticker = f"T{min(rng.zipf(1.3), N_TICKERS):02d}"
+        headers = {'If-None-Match': etags[ticker]} if ticker in etags else {}
+        start = time.perf_counter()
+        response = client.get(f'/report/{ticker}', headers=headers)
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+        if 'ETag' in response.headers:
+            etags[ticker] = response.headers['ETag']
+    return latencies, statuses
+
+
+def bench_report_cache():
+    main.reports.clear()
+    print(f"Report cache load test: {N_USERS} users x {REQUESTS_PER_USER} requests over {N_TICKERS} tickers, {BUILD_SECONDS * 1000:.0f} ms per build")
+    start = time.perf_counter()
+    with mock.patch.object(main.reports, 'build', fake_build), ThreadPoolExecutor(max_workers=N_USERS) as pool:
+        sessions = list(pool.map(user_session, range(N_USERS)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.concatenate([s[0] for s in sessions]) * 1000
+    statuses = np.concatenate([s[1] for s in sessions])
+    stats = main.reports.stats
+    print(f"  requests          : {len(statuses)} in {elapsed:.2f}s ({len(statuses) / elapsed:.0f} req/s)")
+    print(f"  cache hit rate    : {main.reports.hit_rate():.1%}  (hits {stats['hits']}, stale {stats['stale']}, waits {stats['waits']}, misses {stats['misses']})")
+    print(f"  304 Not Modified  : {(statuses == 304).mean():.1%}")
+    print(f"  latency p50 / p95 : {np.percentile(latencies, 50):.1f} / {np.percentile(latencies, 95):.1f} ms")
+    print(f"  without the cache : every request would take >= {BUILD_SECONDS * 1000:.0f} ms")
+
+
+# Google News style results: 40 stories, each syndicated by up to five publishers
+def make_articles(n_stories=40, seed=0):
+    rng = np.random.default_rng(seed)
+    now = datetime.datetime.now()
+    vocabulary = np.array("iPhone demand services growth China sales margin buyback dividend AI chips Vision Pro lawsuit EU fine supplier earnings guidance analyst upgrade downgrade target record quarter".split())
+    articles = []
+    for story in range(n_stories):
+        headline = " ".join(rng.choice(vocabulary, size=7, replace=False))
+        for publisher in range(rng.integers(1, 6)):
+            articles.append({
+                'title': f"AAPL {headline} - Publisher {publisher}",
+                'desc': f"Apple (AAPL) stock reacted to story {story}. Analysts discussed margins, buybacks, China demand and the outlook for the next quarter in detail.",
+                'link': f"https://news.example.com/{story}/{publisher}",
+                'datetime': now - datetime.timedelta(hours=int(rng.integers(1, 24 * 30))),
+            })
+    return articles
+
+
+# Stand-in for LM Studio whose latency grows with the prompt, like local prefill does
+class SimulatedLLM:
+    def __init__(self, seconds_per_token=0.0002, seconds_per_message=0.002):
+        self.seconds_per_token = seconds_per_token
+        self.seconds_per_message = seconds_per_message
+        self.prompt_tokens = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, **kwargs):
+        self.prompt_tokens = sum(estimate_tokens(m['content']) for m in messages)
+        time.sleep(self.prompt_tokens * self.seconds_per_token + len(messages) * self.seconds_per_message)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="summary"))])
+
+
+# Baseline prompt: every article as its own user message, with no token budget
+def unpacked_summary(news_articles, stock_symbol, llm_client):
+    messages = [
+        {"role": "system", "content": "You are an intelligent assistant. Provide concise, reasoned answers."},
+        {"role": "user", "content": f"Summarize the latest news about {stock_symbol}, and comment on its impact on the stock price using bullet points. Include a final suggestion on stock position for long and short term."}
+    ]
+    for article in news_articles:
+        messages.append({"role": "user", "content": f"* {article['title']}: {article['desc']}"})
+    completion = llm_client.chat.completions.create(model="bench", messages=messages, temperature=0.7)
+    return completion.choices[0].message.content, [article['link'] for article in news_articles]
+
+
+def bench_news_packing():
+    articles = make_articles()
+    print(f"News summary prompts for {len(articles)} articles (simulated LLM, 0.2 ms per prompt token)")
+    for label, summarize in (("one message per article", unpacked_summary), ("packed, 1500 token budget", news_summary.summarize_news)):
+        llm = SimulatedLLM()
+        start = time.perf_counter()
+        _, urls = summarize(articles, "AAPL", llm)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<26}: {llm.prompt_tokens:6d} prompt tokens  {len(urls):4d} articles  {elapsed * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    bench_report_cache()
+    bench_news_packing()
@@ -1,8 +1,18 @@
 #data.py
 import yfinance as yf
+import pandas as pd
 
-def fetch_data(ticker_symbol):
+def fetch_prices(ticker_symbol):
     # ticker_symbol should be a string like 'AAPL'
-    data = yf.download(ticker_symbol, period='5y')
-    company_name = yf.Ticker(ticker_symbol).info['longName']  # Fetch the company name
+    data = yf.download(ticker_symbol, period='5y', progress=False)
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)  # Single ticker: drop the ticker level
+    return data
+
+def fetch_company_name(ticker_symbol):
+    return yf.Ticker(ticker_symbol).info['longName']
+
+def fetch_data(ticker_symbol):
+    data = fetch_prices(ticker_symbol)
+    company_name = fetch_company_name(ticker_symbol)  # Fetch the company name
     return data, company_name
@@ -1,5 +1,15 @@
+import os
 import yfinance as yf
 
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+def save_data(data, ticker_symbol):
+    # Persist an already downloaded frame instead of downloading it again
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f'{ticker_symbol}_data.csv')
+    data.to_csv(path)
+    return path
+
 def download_data(ticker_symbol):
     data = yf.download(ticker_symbol, period='5y')
-    data.to_csv(f'{ticker_symbol}_data.csv')
\ No newline at end of file
+    return save_data(data, ticker_symbol)
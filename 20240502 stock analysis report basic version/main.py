@@ -1,13 +1,14 @@
 # main.py
-from flask import Flask, request, render_template
-import pandas as pd
-import data
-import predict
-import plot
-import download_data
+from flask import Flask, request, render_template, redirect, url_for, make_response, jsonify
 import logging
 import os
-import news_summary  # Import the news_summary module
+import news_summary
+import pipeline
+import report_cache
+import sp500
+import summary_queue
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 
 app = Flask(__name__)
 
@@ -15,42 +16,66 @@ app = Flask(__name__)
 def index():
     try:
         if request.method == 'POST':
-            ticker_symbol = request.form['ticker']
-            stock_data, predictions, plot_html, news_summary_text, company_name = analyze(ticker_symbol)  # Rename the variable to avoid conflicts
-            if not stock_data.empty and len(predictions) > 0 and plot_html and news_summary_text:  # Change the variable name here as well
-                stock_data_last10 = stock_data.tail(10)
-                return render_template('report.html', company_name=company_name, stock_data=stock_data_last10, plot_html=plot_html, news_summary=news_summary_text)  # Change the variable name here as well
-            else:
-                return render_template('error.html', message="Failed to analyze the stock. Please try again.")
+            return redirect(url_for('report', ticker_symbol=request.form['ticker']))
         else:
-            symbols = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')[0]['Symbol'].values.tolist()
+            symbols = sp500.load_symbols()
             return render_template('index.html', symbols=symbols)
     except Exception as e:
         return render_template('error.html', message=f"An unexpected error occurred: {str(e)}")
 
-def analyze(ticker_symbol):
+@app.route('/report/<ticker_symbol>')
+def report(ticker_symbol):
     try:
-        logging.info(f"Downloading data for {ticker_symbol}")
-        download_data.download_data(ticker_symbol)
+        entry = reports.get(ticker_symbol)
+    except AnalysisFailed:
+        return render_template('error.html', message="Failed to analyze the stock. Please try again.")
+    except Exception as e:
+        return render_template('error.html', message=f"An unexpected error occurred: {str(e)}")
+    response = make_response(entry.html)
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Answers a matching If-None-Match with 304 Not Modified
+    return response.make_conditional(request)
 
-        logging.info(f"Fetching data for {ticker_symbol}")
-        stock_data, company_name = data.fetch_data(ticker_symbol)  # Fetch the company name here
+@app.route('/summary/<job_id>')
+def summary(job_id):
+    # Polled by the report page until the background news summary is ready
+    status = summaries.status(job_id)
+    if status is None:
+        return jsonify({'state': 'missing'}), 404
+    return jsonify(status)
 
-        logging.info(f"Predicting data for {ticker_symbol}")
-        predictions = predict.train_predict_model(stock_data)
+class AnalysisFailed(Exception):
+    pass
 
-        logging.info(f"Plotting data for {ticker_symbol}")
-        plot_html = plot.plot_data(stock_data, predictions, ticker_symbol)
+def build_report(ticker_symbol):
+    # Render the report HTML for the cache; returns (html, complete)
+    report = analyze(ticker_symbol)
+    if report['stock_data'] is None and report['news_summary'] is None and report['summary_job'] is None:
+        raise AnalysisFailed(ticker_symbol)
+    # Render whatever the branches produced; failed stages are listed on the page
+    with app.app_context():
+        html = render_template('report.html', **report_context(report))
+    return html, not report['errors']
 
-        logging.info(f"Getting news summary for {ticker_symbol}")
-        news_articles = news_summary.get_latest_news(ticker_symbol)
-        news_summary_text = news_summary.summarize_news(news_articles, ticker_symbol)
+summaries = summary_queue.SummaryQueue(news_summary.summarize_news)
+reports = report_cache.ReportCache(build_report)
 
-        return stock_data, predictions, plot_html, news_summary_text, company_name
+def analyze(ticker_symbol):
+    return pipeline.run_analysis(ticker_symbol, summaries=summaries)
 
-    except Exception as e:
-        logging.error(f"Error processing {ticker_symbol}: {e}")
-        return pd.DataFrame(), {}, None, "", ""
+def report_context(report):
+    stock_data = report['stock_data']
+    news_summary_text, news_urls = report['news_summary'] or (None, [])
+    return {
+        'company_name': report['company_name'],
+        'stock_data': stock_data.tail(10).reset_index() if stock_data is not None else None,
+        'plot_html': report['plot_html'],
+        'news_summary': news_summary_text,
+        'news_urls': news_urls,
+        'summary_job': report['summary_job'],
+        'errors': report['errors'],
+    }
 
 
 if __name__ == "__main__":
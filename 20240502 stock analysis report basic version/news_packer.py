@@ -0,0 +1,66 @@
+# news_packer.py
+import datetime
+import math
+import re
+
+# Prompt budget for the packed articles, in estimated tokens
+TOKEN_BUDGET = 1500
+# Headlines sharing at least this fraction of their words are treated as the same story
+DUPLICATE_THRESHOLD = 0.8
+# Age in days at which an article's recency score has dropped to 1/e
+RECENCY_DAYS = 7
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text with BPE tokenizers
+    return max(1, (len(text) + 3) // 4)
+
+def headline_words(title):
+    # Google News titles end with " - Publisher"; the rest identifies the story
+    title = re.sub(r'\s+-\s+[^-]+$', '', title or '')
+    return frozenset(re.findall(r'[a-z0-9]+', title.lower()))
+
+def dedupe_articles(news_articles, threshold=DUPLICATE_THRESHOLD):
+    # Keep the first article of every group of near-identical headlines
+    kept, kept_words, seen = [], [], set()
+    for article in news_articles:
+        words = headline_words(article.get('title'))
+        if words in seen:
+            continue
+        if any(len(words & other) >= threshold * len(words | other) for other in kept_words if words and other):
+            continue
+        seen.add(words)
+        kept.append(article)
+        kept_words.append(words)
+    return kept
+
+def article_score(article, stock_symbol, now):
+    # Relevance: the symbol in the headline counts double, in the description once.
+    # Recency: exponential decay with the article's age; undated articles get no bonus.
+    symbol = stock_symbol.lower()
+    relevance = 2 * (symbol in headline_words(article.get('title'))) + (symbol in (article.get('desc') or '').lower())
+    published = article.get('datetime')
+    recency = 0.0
+    if isinstance(published, datetime.datetime):
+        age_days = max((now - published).total_seconds() / 86400, 0)
+        recency = math.exp(-age_days / RECENCY_DAYS)
+    return relevance + 2 * recency
+
+def format_article(article):
+    return f"* {article['title']}: {article['desc']}"
+
+def pack_articles(news_articles, stock_symbol, token_budget=TOKEN_BUDGET, now=None):
+    # Deduplicate, rank by relevance and recency, then add articles until the budget is spent.
+    # Returns (packed prompt text, articles that made it into the prompt).
+    now = now or datetime.datetime.now()
+    articles = dedupe_articles(news_articles)
+    articles = sorted(articles, key=lambda article: article_score(article, stock_symbol, now), reverse=True)
+    lines, packed, used = [], [], 0
+    for article in articles:
+        line = format_article(article)
+        tokens = estimate_tokens(line) + 1
+        if used + tokens > token_budget:
+            continue
+        lines.append(line)
+        packed.append(article)
+        used += tokens
+    return "\n".join(lines), packed
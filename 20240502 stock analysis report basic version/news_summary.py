@@ -1,38 +1,58 @@
 #news_summary.py
 import datetime
+import os
+import sys
 from jinja2 import Template
 import GoogleNews as google_news
 from openai import OpenAI
+from news_packer import TOKEN_BUDGET, pack_articles
+# news_cache.py lives in the repo's shared/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+import news_cache
+
+NEWS_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "news.sqlite")
 
 # Set up the OpenAI client
 client = OpenAI(base_url="http://localhost:1234/v1", api_key="lm-studio")
 
-def get_latest_news(stock_symbol):
+# Article store of this project; overlapping searches only query Google News for the missing days
+news_store = news_cache.NewsCache(NEWS_CACHE_PATH)
+
+def search_google_news(search_query, start_date, end_date):
     gn = google_news.GoogleNews()
     gn.set_lang('en')
     gn.set_encode('utf-8')
+    gn.set_time_range(start_date.strftime('%m/%d/%Y'), end_date.strftime('%m/%d/%Y'))
+    gn.search(search_query)
+    return [(article['link'], article['datetime'] if isinstance(article['datetime'], datetime.datetime) else None, article) for article in gn.results() if article.get('link')]
+
+def get_latest_news(stock_symbol):
     end_date = datetime.date.today()
     start_date = end_date - datetime.timedelta(days=30)  # Covering the past 30 days
     search_query = f"{stock_symbol} stock"
-    gn.set_time_range(start_date.strftime('%m/%d/%Y'), end_date.strftime('%m/%d/%Y'))
-    gn.search(search_query)
-    return gn.results()
+    articles = news_store.search(f"googlenews|en|{search_query}", start_date, end_date, lambda start, end: search_google_news(search_query, start, end))
+    for article in articles:
+        # Datetimes come back from the store as ISO strings
+        if isinstance(article.get('datetime'), str):
+            article['datetime'] = datetime.datetime.fromisoformat(article['datetime'])
+    return articles
 
-def summarize_news(news_articles, stock_symbol):
+def summarize_news(news_articles, stock_symbol, llm_client=None, token_budget=TOKEN_BUDGET):
+    # Articles are deduplicated, ranked and packed into one message within the token budget
+    packed_text, packed_articles = pack_articles(news_articles, stock_symbol, token_budget)
     messages = [
         {"role": "system", "content": "You are an intelligent assistant. Provide concise, reasoned answers."},
         {"role": "user", "content": f"Summarize the latest news about {stock_symbol}, and comment on its impact on the stock price using bullet points. Include a final suggestion on stock position for long and short term."}
     ]
-    for article in news_articles:
-        content = f"* {article['title']}: {article['desc']}"
-        messages.append({"role": "user", "content": content})
-    completion = client.chat.completions.create(
+    if packed_text:
+        messages.append({"role": "user", "content": packed_text})
+    completion = (llm_client or client).chat.completions.create(
         model="bartowski/stable-code-instruct-3b-GGUF",
         messages=messages,
         temperature=0.7
     )
     summary = completion.choices[0].message.content
-    news_urls = [article['link'] for article in news_articles]
+    news_urls = [article['link'] for article in packed_articles]
     return summary, news_urls
 
 def generate_html_report(stock_data, predictions, news_summary, company_name):
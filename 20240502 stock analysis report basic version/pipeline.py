@@ -0,0 +1,85 @@
+# pipeline.py
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import data
+import download_data
+import news_summary
+import plot
+import predict
+
+def run_stage(name, ticker_symbol, report, func, *args):
+    # Run one analysis stage, logging its duration. A failing stage is recorded in
+    # report['errors'] and returns None so the rest of the report can still be built.
+    logging.info(f"{name} for {ticker_symbol}")
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    except Exception as e:
+        logging.error(f"{name} for {ticker_symbol} failed: {e}")
+        report['errors'][name] = str(e)
+        return None
+    finally:
+        report['timings'][name] = time.perf_counter() - start
+        logging.info(f"{name} for {ticker_symbol} took {report['timings'][name]:.2f}s")
+
+def price_branch(ticker_symbol, report):
+    # Fetch the price history once and hand the same in-memory frame to every later stage
+    stock_data = run_stage("Fetching data", ticker_symbol, report, data.fetch_prices, ticker_symbol)
+    if stock_data is None or stock_data.empty:
+        report['errors'].setdefault("Fetching data", "No price data returned")
+        return
+    report['stock_data'] = stock_data
+    run_stage("Saving data", ticker_symbol, report, download_data.save_data, stock_data, ticker_symbol)
+    backtest = run_stage("Predicting data", ticker_symbol, report, predict.backtest_years, stock_data)
+    if backtest is None:
+        return
+    predictions, report['backtest'] = backtest
+    report['predictions'] = predictions
+    logging.info(f"Backtest errors for {ticker_symbol}:\n{report['backtest'].round(2).to_string()}")
+    report['plot_html'] = run_stage("Plotting data", ticker_symbol, report, plot.plot_data, stock_data, predictions, ticker_symbol)
+
+def company_branch(ticker_symbol, report):
+    report['company_name'] = run_stage("Fetching company info", ticker_symbol, report, data.fetch_company_name, ticker_symbol) or ticker_symbol
+
+def news_branch(ticker_symbol, report, summaries=None):
+    news_articles = run_stage("Getting news", ticker_symbol, report, news_summary.get_latest_news, ticker_symbol)
+    if news_articles is None:
+        return
+    if summaries is not None:
+        # The LLM summary is left to the background queue; the page polls for it
+        report['summary_job'] = run_stage("Queueing news summary", ticker_symbol, report, summaries.submit, news_articles, ticker_symbol)
+    else:
+        report['news_summary'] = run_stage("Summarizing news", ticker_symbol, report, news_summary.summarize_news, news_articles, ticker_symbol)
+
+
+def run_analysis(ticker_symbol, concurrent=True, summaries=None):
+    # The price, company-info and news branches are independent, so by default they run on
+    # their own threads and the request takes about as long as the slowest branch.
+    # With a SummaryQueue in `summaries`, the news summary is queued instead of awaited.
+    # Returns a report dict; stages that failed are listed in report['errors'].
+    report = {
+        'ticker': ticker_symbol,
+        'stock_data': None,
+        'predictions': None,
+        'backtest': None,
+        'plot_html': None,
+        'news_summary': None,
+        'summary_job': None,
+        'company_name': ticker_symbol,
+        'errors': {},
+        'timings': {},
+    }
+    branches = [price_branch, company_branch, partial(news_branch, summaries=summaries)]
+    start = time.perf_counter()
+    if concurrent:
+        with ThreadPoolExecutor(max_workers=len(branches)) as pool:
+            for future in [pool.submit(branch, ticker_symbol, report) for branch in branches]:
+                future.result()
+    else:
+        for branch in branches:
+            branch(ticker_symbol, report)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Analysis for {ticker_symbol} took {elapsed:.2f}s: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report['timings'].items()))
+    return report
@@ -1,7 +1,11 @@
 import plotly.graph_objects as go
 import pandas as pd
 
-def plot_data(stock_data, predictions, ticker_symbol):
+# Fixed id of the plot's <div>; plotly otherwise picks a random one on every render, which
+# would give every rebuilt report a new ETag
+PLOT_DIV_ID = "stock-plot"
+
+def plot_figure(stock_data, predictions, ticker_symbol):
     fig = go.Figure()
 
     # Add candlestick chart
@@ -20,22 +24,25 @@ def plot_data(stock_data, predictions, ticker_symbol):
     # Add predictions
     colors = ['red', 'green', 'purple']
     i = 0
+    # 'year 0' is the last calendar year of the data, as in predict.backtest_years
+    base_year = stock_data.index.max().year
     for key, value in predictions.items():
         years_ago = int(key.split('year -')[1])
-        base_year = 2024
         prediction_year = base_year - years_ago
-        start_date = f'{prediction_year}-01-01'
-        end_date = f'{prediction_year}-12-31'
-        # Align prediction dates with the stock data
-        prediction_dates = pd.date_range(start=start_date, end=end_date, freq='D')
+        # One prediction per calendar day from January 1; 'year 0' stops at the last bar
+        prediction_dates = pd.date_range(start=f'{prediction_year}-01-01', periods=len(value), freq='D')
         fig.add_trace(go.Scatter(x=prediction_dates, y=value, name=f'Prediction {key}', line=dict(color=colors[i])))
         i += 1
 
     fig.update_layout(title=f'Stock Data and Predictions for {ticker_symbol}',
                       xaxis_title='Date',
                       yaxis_title='Stock Price')
+    return fig
+
+def plot_data(stock_data, predictions, ticker_symbol):
+    fig = plot_figure(stock_data, predictions, ticker_symbol)
 
     # Return the HTML content of the plot
-    return fig.to_html(full_html=False)
+    return fig.to_html(full_html=False, div_id=PLOT_DIV_ID)
 
     pass
\ No newline at end of file
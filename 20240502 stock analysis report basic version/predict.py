@@ -1,7 +1,122 @@
-from sklearn.linear_model import LinearRegression
 import numpy as np
 import pandas as pd
 
+def interpolate_daily_close(data):
+    """
+    Reindexes the closing prices to a continuous daily calendar and fills the gaps
+    (weekends, holidays) by linear interpolation.
+
+    Parameters:
+        data (DataFrame): A DataFrame with a DatetimeIndex and a 'Close' column.
+
+    Returns:
+        tuple: (DatetimeIndex of calendar days, float64 array of interpolated closes)
+    """
+    dates = pd.date_range(start=data.index.min(), end=data.index.max(), freq='D')
+    close = data['Close'].reindex(dates).interpolate(method='linear')
+    return dates, np.ascontiguousarray(close.to_numpy(dtype=np.float64))
+
+def backtest(prices, windows):
+    """
+    Fits a linear trend on each training window and evaluates it on the matching test window,
+    for all windows in one vectorized pass over a single price array.
+
+    Trend fits use prefix sums of the prices, so every window costs O(1) regardless of its
+    length. Test windows are gathered into one padded (windows x days) matrix for the
+    predictions and error metrics; no per-window copies of the data are made.
+
+    Parameters:
+        prices (ndarray): 1-D array of prices, one per day.
+        windows (array-like): (N, 4) integer array of [train_start, train_end, test_start, test_end)
+            positions into `prices`. Test predictions extrapolate the trend fitted on the
+            training window.
+
+    Returns:
+        dict: 'predictions' (N x max test length, NaN padded), 'slope', 'intercept' and the
+            per-window error metrics 'mae', 'rmse' and 'mape' (in percent).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    windows = np.atleast_2d(np.asarray(windows, dtype=np.int64))
+    train_start, train_end, test_start, test_end = windows.T
+
+    # Prefix sums over the global day index g: sum(y) and sum(g * y)
+    g = np.arange(len(prices), dtype=np.float64)
+    csum_y = np.concatenate([[0.0], np.cumsum(prices)])
+    csum_gy = np.concatenate([[0.0], np.cumsum(g * prices)])
+
+    n = (train_end - train_start).astype(np.float64)
+    sy = csum_y[train_end] - csum_y[train_start]
+    sgy = csum_gy[train_end] - csum_gy[train_start]
+    # Closed forms for sum(g) and sum(g^2) over [start, end)
+    sg = (train_end * (train_end - 1) - train_start * (train_start - 1)) / 2.0
+    sgg = ((train_end - 1) * train_end * (2 * train_end - 1) - (train_start - 1) * train_start * (2 * train_start - 1)) / 6.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (n * sgy - sg * sy) / (n * sgg - sg * sg)
+        intercept = (sy - slope * sg) / n
+
+    # Gather every test window into one padded matrix
+    test_len = test_end - test_start
+    offsets = np.arange(max(test_len.max(initial=0), 0))
+    positions = test_start[:, None] + offsets[None, :]
+    valid = offsets[None, :] < test_len[:, None]
+    positions = np.where(valid, positions, 0)
+    predictions = np.where(valid, intercept[:, None] + slope[:, None] * positions, np.nan)
+    actual = np.where(valid, prices[positions], np.nan)
+
+    errors = predictions - actual
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mae = np.nansum(np.abs(errors), axis=1) / test_len
+        rmse = np.sqrt(np.nansum(errors ** 2, axis=1) / test_len)
+        mape = np.nansum(np.abs(errors / actual), axis=1) / test_len * 100
+
+    return {'predictions': predictions, 'slope': slope, 'intercept': intercept, 'mae': mae, 'rmse': rmse, 'mape': mape}
+
+def rolling_origin_windows(n_days, train_size, test_size, step=None):
+    """
+    Builds rolling-origin windows: each training window of `train_size` days is followed by a
+    test window of `test_size` days, and the origin moves forward by `step` days (default
+    `test_size`) until the data runs out.
+
+    Returns:
+        ndarray: (N, 4) array of [train_start, train_end, test_start, test_end) positions.
+    """
+    step = step or test_size
+    train_start = np.arange(0, n_days - train_size - test_size + 1, step)
+    train_end = train_start + train_size
+    return np.column_stack([train_start, train_end, train_end, train_end + test_size])
+
+def backtest_years(data, years_ago=(1, 2, 0), train_years=2):
+    """
+    Backtests the yearly windows used by the report: for each entry of `years_ago`, the trend
+    fitted on the `train_years` calendar years before year -k predicts year -k.
+
+    Returns:
+        tuple: (dict of predictions keyed by 'year -k', DataFrame of error metrics per window)
+    """
+    dates, close = interpolate_daily_close(data)
+    base_year = dates.year.max()  # This would be 'year 0'
+    # First day position of every calendar year from base_year - max(years_ago) - train_years
+    years = np.arange(base_year - max(years_ago) - train_years, base_year + 2)
+    year_start = np.searchsorted(dates.year, years)
+
+    test_years = base_year - np.asarray(years_ago)
+    idx = test_years - years[0]
+    windows = np.column_stack([year_start[idx - train_years], year_start[idx], year_start[idx], year_start[idx + 1]])
+    results = backtest(close, windows)
+
+    predictions = {}
+    for i, k in enumerate(years_ago):
+        predictions[f'year -{k}'] = results['predictions'][i, :windows[i, 3] - windows[i, 2]]
+    metrics = pd.DataFrame({
+        'test_year': test_years,
+        'train_days': windows[:, 1] - windows[:, 0],
+        'test_days': windows[:, 3] - windows[:, 2],
+        'mae': results['mae'],
+        'rmse': results['rmse'],
+        'mape': results['mape'],
+    }, index=[f'year -{k}' for k in years_ago])
+    return predictions, metrics
+
 def train_predict_model(data):
     """
     Trains and predicts using linear regression for three different sections:
@@ -9,7 +124,8 @@ def train_predict_model(data):
     - Predict 'year -2' using data from 'year -4' and 'year -3'
     - Predict 'year 0' using data from 'year -2' and 'year -1'
     
-    Each section uses two full years of data for training.
+    Each section uses two full years of data for training, and its predictions extend the
+    trend fitted on those two years into the test year.
     
     Parameters:
         data (DataFrame): A DataFrame with a 'Close' column containing the closing prices.
@@ -17,35 +133,5 @@ def train_predict_model(data):
     Returns:
         dict: A dictionary containing predictions for each section.
     """
-    model = LinearRegression()
-    predictions = {}
-    
-    # Reindex data to ensure continuous date range
-    data = data.reindex(pd.date_range(start=data.index.min(), end=data.index.max(), freq='D'))
-    
-    # Interpolate missing values
-    data['Close'] = data['Close'].interpolate(method='linear')
-    
-    # Setting up the base index for splitting
-    base_year = data.index.year.max()  # This would be 'year 0'
-
-    # Helper function to split data for the specified period
-    def get_train_test_years(train_start, train_end, test_year):
-        train_mask = (data.index.year >= train_start) & (data.index.year <= train_end)
-        test_mask = data.index.year == test_year
-        x_train = np.array(range(sum(train_mask))).reshape(-1, 1)
-        y_train = data.loc[train_mask, 'Close'].values
-        x_test = np.array(range(sum(test_mask))).reshape(-1, 1)
-        return x_train, y_train, x_test
-
-    # Segment-wise training and prediction
-    for years_ago in [1, 2, 0]:
-        train_start = base_year - years_ago - 2
-        train_end = base_year - years_ago - 1
-        test_year = base_year - years_ago
-        x_train, y_train, x_test = get_train_test_years(train_start, train_end, test_year)
-        
-        model.fit(x_train, y_train)
-        predictions[f'year -{years_ago}'] = model.predict(x_test)
-    
+    predictions, _ = backtest_years(data)
     return predictions
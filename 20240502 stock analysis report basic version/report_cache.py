@@ -0,0 +1,124 @@
+# report_cache.py
+import datetime
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+# Reports kept in memory; the least recently served one is dropped beyond this
+MAX_ENTRIES = 256
+
+def trading_day(now=None):
+    # The last weekday in New York time; weekend requests share Friday's reports
+    day = (now or datetime.datetime.now(MARKET_TZ)).date()
+    while day.weekday() >= 5:
+        day -= datetime.timedelta(days=1)
+    return day
+
+class ReportEntry:
+    def __init__(self, html, ttl):
+        self.html = html
+        self.etag = hashlib.sha256(html.encode('utf-8')).hexdigest()[:32]
+        self.built_at = time.time()
+        self.ttl = ttl
+
+    def is_stale(self):
+        return time.time() - self.built_at >= self.ttl
+
+class ReportCache:
+    """
+    Rendered report HTML keyed by (upper-cased ticker, trading day).
+
+    `build(ticker)` must return (html, complete). A miss builds the report in the calling
+    thread, and concurrent requests for the same ticker wait for that single build; they are
+    counted as `waits`. An entry older than `ttl` seconds (or an incomplete, partial report) is
+    still served, while one background rebuild refreshes it. At most `max_entries` reports are
+    kept, evicting the least recently served.
+    """
+
+    def __init__(self, build, ttl=900, max_workers=2, day=trading_day, max_entries=MAX_ENTRIES):
+        self.build = build
+        self.ttl = ttl
+        self.day = day
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.locks = {}
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'waits': 0}
+
+    def key_lock(self, key):
+        with self.lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def hit_rate(self):
+        total = sum(self.stats.values())
+        return (self.stats['hits'] + self.stats['stale'] + self.stats['waits']) / total if total else 0.0
+
+    def store(self, key, html, complete):
+        entry = ReportEntry(html, self.ttl if complete else 0)
+        with self.lock:
+            # Reports of earlier trading days are never served again
+            for old_key in [k for k in self.entries if k[1] != key[1]]:
+                del self.entries[old_key]
+                self.locks.pop(old_key, None)
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            # Locks of evicted or never built (failed) tickers, unless a build holds them
+            if len(self.locks) > self.max_entries:
+                for old_key in [k for k, lock in self.locks.items() if k not in self.entries and not lock.locked()]:
+                    del self.locks[old_key]
+        return entry
+
+    def rebuild(self, key):
+        try:
+            self.store(key, *self.build(key[0]))
+        except Exception as e:
+            logging.error(f"Background rebuild of {key[0]} report failed: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def get(self, ticker_symbol):
+        ticker_symbol = ticker_symbol.upper()
+        key = (ticker_symbol, self.day())
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is None:
+            with self.key_lock(key):
+                entry = self.entries.get(key)
+                if entry is None:
+                    self.count('misses')
+                    return self.store(key, *self.build(ticker_symbol))
+            # Another request built it while this one waited
+            self.count('waits')
+            return entry
+        if entry.is_stale():
+            self.count('stale')
+            with self.lock:
+                start_refresh = key not in self.refreshing
+                self.refreshing.add(key)
+            if start_refresh:
+                self.pool.submit(self.rebuild, key)
+        else:
+            self.count('hits')
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.locks.clear()
+            self.stats = {name: 0 for name in self.stats}
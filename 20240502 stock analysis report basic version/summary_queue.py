@@ -0,0 +1,58 @@
+# summary_queue.py
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+class SummaryQueue:
+    """
+    Background queue for LLM news summaries, run on a bounded worker pool.
+
+    `submit` returns a job id at once; the same ticker and article list map to the same job,
+    so repeated requests do not queue the same summary twice. `status` reports the job state
+    ('pending', 'done' or 'failed') together with the summary and article URLs once done.
+    """
+
+    def __init__(self, summarize, max_workers=2, max_jobs=256):
+        self.summarize = summarize
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def job_id(self, stock_symbol, news_articles):
+        links = "\n".join(article['link'] for article in news_articles)
+        return f"{stock_symbol}-{hashlib.sha1(links.encode('utf-8')).hexdigest()[:12]}"
+
+    def submit(self, news_articles, stock_symbol):
+        job_id = self.job_id(stock_symbol, news_articles)
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job['state'] != 'failed':
+                return job_id
+            self.jobs[job_id] = {'state': 'pending', 'summary': None, 'urls': [], 'error': None}
+            # Forget the oldest finished jobs once the queue holds too many
+            while len(self.jobs) > self.max_jobs:
+                oldest = next((k for k, v in self.jobs.items() if v['state'] != 'pending'), None)
+                if oldest is None:
+                    break
+                del self.jobs[oldest]
+        self.pool.submit(self.run, job_id, news_articles, stock_symbol)
+        return job_id
+
+    def run(self, job_id, news_articles, stock_symbol):
+        try:
+            summary, urls = self.summarize(news_articles, stock_symbol)
+            update = {'state': 'done', 'summary': summary, 'urls': urls}
+        except Exception as e:
+            logging.error(f"Summarizing news for {stock_symbol} failed: {e}")
+            update = {'state': 'failed', 'error': str(e)}
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(update)
+
+    def status(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
@@ -0,0 +1,422 @@
+import unittest
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import numpy as np
+import pandas as pd
+import download_data
+import main
+import pipeline
+import predict
+import report_cache
+import news_summary
+import news_packer
+import plot
+import summary_queue
+from openai import OpenAI
+
+
+def make_history(end="2024-04-26", years=5):
+    dates = pd.bdate_range(pd.Timestamp(end) - pd.DateOffset(years=years), end, name='Date')
+    close = np.linspace(100, 200, len(dates))
+    columns = pd.MultiIndex.from_product([['Open', 'High', 'Low', 'Close', 'Volume'], ['TEST']], names=['Price', 'Ticker'])
+    return pd.DataFrame(np.column_stack([close - 1, close + 1, close - 2, close, np.full(len(dates), 1000)]), index=dates, columns=columns)
+
+
+class TestAnalysisPipeline(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.patches = [
+            mock.patch.object(download_data, 'CACHE_DIR', self.cache_dir),
+            mock.patch('data.yf.download', return_value=make_history()),
+            mock.patch('data.fetch_company_name', return_value="Test Corp"),
+            mock.patch('news_summary.get_latest_news', return_value=[{'title': 'Test', 'desc': 'Test news', 'link': 'http://example.com'}]),
+            mock.patch('news_summary.summarize_news', return_value=("Summary", ['http://example.com'])),
+        ]
+        self.mocks = [p.start() for p in self.patches]
+
+    def test_history_downloaded_once(self):
+        """Test one analysis downloads the price history once and saves it once"""
+        with self.assertLogs(level='INFO') as logs:
+            report = pipeline.run_analysis("TEST")
+
+        self.assertEqual(self.mocks[1].call_count, 1)
+        self.assertEqual(report['errors'], {})
+        self.assertEqual(report['company_name'], "Test Corp")
+        self.assertEqual(list(report['stock_data'].columns), ['Open', 'High', 'Low', 'Close', 'Volume'])
+        self.assertEqual(len(report['predictions']), 3)
+        self.assertTrue(report['plot_html'])
+        self.assertEqual(report['news_summary'][0], "Summary")
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, "TEST_data.csv")))
+
+        # Every stage reports its duration
+        for name in ("Fetching data", "Saving data", "Predicting data", "Plotting data", "Getting news", "Summarizing news"):
+            self.assertTrue(any(f"{name} for TEST took" in line for line in logs.output), name)
+
+    def test_branches_overlap(self):
+        """Test the concurrent mode takes about as long as the slowest branch"""
+        def slow(result):
+            def stage(*args):
+                time.sleep(0.3)
+                return result
+            return stage
+
+        self.mocks[2].side_effect = slow("Test Corp")
+        self.mocks[3].side_effect = slow([])
+        self.mocks[4].side_effect = slow(("Summary", []))
+
+        start = time.perf_counter()
+        report = pipeline.run_analysis("TEST", concurrent=True)
+        concurrent_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        pipeline.run_analysis("TEST", concurrent=False)
+        sequential_elapsed = time.perf_counter() - start
+
+        self.assertEqual(report['errors'], {})
+        self.assertLess(concurrent_elapsed, 0.85)
+        self.assertGreater(sequential_elapsed, 0.9)
+
+    def test_failing_branch_gives_partial_report(self):
+        """Test a failing news stage still renders the price part of the report"""
+        self.mocks[3].side_effect = ConnectionError("news service down")
+
+        report = pipeline.run_analysis("TEST")
+        self.assertIsNotNone(report['plot_html'])
+        self.assertIsNone(report['news_summary'])
+        self.assertIn("news service down", report['errors']["Getting news"])
+
+        main.reports.clear()
+        with mock.patch('pipeline.run_analysis', return_value=report):
+            response = main.app.test_client().post('/', data={'ticker': 'TEST'}, follow_redirects=True)
+        page = response.get_data(as_text=True)
+        self.assertIn("Partial Report", page)
+        self.assertIn("Getting news failed: news service down", page)
+        self.assertIn("Stock Report for Test Corp", page)
+
+    def tearDown(self):
+        """Clean up any test artifacts"""
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+class TestBacktest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.prices = 100 + np.cumsum(rng.normal(size=2000))
+
+    def test_windows_match_per_window_fit(self):
+        """Test every rolling-origin window matches a separate least-squares fit"""
+        windows = predict.rolling_origin_windows(len(self.prices), train_size=365, test_size=90)
+        results = predict.backtest(self.prices, windows)
+
+        self.assertEqual(results['predictions'].shape, (len(windows), 90))
+        for i, (train_start, train_end, test_start, test_end) in enumerate(windows):
+            slope, intercept = np.polyfit(np.arange(train_start, train_end), self.prices[train_start:train_end], 1)
+            expected = intercept + slope * np.arange(test_start, test_end)
+            np.testing.assert_allclose(results['predictions'][i], expected, rtol=1e-8)
+            np.testing.assert_allclose(results['mae'][i], np.abs(expected - self.prices[test_start:test_end]).mean(), rtol=1e-8)
+
+    def test_uneven_test_windows_are_padded(self):
+        """Test shorter test windows are NaN padded and scored on their own days only"""
+        windows = [[0, 100, 100, 130], [100, 200, 200, 210]]
+        results = predict.backtest(self.prices, windows)
+
+        self.assertTrue(np.isnan(results['predictions'][1, 10:]).all())
+        errors = results['predictions'][1, :10] - self.prices[200:210]
+        self.assertAlmostEqual(results['rmse'][1], np.sqrt((errors ** 2).mean()))
+
+    def test_train_predict_model_years(self):
+        """Test the report keeps one prediction per calendar day of each test year"""
+        history = make_history()
+        history.columns = history.columns.get_level_values(0)
+        predictions = predict.train_predict_model(history)
+
+        self.assertEqual(list(predictions), ['year -1', 'year -2', 'year -0'])
+        self.assertEqual(len(predictions['year -1']), 365)
+        self.assertEqual(len(predictions['year -2']), 365)
+        self.assertEqual(len(predictions['year -0']), 117)
+
+    def test_predictions_plotted_in_their_years(self):
+        """Test prediction traces are placed by the last year of the plotted data, not a fixed year"""
+        history = make_history(end="2026-03-13")
+        history.columns = history.columns.get_level_values(0)
+        fig = plot.plot_figure(history, predict.train_predict_model(history), 'TEST')
+
+        traces = {trace.name: trace for trace in fig.data}
+        for key, year in (('year -0', 2026), ('year -1', 2025), ('year -2', 2024)):
+            dates = pd.DatetimeIndex(traces[f'Prediction {key}'].x)
+            self.assertEqual(dates[0], pd.Timestamp(f"{year}-01-01"))
+            self.assertEqual(len(dates), len(traces[f'Prediction {key}'].y))
+        self.assertEqual(pd.DatetimeIndex(traces['Prediction year -0'].x)[-1], pd.Timestamp("2026-03-13"))
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.builds = []
+        main.reports.clear()
+
+    def fake_build(self, ticker_symbol):
+        self.builds.append(ticker_symbol)
+        time.sleep(0.05)
+        return f"<html>{ticker_symbol} #{len(self.builds)}</html>", True
+
+    def test_etag_and_not_modified(self):
+        """Test a cached report is served with an ETag and revalidated with 304"""
+        client = main.app.test_client()
+        with mock.patch.object(main.reports, 'build', self.fake_build):
+            first = client.get('/report/AAPL')
+            again = client.get('/report/AAPL', headers={'If-None-Match': first.headers['ETag']})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.builds, ['AAPL'])
+        self.assertEqual(main.reports.stats, {'hits': 1, 'misses': 1, 'stale': 0, 'waits': 0})
+
+    def test_concurrent_misses_build_once(self):
+        """Test simultaneous requests for one ticker share a single build"""
+        cache = report_cache.ReportCache(self.fake_build)
+        with report_cache.ThreadPoolExecutor(max_workers=8) as pool:
+            entries = list(pool.map(cache.get, ['MSFT'] * 8))
+
+        self.assertEqual(self.builds, ['MSFT'])
+        self.assertEqual(len({entry.etag for entry in entries}), 1)
+        self.assertEqual(cache.stats['misses'], 1)
+        self.assertEqual(cache.stats['hits'] + cache.stats['waits'], 7)
+        self.assertEqual(cache.hit_rate(), 7 / 8)
+
+    def test_ticker_case_shares_entry(self):
+        """Test tickers differing only in case are one report"""
+        cache = report_cache.ReportCache(self.fake_build)
+        first = cache.get('aapl')
+        self.assertIs(cache.get('AAPL'), first)
+        self.assertIs(cache.get('Aapl'), first)
+        self.assertEqual(self.builds, ['AAPL'])
+
+    def test_least_recently_served_report_is_evicted(self):
+        """Test the cache keeps at most max_entries reports, dropping the least recently served"""
+        cache = report_cache.ReportCache(self.fake_build, max_entries=2)
+        cache.get('AAPL')
+        cache.get('MSFT')
+        cache.get('AAPL')
+        cache.get('NVDA')
+
+        self.assertEqual([key[0] for key in cache.entries], ['AAPL', 'NVDA'])
+        cache.get('MSFT')
+        self.assertEqual(self.builds, ['AAPL', 'MSFT', 'NVDA', 'MSFT'])
+        self.assertLessEqual(len(cache.locks), 2)
+
+    def test_stale_entry_rebuilt_in_background(self):
+        """Test a stale report is served at once while one background rebuild refreshes it"""
+        cache = report_cache.ReportCache(self.fake_build, ttl=0)
+        first = cache.get('NVDA')
+        stale = [cache.get('NVDA') for _ in range(3)]
+        cache.pool.shutdown(wait=True)
+
+        self.assertTrue(all(entry is first for entry in stale))
+        self.assertEqual(self.builds, ['NVDA', 'NVDA'])
+        self.assertIsNot(cache.entries[('NVDA', report_cache.trading_day())], first)
+
+    def test_unchanged_rebuild_keeps_etag(self):
+        """Test rebuilding a report from the same data gives the same ETag, so 304s keep working"""
+        history = make_history()
+        history.columns = history.columns.get_level_values(0)
+
+        def build(ticker_symbol):
+            self.builds.append(ticker_symbol)
+            return plot.plot_data(history, {}, ticker_symbol), True
+
+        cache = report_cache.ReportCache(build, ttl=0)
+        first = cache.get('AAPL')
+        cache.get('AAPL')
+        cache.pool.shutdown(wait=True)
+
+        self.assertEqual(self.builds, ['AAPL', 'AAPL'])
+        rebuilt = cache.entries[('AAPL', report_cache.trading_day())]
+        self.assertIsNot(rebuilt, first)
+        self.assertEqual(rebuilt.etag, first.etag)
+
+    def test_new_trading_day_drops_old_reports(self):
+        """Test reports are keyed by trading day"""
+        days = iter(["2024-04-25", "2024-04-25", "2024-04-26"])
+        cache = report_cache.ReportCache(self.fake_build, day=lambda: next(days))
+        cache.get('AAPL')
+        cache.get('AAPL')
+        cache.get('AAPL')
+
+        self.assertEqual(self.builds, ['AAPL', 'AAPL'])
+        self.assertEqual(list(cache.entries), [('AAPL', "2024-04-26")])
+
+    def test_trading_day_skips_weekend(self):
+        """Test weekend requests map to Friday's trading day"""
+        saturday = report_cache.datetime.datetime(2024, 4, 27, 12, tzinfo=report_cache.MARKET_TZ)
+        self.assertEqual(report_cache.trading_day(saturday), report_cache.datetime.date(2024, 4, 26))
+
+
+class TestNewsPacker(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime.datetime(2024, 4, 26, 12)
+
+    def article(self, title, hours_ago=1, desc="Apple shares moved.", link=None):
+        return {'title': title, 'desc': desc, 'link': link or f"http://example.com/{len(title)}/{hours_ago}", 'datetime': self.now - datetime.timedelta(hours=hours_ago)}
+
+    def test_near_identical_headlines_deduped(self):
+        """Test the same story from several publishers is kept once"""
+        articles = [
+            self.article("Apple unveils record $110 billion AAPL buyback - CNBC"),
+            self.article("Apple unveils record $110 billion AAPL buyback - Reuters"),
+            self.article("Apple unveils record 110 billion AAPL buyback! - Yahoo Finance"),
+            self.article("Apple iPhone sales drop 10% in China - Bloomberg"),
+        ]
+        kept = news_packer.dedupe_articles(articles)
+        self.assertEqual([a['title'] for a in kept], [articles[0]['title'], articles[3]['title']])
+
+    def test_ranked_by_relevance_and_recency(self):
+        """Test recent articles naming the symbol come first"""
+        old = self.article("AAPL falls after earnings miss", hours_ago=24 * 20)
+        recent = self.article("AAPL rallies on AI news", hours_ago=2)
+        unrelated = self.article("Markets wait for the Fed decision", hours_ago=1, desc="Stocks were flat.")
+        undated = dict(self.article("Tech stocks mixed", desc="Nothing new."), datetime=float('nan'))
+
+        _, packed = news_packer.pack_articles([undated, old, unrelated, recent], "AAPL", now=self.now)
+        self.assertEqual(packed, [recent, old, unrelated, undated])
+
+    def test_packed_within_token_budget(self):
+        """Test packing stops adding articles once the token budget is spent"""
+        articles = [self.article(f"AAPL story number {i} with a distinct headline {i * 7}", hours_ago=i) for i in range(200)]
+        text, packed = news_packer.pack_articles(articles, "AAPL", token_budget=300, now=self.now)
+
+        self.assertLessEqual(news_packer.estimate_tokens(text), 300)
+        self.assertLess(len(packed), len(articles))
+        self.assertEqual(len(text.splitlines()), len(packed))
+
+
+class FakeLMStudioHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /v1/chat/completions endpoint."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(body)
+        self.server.release.wait(5)
+        reply = {
+            'id': 'chatcmpl-test',
+            'object': 'chat.completion',
+            'created': 0,
+            'model': body['model'],
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': f"- {len(body['messages'])} messages summarized"}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+        }
+        payload = json.dumps(reply).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSummaryQueue(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeLMStudioHandler)
+        self.server.requests = []
+        self.server.release = threading.Event()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        llm_client = OpenAI(base_url=f"http://127.0.0.1:{self.server.server_port}/v1", api_key="lm-studio")
+        self.queue = summary_queue.SummaryQueue(lambda articles, symbol: news_summary.summarize_news(articles, symbol, llm_client))
+        self.articles = [{'title': 'Title', 'desc': 'Description', 'link': 'http://example.com/1'}]
+        self.cache_dir = tempfile.mkdtemp()
+
+    def wait_for(self, job_id, timeout=5):
+        deadline = time.time() + timeout
+        while self.queue.status(job_id)['state'] == 'pending' and time.time() < deadline:
+            time.sleep(0.01)
+        return self.queue.status(job_id)
+
+    def test_summary_runs_in_background(self):
+        """Test submitting returns at once and the summary arrives from the fake server"""
+        job_id = self.queue.submit(self.articles, "AAPL")
+        self.assertEqual(self.queue.status(job_id)['state'], 'pending')
+        self.assertEqual(self.queue.submit(self.articles, "AAPL"), job_id)
+
+        self.server.release.set()
+        status = self.wait_for(job_id)
+        self.assertEqual(status['state'], 'done')
+        self.assertEqual(status['summary'], "- 3 messages summarized")
+        self.assertEqual(status['urls'], ['http://example.com/1'])
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_report_page_returns_before_summary(self):
+        """Test the report renders with price data while the summary is still pending"""
+        patches = [
+            mock.patch('data.yf.download', return_value=make_history()),
+            mock.patch('data.fetch_company_name', return_value="Test Corp"),
+            mock.patch('news_summary.get_latest_news', return_value=self.articles),
+            mock.patch('download_data.CACHE_DIR', self.cache_dir),
+            mock.patch.object(main, 'summaries', self.queue),
+        ]
+        for p in patches:
+            p.start()
+        try:
+            main.reports.clear()
+            client = main.app.test_client()
+            page = client.get('/report/AAPL').get_data(as_text=True)
+            self.assertIn("Summarizing the latest news...", page)
+            self.assertIn("Stock Report for Test Corp", page)
+
+            job_id = self.queue.job_id("AAPL", self.articles)
+            self.assertEqual(client.get(f'/summary/{job_id}').get_json()['state'], 'pending')
+            self.server.release.set()
+            self.wait_for(job_id)
+            self.assertEqual(client.get(f'/summary/{job_id}').get_json()['state'], 'done')
+            self.assertEqual(client.get('/summary/unknown').status_code, 404)
+        finally:
+            for p in patches:
+                p.stop()
+
+    def test_failed_summary_is_reported(self):
+        """Test a failing LLM call marks the job as failed"""
+        failing = summary_queue.SummaryQueue(mock.Mock(side_effect=ConnectionError("LM Studio is not running")))
+        job_id = failing.submit(self.articles, "AAPL")
+        failing.pool.shutdown(wait=True)
+
+        self.assertEqual(failing.status(job_id)['state'], 'failed')
+        self.assertIn("not running", failing.status(job_id)['error'])
+
+    def tearDown(self):
+        """Clean up any test artifacts"""
+        self.server.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+class TestNewsSummaryCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.store = news_summary.news_cache.NewsCache(os.path.join(self.cache_dir, "news.sqlite"))
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_get_latest_news_restores_datetimes(self):
+        """Cached Google News results come back with datetime objects for the packer"""
+        published = datetime.datetime.now().replace(microsecond=0)
+        article = {'title': "AAPL beats", 'link': "https://news.example/aapl", 'datetime': published, 'desc': ""}
+        with mock.patch.object(news_summary, 'news_store', self.store), \
+                mock.patch.object(news_summary, 'search_google_news', return_value=[(article['link'], published, article)]) as search:
+            news_summary.get_latest_news("AAPL")
+            articles = news_summary.get_latest_news("AAPL")
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual(articles[0]['datetime'], published)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# benchmark.py
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from openai import OpenAI
+import complete_LMS_working as lms
+import sentiment_cache
+from lag_correlation import lagged_correlation
+from fakes import make_articles, start_fake_server
+
+N_ARTICLES = 400
+LATENCY = 0.05
+
+
+# Baseline: a new OpenAI client per article, one request at a time
+def serial_new_client(articles, base_url):
+    results = []
+    for article in articles:
+        client = OpenAI(base_url=base_url, api_key="lm-studio")
+        llm_response = lms.analyze_sentiment(article['description'], client)
+        results.append((article, llm_response, lms.extract_sentiment(llm_response)))
+    return results
+
+
+def bench_classifier():
+    server = start_fake_server(latency=LATENCY)
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    client = OpenAI(base_url=base_url, api_key="lm-studio")
+    articles = make_articles(N_ARTICLES)
+    print(f"Sentiment classification, {N_ARTICLES} articles, stub server with {LATENCY * 1000:.0f} ms latency")
+
+    start = time.perf_counter()
+    serial_new_client(articles[:50], base_url)
+    rate = 50 / (time.perf_counter() - start)
+    print(f"  serial, client per call (baseline) : {rate:8.1f} articles/s")
+
+    for max_workers, batch_size in ((8, 1), (32, 1), (8, 10), (8, 25)):
+        server.requests.clear()
+        start = time.perf_counter()
+        results = list(lms.classify_articles(articles, client, max_workers=max_workers, batch_size=batch_size))
+        rate = len(results) / (time.perf_counter() - start)
+        print(f"  {max_workers:2d} workers, {batch_size:2d} per prompt          : {rate:8.1f} articles/s  ({len(server.requests)} requests)")
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache = sentiment_cache.SentimentCache(os.path.join(cache_dir, "sentiment.sqlite"))
+        for label in ("memo cache cold", "memo cache warm"):
+            start = time.perf_counter()
+            results = list(lms.classify_articles(articles, client, max_workers=8, cache=cache))
+            rate = len(results) / (time.perf_counter() - start)
+            print(f"   8 workers, {label:<23}: {rate:8.1f} articles/s  (cumulative hit ratio {cache.hit_ratio():.0%})")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    server.shutdown()
+    server.server_close()
+
+
+# The per-series approach: pandas corr of shifted returns, one series, lag and replicate at a time
+def pandas_lagged_correlation(sentiment, returns, max_lag=10, n_boot=100, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for j in range(sentiment.shape[1]):
+        x = pd.Series(sentiment[:, j])
+        for lag in range(-max_lag, max_lag + 1):
+            y = pd.Series(returns[:, j]).shift(-lag)
+            boot = []
+            for _ in range(n_boot):
+                draws = rng.integers(0, len(x), len(x))
+                boot.append(x.iloc[draws].reset_index(drop=True).corr(y.iloc[draws].reset_index(drop=True)))
+            results.append((x.corr(y), np.nanquantile(boot, [0.025, 0.975])))
+    return results
+
+
+def bench_lag_correlation(n_tickers=500, n_days=300, n_boot=1000):
+    rng = np.random.default_rng(0)
+    sentiment = rng.poisson(5, size=(n_days, n_tickers)).astype(float)
+    returns = rng.normal(0, 0.02, size=(n_days, n_tickers))
+    print(f"Lagged correlation, lags -10..+10, {n_days} days, {n_boot} bootstrap replicates")
+
+    sample = 2
+    start = time.perf_counter()
+    pandas_lagged_correlation(sentiment[:, :sample], returns[:, :sample], n_boot=n_boot)
+    per_ticker = (time.perf_counter() - start) / sample
+    print(f"  pandas per series, lag, replicate : {per_ticker * 1000:9.1f} ms/ticker  (~{per_ticker * n_tickers:.0f} s for {n_tickers})")
+
+    start = time.perf_counter()
+    lagged_correlation(sentiment, returns, n_boot=n_boot)
+    elapsed = time.perf_counter() - start
+    print(f"  vectorized, {n_tickers} tickers at once   : {elapsed / n_tickers * 1000:9.1f} ms/ticker  ({elapsed:.1f} s total)")
+
+
+if __name__ == "__main__":
+    bench_classifier()
+    bench_lag_correlation()
@@ -1,43 +1,163 @@
 import csv
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
 from gnews import GNews
-from autogen import ConversableAgent
+from openai import OpenAI
+# news_cache.py lives in the repo's shared/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+import news_cache
+import sentiment_cache
+from csv_records import complete_csv_length, complete_lines_length
+from sentiment_rollups import CSV_SYMBOL
+
+LMS_BASE_URL = "http://localhost:1234/v1"
+MODEL = "lmstudio-community/Meta-Llama-3-8B-Instruct-GGUF"
+SYSTEM_PROMPT = "You are agent, a professional financial analyst specializing sentiment assessment. Reply only **POSITIVE**, **NEGATIVE**, **NEUTRAL**, such words."
+BATCH_SYSTEM_PROMPT = "You are agent, a professional financial analyst specializing sentiment assessment. You get numbered news descriptions. Reply only with a JSON array holding one label per description, in the same order, each \"POSITIVE\", \"NEGATIVE\" or \"NEUTRAL\"."
+SENTIMENTS = ("POSITIVE", "NEGATIVE", "NEUTRAL")
+# Requests sent to LM Studio at the same time
+MAX_WORKERS = 8
+# Descriptions per prompt; above 1 the batch prompt with JSON labels is used
+BATCH_SIZE = 1
+OUTPUT_CSV = 'news_articles.csv'
+FIELDNAMES = ['Date', 'Title', 'Content', 'URL', 'Publisher', 'LLMResponse', 'Sentiment']
+NEWS_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "news.sqlite")
 
-def get_latest_news(stock_symbol, num_pages):
-    google_news = GNews(language='en', country='US', period='100d', start_date=None, end_date=None, max_results=5000, exclude_websites=None,proxy=None)
+# Article store of this project; a rerun only asks Google News for the days it has not searched yet
+news_store = news_cache.NewsCache(NEWS_CACHE_PATH)
+# Labels of descriptions already classified, shared by every run
+sentiment_memo = sentiment_cache.SentimentCache()
+
+def fetch_news(stock_symbol, start_date, end_date):
+    # GNews treats end_date as exclusive
+    end_date = end_date + datetime.timedelta(days=1)
+    google_news = GNews(language='en', country='US', start_date=(start_date.year, start_date.month, start_date.day), end_date=(end_date.year, end_date.month, end_date.day), max_results=5000, exclude_websites=None, proxy=None)
     #change max result to 1 to test codes
-    news_list = []
+    results = []
+    for article in google_news.get_news(stock_symbol):
+        try:
+            published = parsedate_to_datetime(article['published date'])
+        except (KeyError, TypeError, ValueError):
+            published = None
+        results.append((article['url'], published, article))
+    return results
 
-    try:
-        with open('news_articles.csv', 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Date', 'Title', 'Content', 'URL', 'Publisher', 'LLMResponse', 'Sentiment']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+def get_latest_news(stock_symbol, days=100, max_workers=MAX_WORKERS, batch_size=BATCH_SIZE, output_path=OUTPUT_CSV, resume=True):
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=days)
+    articles = news_store.search(f"gnews|en|US|{stock_symbol}", start_date, end_date, lambda start, end: fetch_news(stock_symbol, start, end))
+    summary = label_articles(articles, output_path, max_workers=max_workers, batch_size=batch_size, resume=resume)
+    print(f"Labelled {summary['labelled']} articles in {summary['elapsed']:.1f}s ({summary['articles_per_second']:.1f} articles/s), "
+          f"skipped {summary['skipped']} from earlier runs, {summary['failed']} failed, "
+          f"{summary['cache_hits']} labels from the memo cache ({summary['cache_hit_ratio']:.0%} hit ratio)")
+    if summary['failed']:
+        print("Run the script again to retry the failed articles.")
+    return articles
 
-            for _ in range(num_pages):
-                page_news = google_news.get_news(stock_symbol)
-                for article in page_news:
-                    llm_response = analyze_sentiment(article['description'])  # Analyze sentiment
-                    print("LLM Response:", llm_response)  # Print the LLM response
-                    sentiment = extract_sentiment(llm_response)  # Extract sentiment from LLM response
-                    writer.writerow({'Date': article['published date'], 'Title': article['title'], 'Content': article['description'], 'URL': article['url'], 'Publisher': article['publisher'], 'LLMResponse': llm_response, 'Sentiment': sentiment})
-                    news_list.append(article)
+# File listing the URL of every article already written to output_path, one per line
+def checkpoint_path(output_path):
+    return output_path + '.checkpoint'
 
-        return news_list
+# URLs labelled by earlier runs. Rows in the CSV count too, in case a run stopped
+# between writing a row and its checkpoint line. Call drop_partial_writes first, so a
+# half-written last row isn't taken for a processed article.
+def load_processed_urls(output_path):
+    urls = set()
+    if os.path.exists(checkpoint_path(output_path)):
+        with open(checkpoint_path(output_path), 'r', encoding='utf-8') as f:
+            urls.update(line.strip() for line in f if line.strip())
+    if os.path.exists(output_path):
+        with open(output_path, 'r', newline='', encoding='utf-8') as f:
+            urls.update(row['URL'] for row in csv.DictReader(f) if row.get('URL'))
+    return urls
 
-    except Exception as e:
-        print(f"Error retrieving news: {e}")
-        return []
+# Drop whatever a killed run left half written at the end of the CSV and the checkpoint file
+def drop_partial_writes(output_path):
+    for path, complete_length in ((output_path, complete_csv_length), (checkpoint_path(output_path), complete_lines_length)):
+        if os.path.exists(path):
+            with open(path, 'rb+') as f:
+                data = f.read()
+                length = complete_length(data)
+                if length != len(data):
+                    f.truncate(length)
 
-from openai import OpenAI
+# Label articles into output_path, appending and flushing each row as soon as it is classified
+# and recording its URL in the checkpoint file. With resume=True, articles whose URL was already
+# processed are skipped, so an interrupted or partly failed run picks up where it stopped.
+# An article whose reply held no label (UNKNOWN) is neither written nor checkpointed and counts
+# as failed, so the next run asks again. Descriptions labelled before are answered from `cache` (the shared sentiment memo by default).
+def label_articles(articles, output_path=OUTPUT_CSV, client=None, max_workers=MAX_WORKERS, batch_size=BATCH_SIZE, resume=True, cache=None):
+    cache = cache or sentiment_memo
+    hits_before, misses_before = cache.hits, cache.misses
+    if not resume:
+        for path in (output_path, checkpoint_path(output_path)):
+            if os.path.exists(path):
+                os.remove(path)
+    drop_partial_writes(output_path)
+    processed = load_processed_urls(output_path)
+    pending = list({article['url']: article for article in articles if article['url'] not in processed}.values())
+    errors = []
+    labelled = 0
+    unknown = 0
+    started = time.perf_counter()
 
-def analyze_sentiment(text):
+    write_header = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+    with open(output_path, 'a', newline='', encoding='utf-8') as csvfile, open(checkpoint_path(output_path), 'a', encoding='utf-8') as checkpoint:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        if write_header:
+            writer.writeheader()
+        for article, llm_response, sentiment in classify_articles(pending, client, max_workers, batch_size, errors, cache):
+            print("LLM Response:", llm_response)  # Print the LLM response
+            if sentiment not in SENTIMENTS:
+                unknown += 1
+                continue
+            writer.writerow({'Date': article['published date'], 'Title': article['title'], 'Content': article['description'], 'URL': article['url'], 'Publisher': article['publisher'], 'LLMResponse': llm_response, 'Sentiment': sentiment})
+            csvfile.flush()
+            checkpoint.write(article['url'] + '\n')
+            checkpoint.flush()
+            labelled += 1
+
+    for failed, e in errors:
+        print(f"Error labelling {len(failed)} articles: {e}")
+    elapsed = time.perf_counter() - started
+    cache_hits = cache.hits - hits_before
+    lookups = cache_hits + cache.misses - misses_before
+    return {
+        'labelled': labelled,
+        'skipped': len(articles) - len(pending),
+        'failed': sum(len(failed) for failed, _ in errors) + unknown,
+        'unknown': unknown,
+        'elapsed': elapsed,
+        'articles_per_second': labelled / max(elapsed, 1e-9),
+        'cache_hits': cache_hits,
+        'cache_hit_ratio': cache_hits / lookups if lookups else 0.0,
+    }
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    # One client for the whole run, so every worker thread shares its connection pool
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI(base_url=LMS_BASE_URL, api_key="lm-studio")
+        return _client
+
+def analyze_sentiment(text, client=None):
     # Initiate conversation with Gemma and get sentiment label
-    client = OpenAI(base_url="http://localhost:1234/v1", api_key="lm-studio")
+    client = client or get_client()
 
     completion = client.chat.completions.create(
-        model="lmstudio-community/Meta-Llama-3-8B-Instruct-GGUF",
+        model=MODEL,
         messages=[
-            {"role": "system", "content": "You are agent, a professional financial analyst specializing sentiment assessment. Reply only **POSITIVE**, **NEGATIVE**, **NEUTRAL**, such words."},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": text}
         ],
         temperature=0.1,
@@ -49,6 +169,97 @@ def analyze_sentiment(text):
     except AttributeError:
         return ""
 
+def analyze_sentiment_batch(texts, client=None):
+    # Classify several descriptions with one prompt. Returns (llm_response, labels), where labels
+    # is None when the reply does not hold exactly one label per description.
+    client = client or get_client()
+    prompt = "\n".join(f"{i}. {' '.join(str(text).split())}" for i, text in enumerate(texts, 1))
+
+    completion = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.1,
+    )
+    llm_response = completion.choices[0].message.content or ""
+    return llm_response, parse_batch_labels(llm_response, len(texts))
+
+def parse_batch_labels(llm_response, count):
+    # Read the JSON array of labels out of a batch reply
+    start = llm_response.find('[')
+    end = llm_response.rfind(']')
+    if start < 0 or end < start:
+        return None
+    try:
+        labels = json.loads(llm_response[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(labels, list) or len(labels) != count:
+        return None
+    labels = [str(label).strip(" *").upper() for label in labels]
+    return [label if label in SENTIMENTS else "UNKNOWN" for label in labels]
+
+def classify_batch(articles, client):
+    # Label a batch of articles, returning (article, llm_response, sentiment) tuples
+    if len(articles) > 1:
+        _, labels = analyze_sentiment_batch([article['description'] for article in articles], client)
+        if labels is not None:
+            return [(article, label, label) for article, label in zip(articles, labels)]
+    # Single articles, and batches whose reply could not be matched up, are labelled one by one
+    results = []
+    for article in articles:
+        llm_response = analyze_sentiment(article['description'], client)
+        results.append((article, llm_response, extract_sentiment(llm_response)))
+    return results
+
+def classify_articles(articles, client=None, max_workers=MAX_WORKERS, batch_size=BATCH_SIZE, errors=None, cache=None):
+    # Yield (article, llm_response, sentiment) as batches complete, with at most
+    # max_workers requests in flight over one shared client. When an `errors` list is
+    # given, failed batches are appended to it as (articles, exception) instead of raising.
+    # Articles whose normalized description is the same are classified once; with a
+    # sentiment `cache`, labels from earlier runs are reused and new ones stored.
+    client = client or get_client()
+    system_prompt = BATCH_SYSTEM_PROMPT if batch_size > 1 else SYSTEM_PROMPT
+    groups = {}
+    for article in articles:
+        groups.setdefault(sentiment_cache.memo_key(article['description'], MODEL, system_prompt), []).append(article)
+
+    if cache is not None:
+        cached = cache.get_many(groups)
+        # Every article that does not need its own request counts as a hit
+        cache.misses += len(groups) - len(cached)
+        cache.hits += len(articles) - (len(groups) - len(cached))
+        for key, (llm_response, sentiment) in cached.items():
+            for article in groups.pop(key):
+                yield article, llm_response, sentiment
+
+    # One representative article per description goes to the model
+    keys = list(groups)
+    batches = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {pool.submit(classify_batch, [groups[key][0] for key in batch], client): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors.append(([article for key in batch for article in groups[key]], e))
+                continue
+            if cache is not None:
+                # Malformed replies (UNKNOWN) are not memoized, so later runs ask again
+                cache.put_many((key, llm_response, sentiment) for key, (_, llm_response, sentiment) in zip(batch, results) if sentiment in SENTIMENTS)
+            for key, (_, llm_response, sentiment) in zip(batch, results):
+                for article in groups[key]:
+                    yield article, llm_response, sentiment
+    finally:
+        # Drop queued batches when the consumer stops early (e.g. Ctrl+C)
+        pool.shutdown(wait=True, cancel_futures=True)
+
 
 def extract_sentiment(llm_response):
     # Extract sentiment from LLM response
@@ -61,9 +272,17 @@ def extract_sentiment(llm_response):
     else:
         return "UNKNOWN"
 
-# Example usage:
-stock_symbol = "AAPL"  # Example stock symbol
-num_pages = 10  # Number of pages to fetch from Google News
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Batch mode: python complete_LMS_working.py AAPL MSFT NVDA
+        from sentiment_batch import run_batch
+        summaries, failures = run_batch(sys.argv[1:])
+        print(f"Batch finished: {len(summaries)} symbols processed, {len(failures)} failed.")
+        sys.exit(1 if failures else 0)
+
+    # Example usage:
+    stock_symbol = CSV_SYMBOL  # The symbol news_articles.csv is written for
+    days = 100  # Number of days of news to fetch from Google News
 
-news_list = get_latest_news(stock_symbol, num_pages)
-print("News articles retrieved and sentiment analyzed.")
\ No newline at end of file
+    news_list = get_latest_news(stock_symbol, days)
+    print("News articles retrieved and sentiment analyzed.")
\ No newline at end of file
@@ -0,0 +1,22 @@
+# csv_records.py
+
+# Length of `data` up to the end of its last complete CSV record. LLM replies span several
+# lines, so not every newline ends a record: only one outside quoted fields does, i.e. one
+# with an even number of quotes before it (quotes inside a field are doubled).
+# `data` must start at a record boundary.
+def complete_csv_length(data):
+    length = 0
+    quotes = 0
+    start = 0
+    while True:
+        newline = data.find(b'\n', start)
+        if newline < 0:
+            return length
+        quotes += data.count(b'"', start, newline)
+        if quotes % 2 == 0:
+            length = newline + 1
+        start = newline + 1
+
+# Length of `data` up to the end of its last complete line
+def complete_lines_length(data):
+    return data.rfind(b'\n') + 1
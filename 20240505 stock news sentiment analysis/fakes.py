@@ -0,0 +1,104 @@
+# fakes.py
+# Local stand-ins for LM Studio and Google News, shared by test_app.py and benchmark.py
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import complete_LMS_working as lms
+import sentiment_rollups
+
+
+def label_for(text):
+    if "up" in text:
+        return "POSITIVE"
+    if "down" in text:
+        return "NEGATIVE"
+    return "NEUTRAL"
+
+
+class FakeLMStudioHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /v1/chat/completions endpoint that labels descriptions by keyword."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        with server.lock:
+            server.requests.append(body)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.latency)
+        system, user = body['messages'][0]['content'], body['messages'][1]['content']
+        if any(marker in user for marker in server.failing):
+            with server.lock:
+                server.in_flight -= 1
+            self.send_error(500)
+            return
+        if system == lms.BATCH_SYSTEM_PROMPT:
+            content = "Sorry, I can't help." if server.garble_batches else json.dumps([label_for(line) for line in user.splitlines()])
+        elif any(marker in user for marker in server.unmarked):
+            # A label the parser can't pick out, without the ** markers
+            content = label_for(user).capitalize()
+        else:
+            content = f"**{label_for(user)}**"
+        with server.lock:
+            server.in_flight -= 1
+
+        reply = {
+            'id': 'chatcmpl-test',
+            'object': 'chat.completion',
+            'created': 0,
+            'model': body['model'],
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+        }
+        payload = json.dumps(reply).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeLMStudioServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start_fake_server(latency=0.0):
+    server = FakeLMStudioServer(('127.0.0.1', 0), FakeLMStudioHandler)
+    server.requests = []
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.latency = latency
+    server.garble_batches = False
+    server.failing = set()
+    server.unmarked = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_articles(n):
+    moves = ["up", "down", "flat"]
+    return [{'description': f"AAPL shares move {moves[i % 3]} on story {i}.", 'url': f"https://news.example/{i}", 'published date': "Mon, 29 Apr 2024 12:00:00 GMT", 'title': f"Story {i}", 'publisher': {'title': "Example News"}} for i in range(n)]
+
+
+def fake_fetch(symbol, start_date, end_date):
+    # Two articles a day for the last five days; symbols named FAIL can't be fetched
+    if symbol == "FAIL":
+        raise ConnectionError("news source unavailable")
+    moves = ["up", "down"]
+    results = []
+    for day in range(5):
+        published = datetime.datetime.combine(datetime.date.today() - datetime.timedelta(days=day), datetime.time(12), datetime.timezone.utc)
+        if not start_date <= published.date() <= end_date:
+            continue
+        for i, move in enumerate(moves):
+            url = f"https://news.example/{symbol}/{day}/{i}"
+            article = {'description': f"{symbol} shares move {move} on day {day}.", 'url': url, 'published date': published.strftime(sentiment_rollups.DATE_FORMAT), 'title': f"{symbol} story", 'publisher': {'title': "Example News"}}
+            results.append((url, published, article))
+    return results
@@ -0,0 +1,84 @@
+# lag_correlation.py
+import warnings
+import numpy as np
+
+MAX_LAG = 10
+N_BOOT = 1000
+# Bootstrap replicates evaluated per matrix product, bounding memory for many series
+BOOT_CHUNK = 100
+
+# Stack values shifted by every lag into a (lags x T x N) array: out[i, t] = values[t + lags[i]],
+# NaN where t + lag falls outside the series
+def lag_stack(values, lags):
+    values = np.asarray(values, dtype=np.float64)
+    t = values.shape[0]
+    max_shift = int(np.max(np.abs(lags)))
+    padded = np.full((t + 2 * max_shift,) + values.shape[1:], np.nan)
+    padded[max_shift:max_shift + t] = values
+    # Window i of length T starts i days into the padded series
+    windows = np.lib.stride_tricks.sliding_window_view(padded, t, axis=0)
+    return np.moveaxis(windows[np.asarray(lags) + max_shift], -1, 1)
+
+# Pearson correlations of x and y over the pairs where `mask` is set, with every row of
+# `weights` (B x T) counting how often each time step is drawn. Returns (B x lags x N).
+def weighted_correlations(weights, x, y, mask):
+    n_lags, t, n = y.shape
+    m = mask.reshape(n_lags, t, n).transpose(1, 0, 2).reshape(t, -1).astype(np.float64)
+    xs = np.where(mask, x, 0.0).transpose(1, 0, 2).reshape(t, -1)
+    ys = np.where(mask, y, 0.0).transpose(1, 0, 2).reshape(t, -1)
+    # Each weighted sum over time for all lags and series is one matrix product
+    count = weights @ m
+    sx, sy = weights @ xs, weights @ ys
+    sxx, syy, sxy = weights @ (xs * xs), weights @ (ys * ys), weights @ (xs * ys)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sy / count
+        var_x = sxx - sx * sx / count
+        var_y = syy - sy * sy / count
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(count < 3) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    return corr.reshape(len(weights), n_lags, n)
+
+# Correlation between sentiment and returns at every lag from -max_lag to +max_lag days, with
+# percentile bootstrap confidence intervals. At lag k sentiment on day t is paired with the
+# return on day t + k, so positive lags mean sentiment leads returns.
+#
+# `sentiment` and `returns` are (T,) or (T x N) arrays on the same dates; a single return series
+# is compared with every sentiment column. All lags, series and bootstrap replicates are
+# computed with matrix products, without Python loops over tickers or lags.
+def lagged_correlation(sentiment, returns, max_lag=MAX_LAG, n_boot=N_BOOT, ci=0.95, seed=0):
+    x = np.asarray(sentiment, dtype=np.float64)
+    y = np.asarray(returns, dtype=np.float64)
+    x = x[:, None] if x.ndim == 1 else x
+    y = y[:, None] if y.ndim == 1 else y
+    x, y = np.broadcast_arrays(x, y)
+    t = x.shape[0]
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    y_lagged = lag_stack(y, lags)
+    x_lagged = np.broadcast_to(x, y_lagged.shape)
+    mask = ~np.isnan(x_lagged) & ~np.isnan(y_lagged)
+
+    corr = weighted_correlations(np.ones((1, t)), x_lagged, y_lagged, mask)[0]
+
+    # Resampling days with replacement is the same as weighting each day by its draw count
+    rng = np.random.default_rng(seed)
+    boot = []
+    for start in range(0, n_boot, BOOT_CHUNK):
+        draws = rng.integers(0, t, size=(min(BOOT_CHUNK, n_boot - start), t))
+        weights = np.zeros(draws.shape)
+        np.add.at(weights, (np.arange(len(draws))[:, None], draws), 1.0)
+        boot.append(weighted_correlations(weights, x_lagged, y_lagged, mask))
+    alpha = (1 - ci) / 2
+    low, high = np.full_like(corr, np.nan), np.full_like(corr, np.nan)
+    if boot:
+        with warnings.catch_warnings():
+            # Series with too few pairs have all-NaN replicates
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanquantile(np.concatenate(boot), [alpha, 1 - alpha], axis=0)
+    return {
+        'lags': lags,
+        'corr': corr,
+        'ci_low': low,
+        'ci_high': high,
+        'n_obs': mask.sum(axis=1),
+    }
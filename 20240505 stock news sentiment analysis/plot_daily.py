@@ -1,17 +1,8 @@
-import pandas as pd
 import plotly.graph_objects as go
+from sentiment_rollups import load_rollups
 
-# Read the data
-data = pd.read_csv('news_articles.csv')
-
-# Convert 'Date' from string to datetime
-data['Date'] = pd.to_datetime(data['Date'], format='%a, %d %b %Y %H:%M:%S GMT')
-
-# Set Date as the index
-data.set_index('Date', inplace=True)
-
-# Resample the data daily and count sentiments
-daily_sentiment = data.groupby('Sentiment').resample('D').size().unstack(0, fill_value=0)
+# Daily sentiment counts, updated with any rows appended to news_articles.csv since the last run
+daily_sentiment = load_rollups().daily()
 
 # Create a stacked area plot
 fig = go.Figure()
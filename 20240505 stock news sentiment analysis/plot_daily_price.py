@@ -1,28 +1,42 @@
+import sys
 import pandas as pd
 import yfinance as yf
 import plotly.graph_objects as go
+from sentiment_rollups import CSV_SYMBOL
+from sentiment_partitions import daily_counts_for
+from lag_correlation import lagged_correlation
 
-# Fetch stock price data
-ticker = 'AAPL'  # Specify the ticker
-stock_data = yf.download(ticker, period='300d')
+ticker = sys.argv[1].upper() if len(sys.argv) > 1 else CSV_SYMBOL  # Specify the ticker, e.g. python plot_daily_price.py MSFT
+
+# Daily sentiment counts: the symbol's partition from a batch run, else (for CSV_SYMBOL only) the
+# rollups of news_articles.csv; other symbols without a partition raise FileNotFoundError
+daily_sentiment = daily_counts_for(ticker)
+# Reports of other symbols than the default get their own files
+suffix = '' if ticker == CSV_SYMBOL else f'_{ticker}'
 
-# Read sentiment data
-sentiment_data = pd.read_csv('news_articles.csv')
-sentiment_data['Date'] = pd.to_datetime(sentiment_data['Date'], format='%a, %d %b %Y %H:%M:%S GMT')
-sentiment_data.set_index('Date', inplace=True)
-daily_sentiment = sentiment_data.groupby('Sentiment').resample('D').size().unstack(0, fill_value=0)
+# Fetch stock price data
+stock_data = yf.download(ticker, period='300d', auto_adjust=True, multi_level_index=False)
 
 # Ensure indices match for plotting (align dates)
 combined_data = stock_data.join(daily_sentiment, how='left').fillna(0)
 
-# Calculate correlation coefficients between stock price and sentiment counts
-correlation = combined_data.corr()
+# Correlate daily returns with sentiment counts (and net sentiment) at lags of -10..+10 trading days
+returns = combined_data['Close'].pct_change()
+sentiment_series = combined_data[list(daily_sentiment.columns)].copy()
+if {'POSITIVE', 'NEGATIVE'} <= set(sentiment_series.columns):
+    sentiment_series['NET'] = sentiment_series['POSITIVE'] - sentiment_series['NEGATIVE']
+result = lagged_correlation(sentiment_series.to_numpy(), returns.to_numpy())
+correlation = pd.concat({
+    'corr': pd.DataFrame(result['corr'], index=result['lags'], columns=sentiment_series.columns),
+    'ci_low': pd.DataFrame(result['ci_low'], index=result['lags'], columns=sentiment_series.columns),
+    'ci_high': pd.DataFrame(result['ci_high'], index=result['lags'], columns=sentiment_series.columns),
+}, axis=1).rename_axis('Lag (days)')
 
 # Create a figure with secondary y-axis
 fig = go.Figure()
 
 # Add traces
-fig.add_trace(go.Scatter(x=combined_data.index, y=combined_data['Adj Close'], name='AAPL Stock Price', yaxis='y1'))
+fig.add_trace(go.Scatter(x=combined_data.index, y=combined_data['Close'], name=f'{ticker} Stock Price', yaxis='y1'))
 for sentiment in daily_sentiment.columns:
     fig.add_trace(go.Scatter(x=combined_data.index, y=combined_data[sentiment], name=f'{sentiment} Sentiment', yaxis='y2'))
 
@@ -31,12 +45,31 @@ fig.update_layout(
     xaxis=dict(title='Date'),
     yaxis=dict(title='Stock Price', side='left', showgrid=False),
     yaxis2=dict(title='Sentiment Count', overlaying='y', side='right', showgrid=False),
-    title='AAPL Stock Prices and Daily Sentiment Counts'
+    title=f'{ticker} Stock Prices and Daily Sentiment Counts'
 )
 
 # Save the figure to an HTML file
-fig.write_html('stock_and_sentiment_analysis.html')
+fig.write_html(f'stock_and_sentiment_analysis{suffix}.html')
+
+# Plot the lagged correlations with their 95% bootstrap confidence intervals
+lag_fig = go.Figure()
+for column in sentiment_series.columns:
+    lag_fig.add_trace(go.Scatter(
+        x=result['lags'],
+        y=correlation[('corr', column)],
+        error_y=dict(type='data', symmetric=False,
+                     array=correlation[('ci_high', column)] - correlation[('corr', column)],
+                     arrayminus=correlation[('corr', column)] - correlation[('ci_low', column)]),
+        mode='lines+markers',
+        name=f'{column} Sentiment'
+    ))
+lag_fig.update_layout(
+    xaxis=dict(title='Lag in trading days (positive: sentiment leads returns)'),
+    yaxis=dict(title='Correlation with daily return'),
+    title=f'{ticker} Sentiment vs. Return Cross-Correlation'
+)
+lag_fig.write_html(f'sentiment_return_lags{suffix}.html')
 
 # Print correlation coefficients
-print('Correlation Coefficients:')
+print('Lagged Correlation Coefficients (sentiment on day t vs. return on day t + lag):')
 print(correlation)
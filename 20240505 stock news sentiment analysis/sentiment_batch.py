@@ -0,0 +1,82 @@
+# sentiment_batch.py
+import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from openai import OpenAI
+import complete_LMS_working as lms
+import sentiment_cache
+from sentiment_rollups import DATE_FORMAT, ROLLUP_DIR, SentimentRollups
+from sentiment_partitions import BASE_DIR, OUTPUT_DIR, articles_dir, daily_counts_dir
+
+# Per-symbol labelled CSVs and checkpoints
+WORK_DIR = os.path.join(BASE_DIR, "cache", "batch")
+# Symbols processed at the same time; each process sends up to MAX_WORKERS requests to LM Studio
+MAX_PROCESSES = 4
+
+# Replace the partitions of one symbol in a hive-partitioned Parquet dataset
+def write_partitions(frame, base_dir, partition_cols):
+    ds.write_dataset(
+        pa.Table.from_pandas(frame, preserve_index=False),
+        base_dir,
+        format='parquet',
+        partitioning=partition_cols,
+        partitioning_flavor='hive',
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching',
+    )
+
+# Fetch, label and aggregate the news of one symbol. Runs in a worker process, so every shard
+# builds its own LM Studio client and opens the shared SQLite caches itself.
+def process_symbol(symbol, days=100, work_dir=WORK_DIR, output_dir=OUTPUT_DIR, fetch=None, base_url=lms.LMS_BASE_URL,
+                   max_workers=lms.MAX_WORKERS, batch_size=lms.BATCH_SIZE, news_path=lms.NEWS_CACHE_PATH,
+                   memo_path=sentiment_cache.CACHE_PATH, rollup_dir=ROLLUP_DIR):
+    fetch = fetch or lms.fetch_news
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=days)
+    articles = lms.news_cache.NewsCache(news_path).search(f"gnews|en|US|{symbol}", start_date, end_date, lambda start, end: fetch(symbol, start, end))
+
+    os.makedirs(work_dir, exist_ok=True)
+    csv_path = os.path.join(work_dir, f"{symbol}.csv")
+    client = OpenAI(base_url=base_url, api_key="lm-studio")
+    summary = lms.label_articles(articles, csv_path, client, max_workers, batch_size, cache=sentiment_cache.SentimentCache(memo_path))
+
+    rows = pd.read_csv(csv_path)
+    rows['Date'] = pd.to_datetime(rows['Date'], format=DATE_FORMAT, errors='coerce')
+    rows = rows.dropna(subset=['Date'])
+    rows = rows.assign(symbol=symbol, date=rows['Date'].dt.strftime('%Y-%m-%d'))
+    if not rows.empty:
+        write_partitions(rows, articles_dir(output_dir), ['symbol', 'date'])
+
+    rollups = SentimentRollups(csv_path, rollup_dir)
+    rollups.update()
+    daily = rollups.daily().reindex(columns=list(lms.SENTIMENTS) + ['UNKNOWN'], fill_value=0)
+    if not daily.empty:
+        write_partitions(daily.reset_index().assign(symbol=symbol), daily_counts_dir(output_dir), ['symbol'])
+
+    summary['symbol'] = symbol
+    summary['articles'] = len(rows)
+    return summary
+
+# Run the pipeline for many symbols, one shard per symbol on a process pool.
+# Returns ({symbol: summary}, {symbol: error message}).
+def run_batch(symbols, max_processes=MAX_PROCESSES, **options):
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    summaries = {}
+    failures = {}
+    with ProcessPoolExecutor(max_workers=max_processes) as pool:
+        futures = {pool.submit(process_symbol, symbol, **options): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                summaries[symbol] = future.result()
+            except Exception as e:
+                failures[symbol] = f"{type(e).__name__}: {e}"
+                print(f"{symbol}: failed ({failures[symbol]})")
+                continue
+            summary = summaries[symbol]
+            print(f"{symbol}: {summary['articles']} articles, {summary['labelled']} newly labelled, "
+                  f"{summary['failed']} failed, {summary['cache_hit_ratio']:.0%} memo hit ratio")
+    return summaries, failures
@@ -0,0 +1,81 @@
+# sentiment_cache.py
+import hashlib
+import os
+import sqlite3
+import time
+import unicodedata
+from contextlib import contextmanager
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "sentiment.sqlite")
+# Keys bound per SELECT. SQLite allows 32766 host parameters per statement since 3.32 but only
+# 999 in older builds, which some Python distributions still link against
+CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    memo_key TEXT PRIMARY KEY,
+    llm_response TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+def normalize_text(text):
+    # Syndicated copies of a story differ only in case, spacing and Unicode forms
+    return " ".join(unicodedata.normalize('NFKC', str(text or "")).casefold().split())
+
+def memo_key(text, model, system_prompt):
+    # The label depends on the model and the prompt as much as on the text
+    return hashlib.sha256("\0".join([model, system_prompt, normalize_text(text)]).encode('utf-8')).hexdigest()
+
+class SentimentCache:
+    """
+    Persistent memo of sentiment labels keyed by memo_key(description, model, system prompt).
+
+    `hits` counts articles that were labelled without a request to the model, `misses` the
+    requests that had to be made; both are updated by the classifier.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys):
+        # {memo_key: (llm_response, sentiment)} for the keys that are cached
+        keys = list(keys)
+        found = {}
+        with self.connect() as conn:
+            for start in range(0, len(keys), CHUNK_SIZE):
+                chunk = keys[start:start + CHUNK_SIZE]
+                rows = conn.execute(
+                    f"SELECT memo_key, llm_response, sentiment FROM labels WHERE memo_key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update((key, (llm_response, sentiment)) for key, llm_response, sentiment in rows)
+        return found
+
+    def put_many(self, entries):
+        # `entries` are (memo_key, llm_response, sentiment) tuples
+        now = time.time()
+        with self.connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO labels (memo_key, llm_response, sentiment, created_at) VALUES (?, ?, ?, ?)",
+                [(key, llm_response or "", sentiment, now) for key, llm_response, sentiment in entries],
+            )
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,45 @@
+# sentiment_partitions.py
+import os
+import pandas as pd
+from sentiment_rollups import CSV_PATH, CSV_SYMBOL, ROLLUP_DIR, load_rollups
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Parquet datasets written by sentiment_batch: articles/symbol=<SYM>/date=<YYYY-MM-DD>/ and daily_counts/symbol=<SYM>/
+OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+
+def articles_dir(output_dir=OUTPUT_DIR):
+    return os.path.join(output_dir, "articles")
+
+def daily_counts_dir(output_dir=OUTPUT_DIR):
+    return os.path.join(output_dir, "daily_counts")
+
+# Daily sentiment counts of one symbol, reading only that symbol's partition
+def load_daily_counts(symbol, output_dir=OUTPUT_DIR):
+    path = daily_counts_dir(output_dir)
+    if not os.path.exists(os.path.join(path, f"symbol={symbol}")):
+        return None
+    counts = pd.read_parquet(path, filters=[('symbol', '=', symbol)])
+    counts = counts.drop(columns='symbol').set_index('Date').sort_index()
+    # Drop sentiments that never occur, as the rollups do
+    return counts.loc[:, (counts != 0).any()]
+
+# Daily sentiment counts to chart for a symbol: its partition from a batch run, else the rollups
+# of news_articles.csv, which only holds the news of CSV_SYMBOL
+def daily_counts_for(symbol, output_dir=OUTPUT_DIR, csv_path=CSV_PATH, csv_symbol=CSV_SYMBOL, store_dir=ROLLUP_DIR):
+    counts = load_daily_counts(symbol, output_dir)
+    if counts is not None:
+        return counts
+    if symbol != csv_symbol:
+        partition = os.path.join(daily_counts_dir(output_dir), f"symbol={symbol}")
+        raise FileNotFoundError(f"No sentiment counts for {symbol}: {partition} is missing. "
+                                f"Run python complete_LMS_working.py {symbol} first.")
+    return load_rollups(csv_path, store_dir).daily()
+
+# Labelled articles of one symbol, optionally only the date partitions between start and end
+def load_articles(symbol, start=None, end=None, output_dir=OUTPUT_DIR):
+    filters = [('symbol', '=', symbol)]
+    if start is not None:
+        filters.append(('date', '>=', str(start)))
+    if end is not None:
+        filters.append(('date', '<=', str(end)))
+    return pd.read_parquet(articles_dir(output_dir), filters=filters)
@@ -0,0 +1,146 @@
+# sentiment_rollups.py
+import hashlib
+import io
+import json
+import os
+import pandas as pd
+from csv_records import complete_csv_length
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "news_articles.csv")
+# The one symbol whose news complete_LMS_working.py labels into CSV_PATH
+CSV_SYMBOL = "AAPL"
+ROLLUP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "rollups")
+DATE_FORMAT = '%a, %d %b %Y %H:%M:%S GMT'
+# Bytes before the read offset that must be unchanged for the CSV to count as only appended to
+FINGERPRINT_BYTES = 4096
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()
+
+# Add the counts of new rows to a (period x sentiment) count table
+def add_counts(counts, periods, sentiments):
+    new_counts = pd.crosstab(periods, sentiments)
+    new_counts.index.name = 'Date'
+    new_counts.columns.name = 'Sentiment'
+    if counts is None or counts.empty:
+        return new_counts
+    # fill_value only covers cells missing on one side; a new day without an old sentiment is missing on both
+    return counts.add(new_counts, fill_value=0).fillna(0).astype('int64')
+
+# Count table with every period between the first and last one, like resample() produces
+def contiguous(counts, freq):
+    if counts is None or counts.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name='Date'))
+    index = pd.date_range(counts.index.min(), counts.index.max(), freq=freq, name='Date')
+    counts = counts.reindex(index, fill_value=0)
+    return counts[sorted(counts.columns)]
+
+class SentimentRollups:
+    """
+    Daily and weekly sentiment counts of news_articles.csv, kept up to date incrementally.
+
+    The CSV is parsed once into a compact store (dates plus categorical sentiments) under
+    `store_dir`. update() reads only the bytes appended since the last call, adds their counts
+    to the rollups and persists everything, so the reports never re-read the whole CSV. If the
+    CSV was rewritten rather than appended to, the store is rebuilt from scratch.
+    """
+
+    def __init__(self, csv_path=CSV_PATH, store_dir=ROLLUP_DIR):
+        self.csv_path = csv_path
+        self.store_dir = os.path.join(store_dir, os.path.splitext(os.path.basename(csv_path))[0])
+        self.reset()
+        self.load()
+
+    def reset(self):
+        self.state = {'offset': 0, 'header': None, 'fingerprint': None}
+        self.rows = pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), 'Sentiment': pd.Series(dtype='category')})
+        self.daily_counts = pd.DataFrame(index=pd.DatetimeIndex([], name='Date'))
+        self.weekly_counts = pd.DataFrame(index=pd.DatetimeIndex([], name='Date'))
+
+    def path(self, name):
+        return os.path.join(self.store_dir, name)
+
+    def load(self):
+        if not os.path.exists(self.path('state.json')):
+            return
+        with open(self.path('state.json'), 'r', encoding='utf-8') as f:
+            self.state = json.load(f)
+        self.rows = pd.read_parquet(self.path('rows.parquet'))
+        self.daily_counts = pd.read_parquet(self.path('daily.parquet'))
+        self.weekly_counts = pd.read_parquet(self.path('weekly.parquet'))
+
+    def save(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        for name, frame in (('rows.parquet', self.rows), ('daily.parquet', self.daily_counts), ('weekly.parquet', self.weekly_counts)):
+            frame.to_parquet(self.path(name) + ".tmp")
+            os.replace(self.path(name) + ".tmp", self.path(name))
+        # The state is written last, so a crash in between only causes a rebuild
+        with open(self.path('state.json') + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(self.path('state.json') + ".tmp", self.path('state.json'))
+
+    # True when the CSV still holds the bytes the store was built from
+    def only_appended(self, f, size):
+        offset = self.state['offset']
+        if offset == 0:
+            return True
+        if size < offset:
+            return False
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        return fingerprint(f.read(offset - start)) == self.state['fingerprint']
+
+    # Fold rows appended to the CSV since the last update into the store; returns the number of new rows
+    def update(self):
+        if not os.path.exists(self.csv_path):
+            return 0
+        with open(self.csv_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if not self.only_appended(f, size):
+                self.reset()
+            f.seek(self.state['offset'])
+            data = f.read()
+
+        # A row still being written by a running labeller is left for the next update; its
+        # multi-line LLM reply may already hold newlines, so cut at the last complete record
+        data = data[:complete_csv_length(data)]
+        if not data:
+            return 0
+        offset = self.state['offset'] + len(data)
+        if self.state['header'] is None:
+            header, data = data.split(b'\n', 1)
+            self.state['header'] = header.decode('utf-8') + '\n'
+
+        new_rows = pd.read_csv(io.BytesIO(self.state['header'].encode('utf-8') + data), usecols=['Date', 'Sentiment'])
+        new_rows['Date'] = pd.to_datetime(new_rows['Date'], format=DATE_FORMAT, errors='coerce')
+        new_rows = new_rows.dropna(subset=['Date', 'Sentiment'])
+        if not new_rows.empty:
+            days = new_rows['Date'].dt.normalize()
+            # resample('W') labels each week by the Sunday it ends on
+            weeks = days + pd.to_timedelta((6 - days.dt.dayofweek) % 7, unit='D')
+            self.daily_counts = add_counts(self.daily_counts, days.rename('Date'), new_rows['Sentiment'])
+            self.weekly_counts = add_counts(self.weekly_counts, weeks.rename('Date'), new_rows['Sentiment'])
+            rows = pd.concat([self.rows.astype({'Sentiment': 'object'}), new_rows], ignore_index=True)
+            self.rows = rows.astype({'Sentiment': 'category'})
+
+        with open(self.csv_path, 'rb') as f:
+            start = max(0, offset - FINGERPRINT_BYTES)
+            f.seek(start)
+            self.state['fingerprint'] = fingerprint(f.read(offset - start))
+        self.state['offset'] = offset
+        self.save()
+        return len(new_rows)
+
+    # Sentiment counts per day, one column per sentiment
+    def daily(self):
+        return contiguous(self.daily_counts, 'D')
+
+    # Sentiment counts per week ending on Sunday, one column per sentiment
+    def weekly(self):
+        return contiguous(self.weekly_counts, 'W-SUN')
+
+# Rollups of a CSV brought up to date with its latest rows
+def load_rollups(csv_path=CSV_PATH, store_dir=ROLLUP_DIR):
+    rollups = SentimentRollups(csv_path, store_dir)
+    rollups.update()
+    return rollups
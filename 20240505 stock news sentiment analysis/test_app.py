@@ -0,0 +1,407 @@
+import unittest
+import csv
+import datetime
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from openai import OpenAI
+import complete_LMS_working as lms
+import sentiment_cache
+import sentiment_rollups
+import lag_correlation
+import sentiment_batch
+import sentiment_partitions
+from fakes import label_for, start_fake_server, make_articles, fake_fetch
+
+
+class TestSentimentClassifier(unittest.TestCase):
+    def setUp(self):
+        self.server = start_fake_server(latency=0.02)
+        self.client = OpenAI(base_url=f"http://127.0.0.1:{self.server.server_port}/v1", api_key="lm-studio")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def check_labels(self, results, articles):
+        self.assertEqual(sorted(article['url'] for article, _, _ in results), sorted(article['url'] for article in articles))
+        for article, _, sentiment in results:
+            self.assertEqual(sentiment, label_for(article['description']))
+
+    def test_concurrent_single_requests(self):
+        """Test every article is labelled with at most max_workers requests in flight"""
+        articles = make_articles(24)
+        results = list(lms.classify_articles(articles, self.client, max_workers=4))
+
+        self.check_labels(results, articles)
+        self.assertEqual(len(self.server.requests), 24)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+
+    def test_batched_prompts(self):
+        """Test several descriptions share one prompt and get structured labels back"""
+        articles = make_articles(25)
+        results = list(lms.classify_articles(articles, self.client, max_workers=4, batch_size=10))
+
+        self.check_labels(results, articles)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_unparseable_batch_falls_back(self):
+        """Test a batch reply without one label per description is retried article by article"""
+        self.server.garble_batches = True
+        articles = make_articles(5)
+        results = list(lms.classify_articles(articles, self.client, max_workers=2, batch_size=5))
+
+        self.check_labels(results, articles)
+        self.assertEqual(len(self.server.requests), 6)
+
+    def test_parse_batch_labels(self):
+        """Test labels are read from the JSON array in a batch reply"""
+        self.assertEqual(lms.parse_batch_labels('Labels: ["positive", "**NEGATIVE**", "mixed"]', 3), ["POSITIVE", "NEGATIVE", "UNKNOWN"])
+        self.assertIsNone(lms.parse_batch_labels('["POSITIVE"]', 2))
+        self.assertIsNone(lms.parse_batch_labels('POSITIVE', 1))
+
+
+class TestResumableRun(unittest.TestCase):
+    def setUp(self):
+        self.server = start_fake_server()
+        self.client = OpenAI(base_url=f"http://127.0.0.1:{self.server.server_port}/v1", api_key="lm-studio", max_retries=0)
+        self.out_dir = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.out_dir, "news_articles.csv")
+        self.cache = sentiment_cache.SentimentCache(os.path.join(self.out_dir, "sentiment.sqlite"))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def read_rows(self):
+        with open(self.output_path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def run_labelling(self, articles, **kwargs):
+        return lms.label_articles(articles, self.output_path, self.client, max_workers=4, cache=self.cache, **kwargs)
+
+    def test_failed_run_resumes(self):
+        """Test articles that failed are retried on the next run and nothing is labelled twice"""
+        articles = make_articles(12)
+        self.server.failing = {"story 7.", "story 9."}
+        summary = self.run_labelling(articles)
+        self.assertEqual((summary['labelled'], summary['failed']), (10, 2))
+        self.assertEqual(len(self.read_rows()), 10)
+
+        self.server.failing = set()
+        self.server.requests.clear()
+        summary = self.run_labelling(articles)
+        self.assertEqual((summary['labelled'], summary['skipped'], summary['failed']), (2, 10, 0))
+        self.assertEqual(len(self.server.requests), 2)
+
+        rows = self.read_rows()
+        self.assertEqual(sorted(row['URL'] for row in rows), sorted(article['url'] for article in articles))
+        for row in rows:
+            self.assertEqual(row['Sentiment'], label_for(row['Content']))
+
+    def test_interrupted_write_is_recovered(self):
+        """Test a row without a checkpoint line is kept and a half-written row is dropped"""
+        articles = make_articles(6)
+        self.run_labelling(articles[:3])
+        # Simulate a kill after the CSV row of article 3 was written but before its checkpoint
+        # line, and another in the middle of writing the row of article 4
+        with open(self.output_path, 'a', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(["Mon, 29 Apr 2024", "Story 3", articles[3]['description'], articles[3]['url'], "{}", "**NEUTRAL**", "NEUTRAL"])
+            f.write('"Mon, 29 Apr 2024","Story 4","AAPL sha')
+
+        self.server.requests.clear()
+        summary = self.run_labelling(articles)
+        self.assertEqual((summary['labelled'], summary['skipped']), (2, 4))
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(sorted(row['URL'] for row in self.read_rows()), sorted(article['url'] for article in articles))
+
+    def test_interrupted_multiline_write_is_recovered(self):
+        """Test a row killed inside a multi-line LLM reply is dropped, also when the cut follows a newline"""
+        articles = make_articles(6)
+        self.run_labelling(articles[:3])
+        # A complete row with a multi-line reply but no checkpoint line, then a kill while writing
+        # the reply of article 4, right after one of its newlines
+        with open(self.output_path, 'a', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(["Mon, 29 Apr 2024", "Story 3", articles[3]['description'], articles[3]['url'], "{}", "**NEUTRAL**\nNo \"clear\" signal.\n", "NEUTRAL"])
+            f.write(f'"Mon, 29 Apr 2024","Story 4","{articles[4]["description"]}",{articles[4]["url"]},{{}},"**NEGATIVE**\nbecause')
+            f.write('\n')
+
+        self.server.requests.clear()
+        summary = self.run_labelling(articles)
+        self.assertEqual((summary['labelled'], summary['skipped']), (2, 4))
+        self.assertEqual(len(self.server.requests), 2)
+        rows = self.read_rows()
+        self.assertEqual(sorted(row['URL'] for row in rows), sorted(article['url'] for article in articles))
+        self.assertEqual(rows[3]['LLMResponse'], "**NEUTRAL**\nNo \"clear\" signal.\n")
+
+        # A later run finds nothing left to do
+        self.assertEqual(self.run_labelling(articles)['labelled'], 0)
+        self.assertEqual(len(self.read_rows()), 6)
+
+    def test_malformed_replies_are_retried(self):
+        """Test an article whose reply held no label is neither written, checkpointed nor memoized, so a resumed run asks again"""
+        articles = make_articles(3)
+        self.server.unmarked = {"story 1."}
+        summary = self.run_labelling(articles)
+        self.assertEqual((summary['labelled'], summary['unknown'], summary['failed']), (2, 1, 1))
+        self.assertEqual(sorted(row['Sentiment'] for row in self.read_rows()), ["NEUTRAL", "POSITIVE"])
+
+        self.server.unmarked = set()
+        self.server.requests.clear()
+        summary = self.run_labelling(articles)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual((summary['labelled'], summary['skipped'], summary['failed']), (1, 2, 0))
+        rows = self.read_rows()
+        self.assertEqual(sorted(row['URL'] for row in rows), sorted(article['url'] for article in articles))
+        self.assertEqual(sorted(row['Sentiment'] for row in rows), ["NEGATIVE", "NEUTRAL", "POSITIVE"])
+        self.assertEqual(summary['cache_hits'], 0)
+
+    def test_fresh_run_discards_previous_output(self):
+        """Test resume=False labels everything again into a new file"""
+        articles = make_articles(3)
+        self.run_labelling(articles)
+        summary = self.run_labelling(articles, resume=False)
+        self.assertEqual(summary['labelled'], 3)
+        self.assertEqual(len(self.read_rows()), 3)
+
+    def test_repeated_descriptions_are_memoized(self):
+        """Test syndicated copies of a description cost one request and later runs none"""
+        articles = make_articles(4)
+        copies = [dict(article, url=article['url'] + "/copy", description="  " + article['description'].upper()) for article in articles]
+        summary = self.run_labelling(articles + copies)
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual((summary['labelled'], summary['cache_hits']), (8, 4))
+        self.assertEqual(summary['cache_hit_ratio'], 0.5)
+        for row in self.read_rows():
+            self.assertEqual(row['Sentiment'], label_for(row['Content'].lower()))
+
+        self.server.requests.clear()
+        summary = self.run_labelling(articles + copies, resume=False)
+        self.assertEqual(self.server.requests, [])
+        self.assertEqual((summary['labelled'], summary['cache_hit_ratio']), (8, 1.0))
+
+    def test_memo_key(self):
+        """Test the memo key ignores case and spacing but not the model or prompt"""
+        key = sentiment_cache.memo_key("Apple  shares UP", lms.MODEL, lms.SYSTEM_PROMPT)
+        self.assertEqual(key, sentiment_cache.memo_key(" apple shares up\n", lms.MODEL, lms.SYSTEM_PROMPT))
+        self.assertNotEqual(key, sentiment_cache.memo_key("apple shares up", "other-model", lms.SYSTEM_PROMPT))
+        self.assertNotEqual(key, sentiment_cache.memo_key("apple shares up", lms.MODEL, lms.BATCH_SYSTEM_PROMPT))
+
+
+class TestSentimentRollups(unittest.TestCase):
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.out_dir, "news_articles.csv")
+        self.store_dir = os.path.join(self.out_dir, "rollups")
+        self.rows = []
+
+    def tearDown(self):
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def append_rows(self, n, start_day=0):
+        sentiments = ["POSITIVE", "NEGATIVE", "NEUTRAL", "POSITIVE"]
+        write_header = not os.path.exists(self.csv_path)
+        with open(self.csv_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=lms.FIELDNAMES)
+            if write_header:
+                writer.writeheader()
+            for i in range(len(self.rows), len(self.rows) + n):
+                date = pd.Timestamp("2024-03-01") + pd.Timedelta(days=start_day + i // 3, hours=i % 24)
+                row = {'Date': date.strftime(sentiment_rollups.DATE_FORMAT), 'Title': f"Story {i}", 'Content': "x", 'URL': f"https://news.example/{i}", 'Publisher': "{}", 'LLMResponse': "", 'Sentiment': sentiments[i % 4]}
+                writer.writerow(row)
+                self.rows.append(row)
+
+    def reference(self, freq):
+        # Counts from a groupby/resample over the whole CSV, the reference for the rollups
+        data = pd.read_csv(self.csv_path)
+        data['Date'] = pd.to_datetime(data['Date'], format='%a, %d %b %Y %H:%M:%S GMT')
+        data.set_index('Date', inplace=True)
+        return data.groupby('Sentiment').resample(freq).size().unstack(0, fill_value=0)
+
+    def assert_matches_reference(self, rollups):
+        for counts, freq in ((rollups.daily(), 'D'), (rollups.weekly(), 'W')):
+            expected = self.reference(freq)
+            self.assertTrue(counts.index.equals(expected.index))
+            self.assertTrue((counts[expected.columns].to_numpy() == expected.to_numpy()).all())
+
+    def test_rollups_match_resample(self):
+        """Test daily and weekly rollups equal groupby/resample counts over the whole CSV"""
+        self.append_rows(100)
+        rollups = sentiment_rollups.load_rollups(self.csv_path, self.store_dir)
+        self.assertEqual(len(rollups.rows), 100)
+        self.assert_matches_reference(rollups)
+
+    def test_appended_rows_are_folded_in(self):
+        """Test an update reads only the new rows and a reopened store carries on from there"""
+        self.append_rows(50)
+        rollups = sentiment_rollups.load_rollups(self.csv_path, self.store_dir)
+        self.append_rows(30, start_day=20)
+        # Half-written row of a labeller that is still running
+        with open(self.csv_path, 'a', encoding='utf-8') as f:
+            f.write('"Sat, 06 Apr 2024 10:00:00 GMT",Partial')
+
+        self.assertEqual(rollups.update(), 30)
+        self.assertEqual(rollups.update(), 0)
+        reopened = sentiment_rollups.SentimentRollups(self.csv_path, self.store_dir)
+        self.assertEqual(reopened.update(), 0)
+        self.assertEqual(len(reopened.rows), 80)
+        self.assert_matches_reference(reopened)
+
+    def test_unfinished_multiline_row_waits_for_next_update(self):
+        """Test a row cut inside its multi-line LLM reply is left out until the labeller finishes it"""
+        self.append_rows(20)
+        rollups = sentiment_rollups.load_rollups(self.csv_path, self.store_dir)
+        row = '"Sat, 06 Apr 2024 10:00:00 GMT",Story,x,https://news.example/late,{},"**NEGATIVE**\r\nbecause ""guidance"" was cut\r\n",NEGATIVE\r\n'
+        cut = row.index('was cut')
+        with open(self.csv_path, 'a', newline='', encoding='utf-8') as f:
+            f.write(row[:cut])
+
+        self.assertEqual(rollups.update(), 0)
+        with open(self.csv_path, 'a', newline='', encoding='utf-8') as f:
+            f.write(row[cut:])
+        self.assertEqual(rollups.update(), 1)
+        self.assertEqual(len(rollups.rows), 21)
+        self.assert_matches_reference(rollups)
+
+    def test_header_only_csv_is_stored_empty(self):
+        """Test a CSV with no rows yet is stored and picked up once rows are appended"""
+        self.append_rows(0)
+        rollups = sentiment_rollups.load_rollups(self.csv_path, self.store_dir)
+        self.assertTrue(rollups.daily().empty)
+
+        self.append_rows(30)
+        reopened = sentiment_rollups.load_rollups(self.csv_path, self.store_dir)
+        self.assertEqual(len(reopened.rows), 30)
+        self.assert_matches_reference(reopened)
+
+    def test_rewritten_csv_is_rebuilt(self):
+        """Test a CSV that was started over replaces the stored counts"""
+        self.append_rows(60)
+        sentiment_rollups.load_rollups(self.csv_path, self.store_dir)
+        os.remove(self.csv_path)
+        self.rows = []
+        self.append_rows(90, start_day=40)
+
+        rollups = sentiment_rollups.load_rollups(self.csv_path, self.store_dir)
+        self.assertEqual(len(rollups.rows), 90)
+        self.assert_matches_reference(rollups)
+
+
+class TestLagCorrelation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.sentiment = rng.poisson(5, size=(250, 4)).astype(float)
+        # Returns follow sentiment two days later, plus noise
+        self.returns = np.full((250, 4), np.nan)
+        self.returns[2:] = 0.01 * (self.sentiment[:-2] - 5) + rng.normal(0, 0.02, size=(248, 4))
+        self.returns[100, 1] = np.nan
+
+    def test_matches_pandas_shift(self):
+        """Test every lag and series equals a pandas correlation with shifted returns"""
+        result = lag_correlation.lagged_correlation(self.sentiment, self.returns, n_boot=0)
+        self.assertEqual(list(result['lags']), list(range(-10, 11)))
+        for i, lag in enumerate(result['lags']):
+            for j in range(4):
+                expected = pd.Series(self.sentiment[:, j]).corr(pd.Series(self.returns[:, j]).shift(-lag))
+                self.assertAlmostEqual(result['corr'][i, j], expected)
+
+    def test_finds_leading_sentiment(self):
+        """Test the planted two-day lead is the strongest lag and its interval excludes zero"""
+        result = lag_correlation.lagged_correlation(self.sentiment, self.returns, n_boot=300)
+        best = result['corr'].argmax(axis=0)
+        self.assertTrue((result['lags'][best] == 2).all())
+        lag_2 = list(result['lags']).index(2)
+        self.assertTrue((result['ci_low'][lag_2] > 0).all())
+        self.assertTrue((result['ci_low'] <= result['corr']).all() and (result['corr'] <= result['ci_high']).all())
+
+    def test_single_return_series_against_many_sentiments(self):
+        """Test one return series is compared with every sentiment column"""
+        result = lag_correlation.lagged_correlation(self.sentiment, self.returns[:, 0], max_lag=3, n_boot=10)
+        self.assertEqual(result['corr'].shape, (7, 4))
+        self.assertEqual(result['ci_high'].shape, (7, 4))
+
+
+class TestSentimentBatch(unittest.TestCase):
+    def setUp(self):
+        self.server = start_fake_server()
+        self.out_dir = tempfile.mkdtemp()
+        self.options = {
+            'days': 10,
+            'fetch': fake_fetch,
+            'base_url': f"http://127.0.0.1:{self.server.server_port}/v1",
+            'max_workers': 2,
+            'work_dir': os.path.join(self.out_dir, "work"),
+            'output_dir': os.path.join(self.out_dir, "output"),
+            'news_path': os.path.join(self.out_dir, "news.sqlite"),
+            'memo_path': os.path.join(self.out_dir, "sentiment.sqlite"),
+            'rollup_dir': os.path.join(self.out_dir, "rollups"),
+        }
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+
+    def test_partition_readers_need_only_pandas(self):
+        """Test the readers used by the plot scripts don't import the labelling pipeline or open its caches"""
+        code = ("import sys, sentiment_partitions; "
+                "print(sorted({'complete_LMS_working', 'sentiment_batch', 'news_cache', 'sentiment_cache', 'openai', 'gnews'} & set(sys.modules)))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_symbols_are_sharded_and_partitioned(self):
+        """Test each symbol is labelled in its own shard and written to its own partitions"""
+        summaries, failures = sentiment_batch.run_batch(["AAPL", "MSFT", "aapl", "FAIL"], max_processes=2, **self.options)
+        self.assertEqual(sorted(summaries), ["AAPL", "MSFT"])
+        self.assertIn("ConnectionError", failures["FAIL"])
+        self.assertEqual(summaries["AAPL"]['articles'], 10)
+        self.assertEqual(len(self.server.requests), 20)
+
+        articles_dir = sentiment_partitions.articles_dir(self.options['output_dir'])
+        self.assertEqual(sorted(os.listdir(articles_dir)), ["symbol=AAPL", "symbol=MSFT"])
+        self.assertEqual(len(os.listdir(os.path.join(articles_dir, "symbol=MSFT"))), 5)
+
+        counts = sentiment_partitions.load_daily_counts("MSFT", self.options['output_dir'])
+        self.assertEqual(len(counts), 5)
+        self.assertTrue((counts['POSITIVE'] == 1).all() and (counts['NEGATIVE'] == 1).all())
+        self.assertIsNone(sentiment_partitions.load_daily_counts("NVDA", self.options['output_dir']))
+
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        recent = sentiment_partitions.load_articles("AAPL", start=yesterday, output_dir=self.options['output_dir'])
+        self.assertEqual(len(recent), 4)
+        self.assertTrue((recent['Sentiment'] == recent['Content'].map(label_for)).all())
+
+    def test_chart_counts_fall_back_to_csv_only_for_its_symbol(self):
+        """Test a symbol without a partition falls back to news_articles.csv only if the CSV holds its news"""
+        sentiment_batch.run_batch(["MSFT"], max_processes=1, **self.options)
+        csv_path = os.path.join(self.out_dir, "news_articles.csv")
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=lms.FIELDNAMES)
+            writer.writeheader()
+            writer.writerow({'Date': "Wed, 01 May 2024 12:00:00 GMT", 'Title': "t", 'Content': "c", 'URL': "u", 'Sentiment': "POSITIVE"})
+        options = {'output_dir': self.options['output_dir'], 'csv_path': csv_path, 'store_dir': os.path.join(self.out_dir, "csv_rollups")}
+
+        self.assertEqual(len(sentiment_partitions.daily_counts_for("MSFT", **options)), 5)
+        self.assertEqual(sentiment_partitions.daily_counts_for("AAPL", **options)['POSITIVE'].tolist(), [1])
+        with self.assertRaisesRegex(FileNotFoundError, "symbol=NVDA"):
+            sentiment_partitions.daily_counts_for("NVDA", **options)
+
+    def test_rerun_reuses_labels_and_partitions(self):
+        """Test a second batch run makes no new requests and does not duplicate rows"""
+        sentiment_batch.run_batch(["AAPL"], max_processes=1, **self.options)
+        self.server.requests.clear()
+        summaries, _ = sentiment_batch.run_batch(["AAPL"], max_processes=1, **self.options)
+
+        self.assertEqual(self.server.requests, [])
+        self.assertEqual(summaries["AAPL"]['skipped'], 10)
+        self.assertEqual(len(sentiment_partitions.load_articles("AAPL", output_dir=self.options['output_dir'])), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# ann_index.py
+import numpy as np
+from vector_store import normalize_rows, top_k_indices
+
+# Rows scored per matrix product when assigning vectors to lists
+ASSIGN_CHUNK = 65536
+
+
+# Index of the most similar centroid for every row, computed in chunks to bound memory
+def assign_lists(vectors, centroids):
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        assignments[start:start + ASSIGN_CHUNK] = np.argmax(vectors[start:start + ASSIGN_CHUNK] @ centroids.T, axis=1)
+    return assignments
+
+
+# Spherical k-means: centroids are unit vectors and rows join the centroid with the highest cosine
+def spherical_kmeans(vectors, n_clusters, n_iter=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = np.array(vectors[rng.choice(len(vectors), n_clusters, replace=False)], dtype=np.float32)
+    for _ in range(n_iter):
+        assignments = assign_lists(vectors, centroids)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=n_clusters)
+        filled = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.add.reduceat(vectors[order], starts[filled], axis=0)
+        centroids[filled] = normalize_rows(sums)
+        # Clusters that lost all their rows restart from random rows
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+    return centroids
+
+
+class IVFFlatIndex:
+    # Inverted-file index with exact ("flat") scoring inside each list. Rows are clustered with
+    # spherical k-means into n_lists lists; a query scores the centroids and then only the rows of
+    # its n_probe closest lists. More probes give better recall at higher latency.
+    def __init__(self, n_lists=None, n_probe=8, train_size=100_000, n_iter=10, rebuild_ratio=0.2, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size
+        self.n_iter = n_iter
+        # The store rebuilds the index once this share of its rows was added after the last build
+        self.rebuild_ratio = rebuild_ratio
+        self.seed = seed
+        self.n_indexed = 0
+        self.centroids = None
+
+    def build(self, embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        n = len(embeddings)
+        self.n_indexed = n
+        if n == 0:
+            self.centroids = None
+            return self
+        # About sqrt(n) lists keeps the centroid scan and the probed lists equally cheap
+        n_lists = min(n, self.n_lists or max(1, int(np.sqrt(n))))
+        rng = np.random.default_rng(self.seed)
+        sample = embeddings[np.sort(rng.choice(n, min(n, max(self.train_size, n_lists)), replace=False))]
+        self.centroids = spherical_kmeans(sample, n_lists, self.n_iter, self.seed)
+
+        assignments = assign_lists(embeddings, self.centroids)
+        # Row ids grouped by list, with list i at order[offsets[i]:offsets[i + 1]]
+        self.order = np.argsort(assignments, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        return self
+
+    # (indices, scores) of the approximate top_k rows for every row of a (queries x dim) matrix
+    # of unit-length queries. Rows without enough candidates are padded with -1 / -inf.
+    def search(self, queries, embeddings, top_k=5, n_probe=None):
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        probes = top_k_indices(queries @ self.centroids.T, n_probe)
+        indices = np.full((len(queries), top_k), -1, dtype=np.int64)
+        scores = np.full((len(queries), top_k), -np.inf, dtype=np.float32)
+        for q, (query, lists) in enumerate(zip(queries, probes)):
+            # Sorted row ids make the gather read the matrix front to back
+            candidates = np.sort(np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists]))
+            candidate_scores = embeddings[candidates] @ query
+            best = top_k_indices(candidate_scores, top_k)
+            indices[q, :len(best)] = candidates[best]
+            scores[q, :len(best)] = candidate_scores[best]
+        return indices, scores
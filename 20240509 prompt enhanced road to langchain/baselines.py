@@ -0,0 +1,20 @@
+# baselines.py
+import numpy as np
+from numpy.linalg import norm
+
+
+# Reference for SimpleVectorStore: a list of embeddings scanned with a Python loop per query.
+# The tests compare search results with it and benchmark.py times it as the baseline
+class ListVectorStore:
+    def __init__(self):
+        self.documents = []
+        self.embeddings = []
+
+    def add_document(self, embedding, document):
+        self.embeddings.append(embedding)
+        self.documents.append(document)
+
+    def search(self, query_embedding, top_k=5):
+        similarities = [np.dot(query_embedding, doc_emb) / (norm(query_embedding) * norm(doc_emb)) for doc_emb in self.embeddings]
+        top_k_indices = sorted(range(len(similarities)), key=lambda i: similarities[i], reverse=True)[:top_k]
+        return [self.documents[i] for i in top_k_indices]
@@ -0,0 +1,210 @@
+# benchmark.py
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from vector_store import SimpleVectorStore
+import embedding_index
+from ann_index import IVFFlatIndex
+from embedding_pipeline import build_store, peak_rss_mb, split_stream
+from embedding_cache import EmbeddingCache
+from baselines import ListVectorStore
+
+DIM = 512  # Universal Sentence Encoder output size
+CHUNK = 100_000
+
+
+# Random sentence embeddings in chunks, so the 1M case never needs two full copies in memory
+def embedding_chunks(n, seed=0):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, CHUNK):
+        yield start, rng.standard_normal((min(CHUNK, n - start), DIM), dtype=np.float32)
+
+
+def time_queries(store, queries):
+    start = time.perf_counter()
+    results = [store.search(query) for query in queries]
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def bench_vector_search(sizes=(10_000, 100_000, 1_000_000)):
+    queries = np.random.default_rng(1).standard_normal((5, DIM), dtype=np.float32)
+    print(f"Top-5 cosine search, {DIM}-d float32 embeddings")
+    for n in sizes:
+        old = ListVectorStore()
+        for start, chunk in embedding_chunks(n):
+            for i, row in enumerate(chunk):
+                old.add_document(row, f"sentence {start + i}")
+        old_queries = queries[:1] if n >= 1_000_000 else queries
+        old_results, t_old = time_queries(old, old_queries)
+        del old
+        gc.collect()
+
+        start_build = time.perf_counter()
+        new = SimpleVectorStore(capacity=n)
+        for start, chunk in embedding_chunks(n):
+            new.add_documents(chunk, [f"sentence {start + i}" for i in range(len(chunk))])
+        t_build = time.perf_counter() - start_build
+        new_results, t_new = time_queries(new, queries)
+        del new
+        gc.collect()
+
+        assert new_results[:len(old_results)] == old_results
+        print(f"  {n:>9,} sentences  list scan: {t_old * 1000:9.1f} ms/query   matrix: {t_new * 1000:7.1f} ms/query"
+              f"  ({t_old / t_new:6.0f}x)   build: {t_build:.1f} s")
+
+
+def bench_index_open(n=100_000):
+    index_dir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(index_dir, "source.txt")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write("GDPR")
+        print(f"Opening a saved index of {n:,} sentences")
+
+        def build():
+            store = SimpleVectorStore(capacity=n)
+            for start, chunk in embedding_chunks(n):
+                store.add_documents(chunk, [f"sentence {start + i}" for i in range(len(chunk))])
+            return store
+
+        start = time.perf_counter()
+        embedding_index.load_or_build([source], build, index_dir)
+        t_cold = time.perf_counter() - start
+        start = time.perf_counter()
+        store = embedding_index.load_or_build([source], build, index_dir)
+        t_warm = time.perf_counter() - start
+        _, t_query = time_queries(store, np.random.default_rng(1).standard_normal((5, DIM), dtype=np.float32))
+        print(f"  build + save (random embeddings): {t_cold * 1000:8.1f} ms")
+        print(f"  warm open (mmap)                : {t_warm * 1000:8.1f} ms   first queries: {t_query * 1000:.1f} ms/query")
+        del store
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+# Embeddings around random topic centers, closer to real sentence embeddings than pure noise
+def clustered_chunks(n, centers, noise=1.5, seed=0):
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, CHUNK):
+        size = min(CHUNK, n - start)
+        yield start, centers[rng.integers(0, len(centers), size)] + noise * rng.standard_normal((size, DIM), dtype=np.float32)
+
+
+def bench_ann(sizes=(100_000, 1_000_000), top_k=10, n_queries=50):
+    rng = np.random.default_rng(2)
+    centers = rng.standard_normal((2000, DIM), dtype=np.float32)
+    queries = centers[rng.integers(0, len(centers), n_queries)] + 1.5 * rng.standard_normal((n_queries, DIM), dtype=np.float32)
+    print(f"IVF-flat vs exact search, recall@{top_k} over {n_queries} queries, one query at a time")
+    for n in sizes:
+        exact = SimpleVectorStore(capacity=n)
+        for start, chunk in clustered_chunks(n, centers):
+            exact.add_documents(chunk, [f"sentence {start + i}" for i in range(len(chunk))])
+        truth, _ = exact.search_indices(queries, top_k)
+        _, t_exact = time_queries(exact, queries)
+
+        approx = SimpleVectorStore.from_arrays(exact.embeddings, exact.documents, ann=IVFFlatIndex())
+        start = time.perf_counter()
+        approx.ann.build(approx.embeddings)
+        t_build = time.perf_counter() - start
+        print(f"  {n:>9,} sentences  exact: {t_exact * 1000:7.1f} ms/query   IVF build ({len(approx.ann.centroids)} lists): {t_build:.1f} s")
+        for n_probe in (1, 4, 16, 64):
+            approx.ann.n_probe = n_probe
+            start = time.perf_counter()
+            found = [approx.search_indices(query, top_k)[0] for query in queries]
+            t_ann = (time.perf_counter() - start) / n_queries
+            recall = np.mean([len(set(a) & set(b)) / top_k for a, b in zip(truth, found)])
+            print(f"    n_probe={n_probe:<3d} recall@{top_k}: {recall:5.3f}   {t_ann * 1000:7.2f} ms/query  ({t_exact / t_ann:5.1f}x)")
+        del exact, approx
+        gc.collect()
+
+
+# Stand-in for the Universal Sentence Encoder: a two-layer projection whose hidden activations,
+# like the real model's, grow with the number of sentences per call
+class FakeEncoder:
+    def __init__(self, hidden=2048, seed=0):
+        rng = np.random.default_rng(seed)
+        self.w1 = rng.standard_normal((DIM, hidden), dtype=np.float32) / np.sqrt(DIM)
+        self.w2 = rng.standard_normal((hidden, DIM), dtype=np.float32) / np.sqrt(hidden)
+
+    def __call__(self, sentences):
+        rng = np.random.default_rng(len(sentences))
+        features = rng.standard_normal((len(sentences), DIM), dtype=np.float32)
+        return np.tanh(features @ self.w1) @ self.w2
+
+
+# Pages of a synthetic document; extracting each one takes `latency` seconds like a PDF page does
+def fake_pages(n_pages, sentences_per_page=50, latency=0.002):
+    for page in range(n_pages):
+        time.sleep(latency)
+        yield " ".join(f"Sentence {page}-{i} of the regulation." for i in range(sentences_per_page))
+
+
+def split_sentences(text):
+    return [s + "." for s in text.split(". ") if s]
+
+
+def run_embedding_mode(mode, n_pages, results):
+    encoder = FakeEncoder()
+    start = time.perf_counter()
+    if mode == "one-shot":
+        # Baseline: extract the whole document, split it, then embed every sentence in one call
+        sentences = split_sentences(" ".join(fake_pages(n_pages)))
+        store = SimpleVectorStore(capacity=len(sentences))
+        store.add_documents(encoder(sentences), sentences)
+        chunks = len(store)
+    else:
+        store, stats = build_store(split_stream(fake_pages(n_pages), split_sentences), encoder)
+        chunks = stats['chunks']
+    elapsed = time.perf_counter() - start
+    results.put((chunks, elapsed, peak_rss_mb()))
+
+
+def bench_streaming_embedder(n_pages=2000):
+    print(f"Embedding {n_pages * 50:,} sentences from {n_pages} pages (2 ms extraction per page)")
+    results = multiprocessing.Queue()
+    for mode in ("one-shot", "streamed"):
+        # A fresh process per mode so each peak RSS is measured on its own
+        process = multiprocessing.Process(target=run_embedding_mode, args=(mode, n_pages, results))
+        process.start()
+        chunks, elapsed, peak = results.get()
+        process.join()
+        print(f"  {mode:<9} {chunks / elapsed:8.0f} chunks/s   {elapsed:5.1f} s   peak RSS {peak:7.0f} MiB")
+
+
+def bench_embedding_cache(n=100_000, deltas=(0.001, 0.01, 0.1)):
+    encoder = FakeEncoder()
+    rows = [f"Fine {i} of EUR {i * 37 % 100_000} under Article {i % 99}." for i in range(n)]
+    print(f"Re-indexing {n:,} rows through the embedding cache")
+    cache_dir = tempfile.mkdtemp()
+    try:
+        cache = EmbeddingCache(os.path.join(cache_dir, "embeddings.sqlite"))
+        start = time.perf_counter()
+        encoder(rows)
+        t_uncached = time.perf_counter() - start
+        start = time.perf_counter()
+        cache.embed(rows, encoder)
+        t_cold = time.perf_counter() - start
+        print(f"  no cache                : {t_uncached:6.2f} s")
+        print(f"  cold cache              : {t_cold:6.2f} s")
+        rng = np.random.default_rng(0)
+        for delta in deltas:
+            changed = rows[:]
+            for i in rng.choice(n, int(n * delta), replace=False):
+                changed[i] = f"Fine {i} of EUR {rng.integers(1_000_000)} under Article {i % 99} (revised)."
+            start = time.perf_counter()
+            cache.embed(changed, encoder)
+            t_delta = time.perf_counter() - start
+            print(f"  {delta:6.1%} rows changed     : {t_delta:6.2f} s  ({t_uncached / t_delta:5.1f}x)")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    bench_vector_search()
+    bench_index_open()
+    bench_ann()
+    bench_streaming_embedder()
+    bench_embedding_cache()
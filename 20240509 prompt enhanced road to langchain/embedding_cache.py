@@ -0,0 +1,98 @@
+# embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import numpy as np
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "embeddings.sqlite")
+# Part of every key, so switching encoders never returns another model's vectors
+MODEL = "universal-sentence-encoder/4"
+# Sentence hashes bound per SELECT ... IN (...)
+CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    sentence_hash BLOB PRIMARY KEY,
+    embedding BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+def sentence_hash(sentence, model=MODEL):
+    # The encoder sees the exact text, so it is hashed as is
+    return hashlib.sha256(f"{model}\0{sentence}".encode('utf-8')).digest()
+
+class EmbeddingCache:
+    """
+    Persistent sentence-hash -> float32 embedding store shared by every re-indexing run.
+
+    embed() only sends sentences it has not seen before to the encoder, so rebuilding an
+    index after its source changed costs time proportional to the changed sentences.
+    `hits` and `misses` count sentences served from and added to the cache.
+    """
+
+    def __init__(self, path=CACHE_PATH, model=MODEL):
+        self.path = path
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, hashes):
+        # {sentence_hash: embedding} for the hashes that are cached
+        hashes = list(hashes)
+        found = {}
+        with self.connect() as conn:
+            for start in range(0, len(hashes), CHUNK_SIZE):
+                chunk = hashes[start:start + CHUNK_SIZE]
+                rows = conn.execute(
+                    f"SELECT sentence_hash, embedding FROM embeddings WHERE sentence_hash IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+        return found
+
+    def put_many(self, hashes, embeddings):
+        now = time.time()
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self.connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (sentence_hash, embedding, created_at) VALUES (?, ?, ?)",
+                [(key, embedding.tobytes(), now) for key, embedding in zip(hashes, embeddings)],
+            )
+
+    # Embed `sentences` with `encode`, calling it once with only the distinct uncached sentences
+    def embed(self, sentences, encode):
+        keys = [sentence_hash(sentence, self.model) for sentence in sentences]
+        found = self.get_many(set(keys))
+        missing = {}
+        for key, sentence in zip(keys, sentences):
+            if key not in found:
+                missing.setdefault(key, sentence)
+        if missing:
+            new_embeddings = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            self.put_many(missing.keys(), new_embeddings)
+            found.update(zip(missing.keys(), new_embeddings))
+        self.misses += len(missing)
+        self.hits += len(sentences) - len(missing)
+        if not keys:
+            return np.asarray(encode([]), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
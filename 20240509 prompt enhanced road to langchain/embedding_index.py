@@ -0,0 +1,95 @@
+# embedding_index.py
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from vector_store import SimpleVectorStore
+
+INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "index")
+# Bump when the way chunks are extracted, split or embedded changes, so old indexes are not reused
+INDEX_VERSION = "use-4/nltk-punkt-stream/2"
+
+
+# Hash of the source files' contents plus anything else the embeddings depend on
+def source_hash(paths, version=INDEX_VERSION):
+    digest = hashlib.sha256(version.encode('utf-8'))
+    for path in paths:
+        digest.update(b"\0" + os.path.basename(path).encode('utf-8') + b"\0")
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+# Read-only list of documents decoded on access from one UTF-8 blob and an offsets array,
+# so opening an index does not build millions of Python strings up front
+class DocumentList:
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("document index out of range")
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+# Write a store as embeddings.npy (normalized float32 rows), documents.bin + offsets.npy and meta.json.
+# Files go to a temporary directory that is renamed into place, so a reader never sees half an index.
+def save_index(store, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    encoded = [document.encode('utf-8') for document in store.documents]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(document) for document in encoded], out=offsets[1:])
+    np.save(os.path.join(tmp_path, "embeddings.npy"), np.ascontiguousarray(store.embeddings, dtype=np.float32))
+    np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+    with open(os.path.join(tmp_path, "documents.bin"), 'wb') as f:
+        f.write(b"".join(encoded))
+    with open(os.path.join(tmp_path, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({'documents': len(encoded), 'dim': int(store.embeddings.shape[1]) if len(encoded) else 0, 'version': INDEX_VERSION}, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+# Open an index with its embeddings and documents memory-mapped instead of read into memory
+def load_index(path):
+    with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta['documents'] == 0:
+        # Empty files can't be memory-mapped
+        return SimpleVectorStore()
+    embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode='r')
+    offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode='r')
+    if offsets[-1] > 0:
+        blob = np.memmap(os.path.join(path, "documents.bin"), dtype=np.uint8, mode='r')
+    else:
+        blob = b""
+    return SimpleVectorStore.from_arrays(embeddings, DocumentList(blob, offsets))
+
+
+# Open the index built from `sources`, calling build() -> SimpleVectorStore only when the
+# sources (or INDEX_VERSION) changed since an index was last saved
+def load_or_build(sources, build, index_dir=INDEX_DIR, name="index"):
+    key = f"{name}-{source_hash(sources)[:16]}"
+    path = os.path.join(index_dir, key)
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        os.makedirs(index_dir, exist_ok=True)
+        save_index(build(), path)
+        # Indexes of earlier versions of the same sources are no longer needed
+        for entry in os.listdir(index_dir):
+            if entry.startswith(f"{name}-") and entry != key and not entry.endswith(".tmp"):
+                shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+    return load_index(path)
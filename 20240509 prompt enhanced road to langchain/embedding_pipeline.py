@@ -0,0 +1,124 @@
+# embedding_pipeline.py
+import queue
+import sys
+import threading
+import time
+import numpy as np
+from vector_store import SimpleVectorStore
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Sentences per encoder call
+BATCH_SIZE = 256
+# Batches the producer may run ahead of the encoder; together with BATCH_SIZE this caps the text in flight
+QUEUE_SIZE = 4
+# A block that yields no sentence boundary is flushed once its carried-over text grows past this
+MAX_CARRY_CHARS = 10_000
+
+
+# Peak resident set size of this process in MiB, or None where it can't be read
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# Split a stream of text blocks (PDF pages, groups of lines) into sentences. The last sentence of
+# each block is held back and joined to the next block, since a block may end mid-sentence.
+def split_stream(blocks, splitter, separator=" "):
+    carry = ""
+    for block in blocks:
+        text = carry + separator + block if carry else block
+        sentences = splitter(text)
+        carry = sentences.pop() if sentences else ""
+        if len(carry) > MAX_CARRY_CHARS:
+            sentences.append(carry)
+            carry = ""
+        yield from sentences
+    if carry:
+        yield carry
+
+
+def batched(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+_DONE = object()
+
+
+# Put an item on a bounded queue, giving up once the consumer has stopped
+def _put(batches, item, stop):
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(items, batch_size, batches, stop):
+    try:
+        for batch in batched(items, batch_size):
+            if not _put(batches, batch, stop):
+                return
+    except BaseException as e:
+        _put(batches, _Failure(e), stop)
+        return
+    _put(batches, _DONE, stop)
+
+
+# Yield (sentences, embeddings) for fixed-size batches of `items`. A producer thread pulls the items
+# (e.g. extracting and splitting PDF pages) while this thread runs encode() on the previous batch;
+# the bounded queue between them keeps the producer at most QUEUE_SIZE batches ahead.
+def embed_stream(items, encode, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE):
+    batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce, args=(items, batch_size, batches, stop), daemon=True)
+    producer.start()
+    try:
+        while True:
+            batch = batches.get()
+            if batch is _DONE:
+                return
+            if isinstance(batch, _Failure):
+                raise batch.error
+            yield batch, np.asarray(encode(batch), dtype=np.float32)
+    finally:
+        stop.set()
+        producer.join()
+
+
+# Embed a stream of sentences into a vector store batch by batch.
+# Returns (store, stats) with the chunk count, chunks per second and the process' peak RSS.
+def build_store(items, encode, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE, store=None):
+    store = store if store is not None else SimpleVectorStore()
+    chunks = 0
+    start = time.perf_counter()
+    for batch, embeddings in embed_stream(items, encode, batch_size, queue_size):
+        store.add_documents(embeddings, batch)
+        chunks += len(batch)
+    elapsed = time.perf_counter() - start
+    return store, {
+        'chunks': chunks,
+        'seconds': elapsed,
+        'chunks_per_second': chunks / max(elapsed, 1e-9),
+        'peak_rss_mb': peak_rss_mb(),
+    }
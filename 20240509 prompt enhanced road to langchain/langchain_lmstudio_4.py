@@ -6,42 +6,43 @@ import numpy as np
 from openai import OpenAI
 import tensorflow as tf
 import os as os
-from numpy.linalg import norm
+from vector_store import SimpleVectorStore
+from embedding_index import load_or_build
+from embedding_pipeline import build_store, split_stream
+from embedding_cache import EmbeddingCache
 
 
 # Ensure nltk resources are available
 nltk.download('punkt')
 
-class SimpleVectorStore:
-    def __init__(self):
-        self.documents = []
-        self.embeddings = []
-
-    def add_document(self, embedding, document):
-        self.embeddings.append(embedding)
-        self.documents.append(document)
-
-    def search(self, query_embedding, top_k=5):
-        # Calculate cosine similarity between the query embedding and all stored embeddings
-        similarities = [np.dot(query_embedding, doc_emb) / (norm(query_embedding) * norm(doc_emb)) for doc_emb in self.embeddings]
-        
-        # Get the indices of the top_k documents with the highest similarity scores
-        top_k_indices = sorted(range(len(similarities)), key=lambda i: similarities[i], reverse=True)[:top_k]
-        
-        # Return the corresponding top_k documents
-        return [self.documents[i] for i in top_k_indices]
-
 
 # Load Google's Universal Sentence Encoder
 embed = hub.load("https://tfhub.dev/google/universal-sentence-encoder/4")
+# Sentences per encoder call; bounds the size of the encoder's intermediate tensors
+EMBED_BATCH_SIZE = 256
+# Lines of a text file read per block when streaming it
+TEXT_BLOCK_LINES = 1000
+
+# Sentences embedded in earlier runs; re-indexing a changed file only encodes its new sentences
+embedding_cache = EmbeddingCache()
 
-def embed_text(text_chunks):
+def embed_text(text_chunks, batch_size=EMBED_BATCH_SIZE, cache=embedding_cache):
     # Ensure text_chunks is a list of strings
     if not all(isinstance(chunk, str) for chunk in text_chunks):
         raise ValueError("All text chunks must be strings.")
-    # Convert text list to TensorFlow tensors and get embeddings
-    text_tensors = tf.convert_to_tensor(text_chunks, dtype=tf.string)
-    return embed(text_tensors).numpy()
+    if cache is not None:
+        return cache.embed(text_chunks, lambda missing: embed_text(missing, batch_size, cache=None))
+    # Embed fixed-size batches into one preallocated array instead of one tensor for the whole list
+    embeddings = None
+    for start in range(0, len(text_chunks), batch_size):
+        text_tensors = tf.convert_to_tensor(text_chunks[start:start + batch_size], dtype=tf.string)
+        batch = embed(text_tensors).numpy()
+        if embeddings is None:
+            embeddings = np.empty((len(text_chunks), batch.shape[1]), dtype=batch.dtype)
+        embeddings[start:start + len(batch)] = batch
+    if embeddings is None:
+        return embed(tf.constant([], dtype=tf.string)).numpy()
+    return embeddings
 
 
 def load_csv_data(filenames):
@@ -84,6 +85,27 @@ def load_and_extract_text(file_path):
 
     return " ".join(text_content)
 
+# Yield the text of a document block by block: PDF pages, or TEXT_BLOCK_LINES lines of a text file
+def iter_text_blocks(file_path):
+    _, file_extension = os.path.splitext(file_path)
+    if file_extension.lower() == '.pdf':
+        with pdfplumber.open(file_path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                if text:
+                    yield text
+                # Drop the parsed page objects; pdfplumber keeps them cached until the file is closed
+                page.flush_cache()
+    elif file_extension.lower() in ['.txt', '.text']:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            while True:
+                lines = [line for _, line in zip(range(TEXT_BLOCK_LINES), file)]
+                if not lines:
+                    break
+                yield "".join(lines)
+    else:
+        raise ValueError("Unsupported file type")
+
 def nltk_sentence_splitter(text):
     return nltk.tokenize.sent_tokenize(text)
 
@@ -92,17 +114,28 @@ def load_and_split_text(file_path):
     return nltk_sentence_splitter(document_text)
 
 def setup_vector_store_1(text_chunks_1):
-    vector_store_1 = SimpleVectorStore()
+    vector_store_1 = SimpleVectorStore(capacity=len(text_chunks_1))
     embeddings = embed_text(text_chunks_1)
-    for chunk, embedding in zip(text_chunks_1, embeddings):
-        vector_store_1.add_document(embedding, chunk)
+    vector_store_1.add_documents(embeddings, text_chunks_1)
     return vector_store_1
 
+# Build a vector store from a file without holding its whole text: pages are extracted and split on a
+# producer thread while the previous batch of sentences is embedded
+def stream_vector_store(file_path, batch_size=EMBED_BATCH_SIZE):
+    separator = " " if file_path.lower().endswith('.pdf') else "\n"
+    sentences = split_stream(iter_text_blocks(file_path), nltk_sentence_splitter, separator)
+    hits, misses = embedding_cache.hits, embedding_cache.misses
+    vector_store, stats = build_store(sentences, embed_text, batch_size=batch_size)
+    peak = f"{stats['peak_rss_mb']:.0f} MiB" if stats['peak_rss_mb'] is not None else "n/a"
+    print(f"Embedded {stats['chunks']} chunks from {file_path} in {stats['seconds']:.1f}s "
+          f"({stats['chunks_per_second']:.0f} chunks/s, peak RSS {peak}, "
+          f"{embedding_cache.hits - hits} cached, {embedding_cache.misses - misses} encoded)")
+    return vector_store
+
 def setup_vector_store_2(text_chunks_2):
     additional_embeddings = embed_text(text_chunks_2)
-    vector_store_2 = SimpleVectorStore()
-    for additional_chunk, additional_embedding in zip(text_chunks_2, additional_embeddings):
-        vector_store_2.add_document(additional_embedding, additional_chunk)
+    vector_store_2 = SimpleVectorStore(capacity=len(text_chunks_2))
+    vector_store_2.add_documents(additional_embeddings, text_chunks_2)
     
     return vector_store_2
 
@@ -227,10 +260,10 @@ def save_debug_info_to_html(gdpr_data, gdpr_text_chunks, vector_store_1, vector_
 if __name__ == "__main__":
     gdpr_data = load_csv_data(['gdpr_fines.csv', 'gdpr_fines_wiki_0.csv'])
     gdpr_data_text = csv_to_text(['gdpr_fines.csv', 'gdpr_fines_wiki_0.csv'], 'output.txt')
-    gdpr_text_chunks = load_and_split_text('CELEX_32016R0679_EN_TXT.pdf')
-    gdpr_data_text_chunks = load_and_split_text('output.txt')
-    vector_store_1 = setup_vector_store_1(gdpr_text_chunks) # Change here 
-    vector_store_2 = setup_vector_store_2(gdpr_data_text_chunks)
+    # Each index is built once per version of its source and memory-mapped from index/ afterwards
+    vector_store_1 = load_or_build(['CELEX_32016R0679_EN_TXT.pdf'], lambda: stream_vector_store('CELEX_32016R0679_EN_TXT.pdf'), name='gdpr_text') # Change here 
+    vector_store_2 = load_or_build(['output.txt'], lambda: stream_vector_store('output.txt'), name='gdpr_data')
+    gdpr_text_chunks = vector_store_1.documents
     user_query = (
                   "I am an IT company and want to mitigate GDPR risk, what should I do." 
                   "What are the penalties for non-compliance with GDPR?/n" "Use plain non legal tone. Do you have some examples." 
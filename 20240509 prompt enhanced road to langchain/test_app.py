@@ -0,0 +1,272 @@
+import unittest
+import os
+import re
+import threading
+import shutil
+import tempfile
+import numpy as np
+from numpy.linalg import norm
+from vector_store import SimpleVectorStore
+import embedding_index
+from ann_index import IVFFlatIndex
+from embedding_pipeline import build_store, embed_stream, split_stream
+from embedding_cache import EmbeddingCache
+from baselines import ListVectorStore
+
+
+class TestSimpleVectorStore(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.embeddings = rng.normal(size=(500, 32))
+        self.documents = [f"sentence {i}" for i in range(500)]
+        self.queries = rng.normal(size=(4, 32))
+
+    def test_matches_list_scan(self):
+        """Test the matrix store returns the same top-k documents as the list scan baseline"""
+        old = ListVectorStore()
+        new = SimpleVectorStore()
+        for embedding, document in zip(self.embeddings, self.documents):
+            old.add_document(embedding, document)
+            new.add_document(embedding, document)
+        for query in self.queries:
+            for top_k in (1, 5, 50):
+                self.assertEqual(new.search(query, top_k), old.search(query, top_k))
+
+    def test_bulk_add_and_batched_queries(self):
+        """Test bulk adds grow the matrix and a query matrix is answered in one call"""
+        store = SimpleVectorStore()
+        store.add_documents(self.embeddings[:100], self.documents[:100])
+        store.add_documents(self.embeddings[100:], self.documents[100:])
+        self.assertEqual(len(store), 500)
+        self.assertEqual(store.embeddings.dtype, np.float32)
+        self.assertTrue(np.allclose(norm(store.embeddings, axis=1), 1, atol=1e-5))
+
+        indices, scores = store.search_indices(self.queries, top_k=3)
+        self.assertEqual(indices.shape, (4, 3))
+        for query, row, row_scores in zip(self.queries, indices, scores):
+            expected = self.embeddings @ query / (norm(self.embeddings, axis=1) * norm(query))
+            self.assertEqual(list(row), list(np.argsort(-expected)[:3]))
+            self.assertTrue(np.allclose(row_scores, expected[row], atol=1e-5))
+
+    def test_edge_cases(self):
+        """Test empty stores, top_k beyond the store size, zero vectors and dimension checks"""
+        store = SimpleVectorStore()
+        self.assertEqual(store.search(self.queries[0]), [])
+        store.add_documents(self.embeddings[:3], self.documents[:3])
+        store.add_document(np.zeros(32), "empty")
+        self.assertEqual(len(store.search(self.queries[0], top_k=10)), 4)
+        with self.assertRaises(ValueError):
+            store.add_document(np.ones(16), "wrong size")
+
+
+class TestEmbeddingIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.index_dir = os.path.join(self.dir, "index")
+        self.source = os.path.join(self.dir, "source.txt")
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write("First sentence. Second sentence.")
+        self.builds = 0
+        rng = np.random.default_rng(0)
+        self.embeddings = rng.normal(size=(200, 16))
+        self.documents = [f"Artikel {i} – Rechtmäßigkeit" for i in range(200)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def build(self):
+        self.builds += 1
+        store = SimpleVectorStore()
+        store.add_documents(self.embeddings, self.documents)
+        return store
+
+    def test_warm_start_memory_maps_index(self):
+        """Test the second open skips building and serves the same results from memory-mapped files"""
+        cold = embedding_index.load_or_build([self.source], self.build, self.index_dir)
+        warm = embedding_index.load_or_build([self.source], self.build, self.index_dir)
+        self.assertEqual(self.builds, 1)
+        self.assertIsInstance(warm.embeddings, np.memmap)
+        self.assertEqual(len(warm), 200)
+        self.assertEqual(warm.documents[:3], self.documents[:3])
+        self.assertEqual(warm.documents[-1], self.documents[-1])
+        for query in self.embeddings[:5]:
+            self.assertEqual(warm.search(query), cold.search(query))
+
+    def test_changed_source_rebuilds(self):
+        """Test editing a source builds a new index and removes the old one"""
+        embedding_index.load_or_build([self.source], self.build, self.index_dir)
+        with open(self.source, 'a', encoding='utf-8') as f:
+            f.write(" Third sentence.")
+        embedding_index.load_or_build([self.source], self.build, self.index_dir)
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(len(os.listdir(self.index_dir)), 1)
+
+    def test_loaded_store_accepts_new_documents(self):
+        """Test adding to a memory-mapped store copies it instead of writing to the index files"""
+        embedding_index.load_or_build([self.source], self.build, self.index_dir)
+        store = embedding_index.load_or_build([self.source], self.build, self.index_dir)
+        store.add_document(np.ones(16), "new document")
+        self.assertEqual(len(store), 201)
+        self.assertEqual(store.search(np.ones(16), top_k=1), ["new document"])
+        self.assertEqual(len(embedding_index.load_or_build([self.source], self.build, self.index_dir)), 200)
+
+
+class TestIVFFlatIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        centers = rng.normal(size=(20, 32))
+        self.embeddings = centers[rng.integers(0, 20, 2000)] + 0.3 * rng.normal(size=(2000, 32))
+        self.documents = [f"sentence {i}" for i in range(2000)]
+        self.queries = centers[:10] + 0.3 * rng.normal(size=(10, 32))
+        self.exact = SimpleVectorStore()
+        self.exact.add_documents(self.embeddings, self.documents)
+
+    def recall(self, store, top_k=10):
+        truth, _ = self.exact.search_indices(self.queries, top_k)
+        found, _ = store.search_indices(self.queries, top_k)
+        return np.mean([len(set(a) & set(b)) / top_k for a, b in zip(truth, found)])
+
+    def test_probing_every_list_is_exact(self):
+        """Test probing all lists returns exactly the brute-force results"""
+        store = SimpleVectorStore(ann=IVFFlatIndex(n_lists=16, n_probe=16))
+        store.add_documents(self.embeddings, self.documents)
+        for query in self.queries:
+            self.assertEqual(store.search(query, top_k=10), self.exact.search(query, top_k=10))
+
+    def test_recall_grows_with_probes(self):
+        """Test the n_probe knob trades latency for recall on clustered data"""
+        store = SimpleVectorStore.from_arrays(self.exact.embeddings, self.exact.documents, ann=IVFFlatIndex(n_lists=40, n_probe=1))
+        low = self.recall(store)
+        store.ann.n_probe = 8
+        self.assertGreaterEqual(self.recall(store), low)
+        self.assertGreater(self.recall(store), 0.9)
+
+    def test_added_rows_are_searched_until_rebuild(self):
+        """Test rows added after a build are found, and the index rebuilds past rebuild_ratio"""
+        store = SimpleVectorStore(ann=IVFFlatIndex(n_lists=8, n_probe=1, rebuild_ratio=0.5))
+        store.add_documents(self.embeddings[:1000], self.documents[:1000])
+        store.search(self.queries[0])
+        self.assertEqual(store.ann.n_indexed, 1000)
+
+        store.add_document(self.queries[3], "exact match")
+        self.assertEqual(store.search(self.queries[3], top_k=1), ["exact match"])
+        self.assertEqual(store.ann.n_indexed, 1000)
+
+        store.add_documents(self.embeddings[1000:], self.documents[1000:])
+        store.search(self.queries[0])
+        self.assertEqual(store.ann.n_indexed, 2001)
+
+    def test_short_results_are_trimmed(self):
+        """Test a probe with fewer rows than top_k returns only real documents"""
+        store = SimpleVectorStore(ann=IVFFlatIndex(n_lists=20, n_probe=1))
+        store.add_documents(self.embeddings[:40], self.documents[:40])
+        indices, scores = store.search_indices(self.queries[0], top_k=30)
+        self.assertTrue((indices[scores == -np.inf] == -1).all())
+        self.assertEqual(len(store.search(self.queries[0], top_k=30)), int((indices >= 0).sum()))
+
+
+# Stand-in for nltk.sent_tokenize, which isn't needed to check the streaming logic
+def regex_splitter(text):
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+
+
+# Deterministic stand-in for the sentence encoder
+def fake_encode(sentences):
+    return np.array([[len(s), sum(map(ord, s)) % 97, 1.0] for s in sentences], dtype=np.float32)
+
+
+class TestEmbeddingPipeline(unittest.TestCase):
+    def setUp(self):
+        words = ["Article", "personal", "data", "controller", "shall", "process", "lawfully"]
+        rng = np.random.default_rng(0)
+        sentences = [" ".join(rng.choice(words, rng.integers(3, 12))) + "." for _ in range(1000)]
+        tokens = " ".join(sentences).split(" ")
+        # Page breaks fall mid-sentence, as they do in the GDPR PDF
+        self.pages = [" ".join(tokens[i:i + 100]) for i in range(0, len(tokens), 100)]
+
+    def test_streamed_store_matches_one_shot(self):
+        """Test page-by-page batches give the same sentences and embeddings as splitting the whole text"""
+        sentences = regex_splitter(" ".join(self.pages))
+        one_shot = SimpleVectorStore()
+        one_shot.add_documents(fake_encode(sentences), sentences)
+
+        streamed, stats = build_store(split_stream(self.pages, regex_splitter), fake_encode, batch_size=64)
+        self.assertEqual(list(streamed.documents), sentences)
+        self.assertTrue(np.allclose(streamed.embeddings, one_shot.embeddings))
+        self.assertEqual(stats['chunks'], len(sentences))
+        self.assertGreater(stats['chunks_per_second'], 0)
+
+    def test_producer_stays_bounded(self):
+        """Test the producer runs at most queue_size batches ahead of the encoder"""
+        pulled = []
+
+        def items():
+            for i in range(1000):
+                pulled.append(i)
+                yield f"sentence {i}."
+
+        stream = embed_stream(items(), fake_encode, batch_size=10, queue_size=2)
+        next(stream)
+        threading.Event().wait(0.2)
+        # One batch handed out, two queued and one being put
+        self.assertLessEqual(len(pulled), 40)
+        self.assertEqual(sum(len(batch) for batch, _ in stream), 990)
+
+    def test_producer_errors_reach_the_caller(self):
+        """Test an extraction error raised on the producer thread is raised by build_store"""
+        def broken_pages():
+            yield "First page."
+            raise ValueError("Unsupported file type")
+
+        with self.assertRaises(ValueError):
+            build_store(split_stream(broken_pages(), regex_splitter), fake_encode, batch_size=1)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "embeddings.sqlite")
+        self.encoded = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def encode(self, sentences):
+        self.encoded.extend(sentences)
+        return fake_encode(sentences)
+
+    def test_reindex_only_encodes_changed_sentences(self):
+        """Test a second run over an edited corpus only encodes the new and changed sentences"""
+        rows = [f"Fine {i} EUR {i * 1000} Article 83." for i in range(300)]
+        first = EmbeddingCache(self.path).embed(rows, self.encode)
+        self.assertEqual(len(self.encoded), 300)
+
+        changed = rows[:]
+        changed[10] = "Fine 10 EUR 999999 Article 83."
+        changed.append("Fine 300 EUR 5000 Article 5.")
+        self.encoded = []
+        cache = EmbeddingCache(self.path)
+        second = cache.embed(changed, self.encode)
+        self.assertEqual(self.encoded, [changed[10], changed[-1]])
+        self.assertEqual((cache.hits, cache.misses), (299, 2))
+        self.assertTrue(np.array_equal(second, fake_encode(changed)))
+        self.assertTrue(np.array_equal(second[:10], first[:10]))
+
+    def test_duplicates_are_encoded_once(self):
+        """Test repeated sentences in one call reach the encoder once and keep their positions"""
+        cache = EmbeddingCache(self.path)
+        sentences = ["Same.", "Other.", "Same."]
+        embeddings = cache.embed(sentences, self.encode)
+        self.assertEqual(self.encoded, ["Same.", "Other."])
+        self.assertTrue(np.array_equal(embeddings, fake_encode(sentences)))
+        self.assertEqual(cache.embed([], self.encode).shape[0], 0)
+
+    def test_model_is_part_of_the_key(self):
+        """Test vectors cached for one encoder are not returned for another"""
+        EmbeddingCache(self.path, model="use-4").embed(["Article 5."], self.encode)
+        EmbeddingCache(self.path, model="use-5").embed(["Article 5."], self.encode)
+        self.assertEqual(self.encoded, ["Article 5.", "Article 5."])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# vector_store.py
+import numpy as np
+
+
+# Scale rows to unit length so a dot product is the cosine similarity; all-zero rows stay zero
+def normalize_rows(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+# Indices of the top_k highest scores along the last axis, best first
+def top_k_indices(scores, top_k):
+    top_k = min(top_k, scores.shape[-1])
+    if top_k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    if top_k < scores.shape[-1]:
+        # argpartition finds the top_k in linear time; only those are sorted
+        candidates = np.argpartition(-scores, top_k - 1, axis=-1)[..., :top_k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+class SimpleVectorStore:
+    # Documents and their embeddings, kept as rows of one contiguous, pre-normalized float32
+    # matrix. A search is a single matrix-vector product followed by argpartition, unless an
+    # approximate index (e.g. ann_index.IVFFlatIndex) is plugged in through `ann`.
+    def __init__(self, capacity=0, ann=None):
+        self.documents = []
+        self._matrix = None
+        self._capacity = capacity
+        self.ann = ann
+
+    # A store over existing unit-length rows (e.g. a memory-mapped index) without copying them.
+    # The matrix is only copied if documents are added later.
+    @classmethod
+    def from_arrays(cls, embeddings, documents, ann=None):
+        if len(embeddings) != len(documents):
+            raise ValueError("Expected one embedding per document")
+        store = cls(ann=ann)
+        store._matrix = embeddings
+        store.documents = documents
+        return store
+
+    def __len__(self):
+        return len(self.documents)
+
+    # The stored (unit length) embeddings, one row per document
+    @property
+    def embeddings(self):
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return self._matrix[:len(self.documents)]
+
+    # Make room for `extra` more rows, at least doubling the matrix so appends stay amortized O(1)
+    def _reserve(self, extra, dim):
+        size = len(self.documents)
+        if self._matrix is None:
+            self._matrix = np.empty((max(self._capacity, extra, 16), dim), dtype=np.float32)
+        elif self._matrix.shape[1] != dim:
+            raise ValueError(f"Expected embeddings of dimension {self._matrix.shape[1]}, got {dim}")
+        elif size + extra > len(self._matrix):
+            grown = np.empty((max(2 * len(self._matrix), size + extra), dim), dtype=np.float32)
+            grown[:size] = self._matrix[:size]
+            self._matrix = grown
+        if not isinstance(self.documents, list):
+            self.documents = list(self.documents)
+
+    def add_document(self, embedding, document):
+        self.add_documents([embedding], [document])
+
+    def add_documents(self, embeddings, documents):
+        embeddings = normalize_rows(embeddings)
+        documents = list(documents)
+        if len(embeddings) != len(documents):
+            raise ValueError("Expected one embedding per document")
+        self._reserve(len(documents), embeddings.shape[1])
+        size = len(self.documents)
+        self._matrix[size:size + len(documents)] = embeddings
+        self.documents.extend(documents)
+
+    # (Re)build the approximate index when it is missing or too many rows were added since
+    def _refresh_ann(self):
+        unindexed = len(self.documents) - self.ann.n_indexed
+        if self.ann.centroids is None or unindexed > self.ann.rebuild_ratio * self.ann.n_indexed:
+            self.ann.build(self.embeddings)
+
+    def _search_ann(self, queries, top_k):
+        self._refresh_ann()
+        indices, scores = self.ann.search(queries, self.embeddings, top_k)
+        # Rows added after the last build are scanned exactly and merged in
+        tail = self.embeddings[self.ann.n_indexed:]
+        if len(tail):
+            tail_scores = queries @ tail.T
+            tail_indices = np.broadcast_to(np.arange(self.ann.n_indexed, len(self.documents)), tail_scores.shape)
+            indices = np.concatenate([indices, tail_indices], axis=1)
+            scores = np.concatenate([scores, tail_scores], axis=1)
+            best = top_k_indices(scores, top_k)
+            indices = np.take_along_axis(indices, best, axis=1)
+            scores = np.take_along_axis(scores, best, axis=1)
+        return indices, scores
+
+    # (indices, cosine similarities) of the top_k documents closest to one query, or to each
+    # row of a (queries x dim) matrix, best first. With an approximate index, rows that could not
+    # be filled are -1 with a score of -inf.
+    def search_indices(self, query_embedding, top_k=5):
+        query = np.asarray(query_embedding, dtype=np.float32)
+        queries = normalize_rows(query)
+        if not self.documents:
+            indices = np.empty((len(queries), 0), dtype=np.int64)
+            scores = np.empty((len(queries), 0), dtype=np.float32)
+        elif self.ann is not None:
+            indices, scores = self._search_ann(queries, top_k)
+        else:
+            scores = queries @ self.embeddings.T
+            indices = top_k_indices(scores, top_k)
+            scores = np.take_along_axis(scores, indices, axis=-1)
+        if query.ndim == 1:
+            return indices[0], scores[0]
+        return indices, scores
+
+    def search(self, query_embedding, top_k=5):
+        # Return the top_k documents with the highest cosine similarity to the query
+        indices, _ = self.search_indices(query_embedding, top_k)
+        return [self.documents[i] for i in indices if i >= 0]
@@ -1,31 +1,87 @@
+import datetime
 import json
 import os
+import sys
+from email.utils import parsedate_to_datetime
 from gnews import GNews
+# news_cache.py lives in the repo's shared/ folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+import news_cache
 
 # Get the data directory path
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
+NEWS_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "news.sqlite")
 
 def get_data_file_path(filename):
     """Get the full path for a data file."""
     return os.path.join(DATA_DIR, filename)
 
-def search_google_news(query, max_results=5, language="en", country="US"):
+# Article store of this project; repeated searches only query Google News for days not fetched yet
+news_store = news_cache.NewsCache(NEWS_CACHE_PATH)
+
+def fetch_google_news(query, start_date, end_date, max_results=5, language="en", country="US"):
+    """
+    Fetch Google News articles published between two dates.
+
+    Args:
+        query (str): The search query.
+        start_date (datetime.date): First day to search.
+        end_date (datetime.date): Last day to search, inclusive.
+        max_results (int): Maximum number of results to fetch.
+        language (str): Language of the news articles.
+        country (str): Country for regional news.
+
+    Returns:
+        list: (url, published datetime or None, article) tuples for the news cache.
+    """
+    # GNews treats end_date as exclusive
+    end_date = end_date + datetime.timedelta(days=1)
+    google_news = GNews(
+        language=language,
+        country=country,
+        max_results=max_results,
+        start_date=(start_date.year, start_date.month, start_date.day),
+        end_date=(end_date.year, end_date.month, end_date.day),
+    )
+    results = []
+    for article in google_news.get_news(query):
+        try:
+            published = parsedate_to_datetime(article["published date"])
+        except (KeyError, TypeError, ValueError):
+            published = None
+        results.append((article["url"], published, article))
+    return results
+
+def search_google_news(query, max_results=5, language="en", country="US", days=30):
     """
     Perform a Google News search using the given query.
 
+    Results are served from the local news cache; only the days of the window
+    that were not searched yet (or the current day, once it is stale) are fetched.
+    The cache merges articles from several fetches, so the result is the newest
+    `max_results` articles of the last `days` days rather than GNews's own ranking.
+
     Args:
         query (str): The search query.
         max_results (int): Maximum number of results to return.
         language (str): Language of the news articles.
         country (str): Country for regional news.
+        days (int): Number of past days to search.
 
     Returns:
-        list: A list of dictionaries with search results.
+        list: A list of dictionaries with search results, newest first.
     """
-    google_news = GNews(language=language, country=country, max_results=max_results)
-    results = google_news.get_news(query)
-    return results
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=days)
+    cache_key = f"gnews|{language}|{country}|{max_results}|{query}"
+    results = news_store.search(
+        cache_key,
+        start_date,
+        end_date,
+        lambda start, end: fetch_google_news(query, start, end, max_results, language, country),
+    )
+    return results[:max_results]
 
 def save_results_to_json(results, filename="gn.json"):
     """
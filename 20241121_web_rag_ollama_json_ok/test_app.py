@@ -1,6 +1,11 @@
 import unittest
 import os
 import json
+import datetime
+import shutil
+import tempfile
+from unittest import mock
+import gn
 from gradio_app import (
     verify_json_data,
     generate_source_data,
@@ -60,5 +65,62 @@ class TestRAGChatbot(unittest.TestCase):
         """Clean up any test artifacts"""
         pass
 
+class FakeGNews:
+    """Offline stand-in for gnews.GNews serving one article per day of the requested window."""
+
+    calls = []
+
+    def __init__(self, language, country, max_results, start_date, end_date):
+        self.start_date = datetime.date(*start_date)
+        self.end_date = datetime.date(*end_date)
+        FakeGNews.calls.append((self.start_date, self.end_date))
+
+    def get_news(self, query):
+        days = (self.end_date - self.start_date).days
+        articles = []
+        for i in range(days):
+            day = self.start_date + datetime.timedelta(days=i)
+            articles.append({
+                'title': f"{query} news {day}",
+                'url': f"https://news.example/{day}",
+                'published date': datetime.datetime.combine(day, datetime.time(9)).strftime("%a, %d %b %Y %H:%M:%S GMT"),
+            })
+        return articles
+
+
+class TestGoogleNewsCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        FakeGNews.calls = []
+        self.patches = [
+            mock.patch.object(gn, 'news_store', gn.news_cache.NewsCache(os.path.join(self.cache_dir, "news.sqlite"))),
+            mock.patch.object(gn, 'GNews', FakeGNews),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def test_newest_articles_from_the_window(self):
+        """Test the search returns the newest max_results articles of the last `days` days"""
+        results = gn.search_google_news("GPT", max_results=3, days=30)
+
+        today = datetime.date.today()
+        # GNews treats end_date as exclusive, so the window is requested up to tomorrow
+        self.assertEqual(FakeGNews.calls, [(today - datetime.timedelta(days=30), today + datetime.timedelta(days=1))])
+        self.assertEqual([r['title'] for r in results], [f"GPT news {today - datetime.timedelta(days=i)}" for i in range(3)])
+
+    def test_repeated_search_is_served_from_cache(self):
+        """Test a repeated search within the TTL doesn't call Google News again"""
+        first = gn.search_google_news("GPT", max_results=3)
+        again = gn.search_google_news("GPT", max_results=3)
+
+        self.assertEqual(len(FakeGNews.calls), 1)
+        self.assertEqual(first, again)
+
+    def tearDown(self):
+        """Clean up any test artifacts"""
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,135 @@
+# news_cache.py
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Seconds before the most recent day of a search is fetched again
+TTL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url_hash TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    published TEXT,
+    article TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS query_articles (
+    query TEXT NOT NULL,
+    url_hash TEXT NOT NULL REFERENCES articles(url_hash),
+    PRIMARY KEY (query, url_hash)
+);
+CREATE TABLE IF NOT EXISTS query_coverage (
+    query TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published);
+"""
+
+def url_hash(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+def subtract_ranges(start, end, covered):
+    # Date ranges within [start, end] not covered by any of the (start, end) ranges in `covered`
+    missing = []
+    cursor = start
+    for cov_start, cov_end in sorted(covered):
+        if cov_end < cursor:
+            continue
+        if cov_start > end:
+            break
+        if cov_start > cursor:
+            missing.append((cursor, cov_start - datetime.timedelta(days=1)))
+        cursor = max(cursor, cov_end + datetime.timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+class NewsCache:
+    """
+    Content-addressed store for news search results, shared by every query in one SQLite file.
+
+    Articles are stored once under the SHA-256 of their URL, whichever query found them. For each
+    query the cache remembers which date ranges were already searched, so an overlapping search
+    only fetches the days that are missing. Days up to the fetch date count as covered for `ttl`
+    seconds; after that, the last fetched day is searched again because new articles may appear.
+    Articles without a publication date are filed under the last day of the range that found them.
+
+    Each project passes its own `path`: articles are keyed by URL alone, and the dicts stored for
+    them differ between the news clients (GoogleNews, gnews) the projects use.
+    """
+
+    def __init__(self, path, ttl=TTL):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def covered_ranges(self, conn, query, now):
+        covered = []
+        for start, end, fetched_at in conn.execute("SELECT start_date, end_date, fetched_at FROM query_coverage WHERE query = ?", (query,)):
+            start = datetime.date.fromisoformat(start)
+            end = datetime.date.fromisoformat(end)
+            if now - fetched_at >= self.ttl:
+                # Only days that were already over at fetch time stay covered
+                end = min(end, datetime.date.fromtimestamp(fetched_at) - datetime.timedelta(days=1))
+            if start <= end:
+                covered.append((start, end))
+        return covered
+
+    def missing_ranges(self, query, start_date, end_date):
+        with self.connect() as conn:
+            return subtract_ranges(start_date, end_date, self.covered_ranges(conn, query, time.time()))
+
+    def store(self, query, start_date, end_date, results):
+        # `results` are (url, published datetime or None, article dict) tuples
+        now = time.time()
+        # An undated article is at most as recent as the end of the range, or the fetch day
+        undated = min(end_date, datetime.date.fromtimestamp(now)).isoformat()
+        with self.connect() as conn:
+            for url, published, article in results:
+                key = url_hash(url)
+                conn.execute(
+                    "INSERT OR IGNORE INTO articles (url_hash, url, published, article) VALUES (?, ?, ?, ?)",
+                    (key, url, published.isoformat() if published else undated, json.dumps(article, default=str)),
+                )
+                conn.execute("INSERT OR IGNORE INTO query_articles (query, url_hash) VALUES (?, ?)", (query, key))
+            conn.execute(
+                "INSERT INTO query_coverage (query, start_date, end_date, fetched_at) VALUES (?, ?, ?, ?)",
+                (query, start_date.isoformat(), end_date.isoformat(), now),
+            )
+
+    def articles(self, query, start_date, end_date):
+        # Articles found by `query` published within [start_date, end_date], newest first
+        with self.connect() as conn:
+            rows = conn.execute(
+                """SELECT a.article FROM articles a JOIN query_articles q ON q.url_hash = a.url_hash
+                   WHERE q.query = ? AND substr(a.published, 1, 10) >= ? AND substr(a.published, 1, 10) <= ?
+                   ORDER BY a.published DESC""",
+                (query, start_date.isoformat(), end_date.isoformat()),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def search(self, query, start_date, end_date, fetch):
+        # Return the articles for `query` between two dates, calling
+        # fetch(start_date, end_date) -> [(url, published, article), ...] only for missing ranges
+        for missing_start, missing_end in self.missing_ranges(query, start_date, end_date):
+            self.store(query, missing_start, missing_end, fetch(missing_start, missing_end))
+        return self.articles(query, start_date, end_date)
@@ -0,0 +1,63 @@
+import unittest
+import datetime
+import os
+import shutil
+import tempfile
+import news_cache
+
+
+class TestNewsCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.store = news_cache.NewsCache(os.path.join(self.cache_dir, "news.sqlite"))
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def fetch(self, start, end):
+        # One article per day in the requested range
+        self.calls.append((start, end))
+        days = (end - start).days + 1
+        return [(f"https://news.example/{start + datetime.timedelta(days=i)}", datetime.datetime.combine(start + datetime.timedelta(days=i), datetime.time(9)), {'title': f"Day {i}"}) for i in range(days)]
+
+    def test_overlapping_search_fetches_only_missing_days(self):
+        """A wider search only fetches the days the cache has not seen yet"""
+        first = self.store.search("AAPL", datetime.date(2024, 4, 1), datetime.date(2024, 4, 10), self.fetch)
+        second = self.store.search("AAPL", datetime.date(2024, 4, 5), datetime.date(2024, 4, 15), self.fetch)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 11)
+        self.assertEqual(self.calls, [(datetime.date(2024, 4, 1), datetime.date(2024, 4, 10)), (datetime.date(2024, 4, 11), datetime.date(2024, 4, 15))])
+        self.store.search("AAPL", datetime.date(2024, 4, 2), datetime.date(2024, 4, 14), self.fetch)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_articles_are_stored_once_across_queries(self):
+        """The same URL found by two queries is stored as one article"""
+        self.store.search("AAPL", datetime.date(2024, 4, 1), datetime.date(2024, 4, 3), self.fetch)
+        self.store.search("Apple", datetime.date(2024, 4, 1), datetime.date(2024, 4, 3), self.fetch)
+        with self.store.connect() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0], 3)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM query_articles").fetchone()[0], 6)
+
+    def test_expired_search_refetches_last_day(self):
+        """After the TTL the day the search ran on is fetched again"""
+        today = datetime.date.today()
+        start = today - datetime.timedelta(days=5)
+        self.store.search("AAPL", start, today, self.fetch)
+        self.store.ttl = 0
+        self.store.search("AAPL", start, today, self.fetch)
+        self.assertEqual(self.calls[-1], (today, today))
+
+    def test_undated_articles_stay_in_their_range(self):
+        """An undated article is filed under the end of the range that found it, not returned for every range"""
+        undated = lambda start, end: [("https://news.example/undated", None, {'title': "Undated"})]
+        found = self.store.search("AAPL", datetime.date(2024, 1, 1), datetime.date(2024, 1, 31), undated)
+        later = self.store.search("AAPL", datetime.date(2024, 6, 1), datetime.date(2024, 6, 5), self.fetch)
+        end_of_january = self.store.search("AAPL", datetime.date(2024, 1, 31), datetime.date(2024, 1, 31), self.fetch)
+        self.assertEqual(found, [{'title': "Undated"}])
+        self.assertNotIn({'title': "Undated"}, later)
+        self.assertEqual(end_of_january, [{'title': "Undated"}])
+
+
+if __name__ == '__main__':
+    unittest.main()